@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Quote Server Benchmark
+
+Load-tests the cargo quote service on a synthetic rate table with the same
+layout as cargo-shipment-data.md, scaled to --routes rows: per-kg, tiered
+and per-coly prices, penerus notes and minimums spread over generated
+destinations.
+
+  startup     Table parse and compile time, warm (cached) load time, and
+              destination index build time
+  in-process  QuoteEngine.quote() directly, without HTTP
+  server      --clients concurrent keep-alive connections sending
+              single quotes, then batches of --batch requests (TCP, or a
+              Unix socket with --socket)
+
+--repeat is the share of requests drawn from a small hot set, which the
+quote LRU answers; the rest are distinct requests. Reports requests/s and
+p50/p99 latency.
+
+Usage:
+    python benchmark_quote_server.py
+    python benchmark_quote_server.py --routes 20000 --clients 16 --requests 500
+    python benchmark_quote_server.py --socket --repeat 0.9 --batch 200
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+
+from destinations import DestinationIndex, PROVINCES
+from quote import QuoteEngine
+from quote_server import make_server
+from rate_table import load_table
+
+
+EXPEDITIONS = ["Mojoroto Express", "Panca Kobra Sakti", "Gemilang", "Alam Sejahtera Logistik",
+               "Sinar Jaya Cargo", "Lintas Nusantara", "Borneo Ekspres", "Dharma Logistik"]
+SYLLABLES = ["ba", "ma", "su", "ra", "ka", "ti", "lo", "nga", "wi", "jo", "pa", "se", "do", "ri", "gu", "tan"]
+
+
+def percentile(values: list, pct: float):
+    """Nearest-rank percentile, or None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))]
+
+
+def make_places(count: int, rng: random.Random) -> list:
+    places = [city.title() for cities in PROVINCES.values() for city in cities]
+    seen = {p.lower() for p in places}
+    while len(places) < count:
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if name not in seen:
+            seen.add(name)
+            places.append(name.title())
+    return places
+
+
+def make_table(path: str, routes: int, seed: int = 7) -> list:
+    """Write a synthetic rate table with `routes` rows; returns the destination names used."""
+    rng = random.Random(seed)
+    places = make_places(max(50, routes // 3), rng)
+    lines = [
+        "# Cargo Shipment Data (synthetic)", "",
+        "| No | Nama Ekspedisi | Layanan | Tujuan | Harga | ETA | Min Qty | PIC | No HP | Keterangan |",
+        "|---:|:---|:---|:---|:---|:---|:---|:---|:---|:---|",
+    ]
+    for i in range(routes):
+        kind = rng.random()
+        if kind < 0.6:
+            price = f"{rng.randrange(500, 5000, 50):,}/kg"
+        elif kind < 0.85:
+            price = f"{rng.randrange(30, 80) * 1000} for {rng.choice([3, 5, 10])}kg, then {rng.randrange(800, 2500, 100)}/kg"
+        elif kind < 0.95:
+            price = f"{rng.randrange(10, 30) * 1000:,}/Coly + {rng.randrange(500, 1500, 100)}/kg"
+        else:
+            price = "nan"
+        low = rng.randint(1, 5)
+        notes = rng.choice([
+            "nan", "nan", "BARANG CAIRAN WAJIB PAKING KAYU", "CAIRAN TIDAK BISA. Admin 15.000",
+            f"Penerus {rng.choice(places)} {rng.randrange(20, 90) * 1000:,}/coly",
+        ])
+        lines.append(
+            f"| {i} | {rng.choice(EXPEDITIONS)} | {rng.choice(['Reguler', 'Express', 'Udara'])} "
+            f"| {', '.join(rng.sample(places, rng.choice([1, 1, 2])))} | {price} | {low}-{low + rng.randint(0, 3)} hari "
+            f"| {rng.choice(['nan', '10kg', '50kg', '100kg', '2 coly'])} | PIC {i % 97} | 08{rng.randrange(10**9, 10**10)} "
+            f"| {notes} |"
+        )
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return places
+
+
+def make_requests(places: list, count: int, repeat: float, rng: random.Random) -> list:
+    """Request texts: a `repeat` share drawn from a 50-request hot set, the rest distinct."""
+    def one():
+        weight = rng.choice([5, 10, 25, 50, 100, 150, 250, 500])
+        liquid = rng.random() < 0.2
+        urgency = rng.choice(["", "", "express", "regular"])
+        cargo = f"{weight} liter liquid" if liquid else f"{weight}kg"
+        return f"{cargo} to {rng.choice(places)} {urgency}".strip()
+
+    hot = [one() for _ in range(50)]
+    return [rng.choice(hot) if rng.random() < repeat else one() for _ in range(count)]
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str):
+        super().__init__("localhost")
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+def bench_startup(path: str) -> dict:
+    start = time.perf_counter()
+    table = load_table(path, use_cache=True)  # Cold: parse, compile and write the cache
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    load_table(path, use_cache=True)
+    warm = time.perf_counter() - start
+    start = time.perf_counter()
+    index = DestinationIndex(table["rows"])
+    indexed = time.perf_counter() - start
+    return {"rows": len(table["rows"]), "destinations": len(index.routes),
+            "parse_s": cold, "cached_load_s": warm, "index_s": indexed}
+
+
+def bench_in_process(engine: QuoteEngine, requests: list) -> dict:
+    latencies = []
+    start = time.perf_counter()
+    for text in requests:
+        t = time.perf_counter()
+        engine.quote(text)
+        latencies.append(time.perf_counter() - t)
+    return summarize(latencies, [], time.perf_counter() - start, len(requests))
+
+
+def bench_server(connect, requests: list, clients: int, batch: int) -> dict:
+    """Send requests from `clients` threads over keep-alive connections; batch > 1 groups them."""
+    chunks = [requests[i:i + batch] for i in range(0, len(requests), batch)] if batch > 1 else requests
+    per_client = [chunks[i::clients] for i in range(clients)]
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def client(work):
+        conn = connect()
+        mine = []
+        try:
+            for item in work:
+                body = json.dumps({"requests": item} if batch > 1 else {"request": item}).encode()
+                t = time.perf_counter()
+                conn.request("POST", "/quote/batch" if batch > 1 else "/quote", body,
+                             {"Content-Type": "application/json"})
+                response = conn.getresponse()
+                data = response.read()
+                mine.append(time.perf_counter() - t)
+                if response.status != 200:
+                    raise RuntimeError(f"HTTP {response.status}: {data[:200]!r}")
+        except Exception as e:
+            with lock:
+                errors.append(str(e))
+        finally:
+            conn.close()
+            with lock:
+                latencies.extend(mine)
+
+    threads = [threading.Thread(target=client, args=(work,)) for work in per_client]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors, time.perf_counter() - start,
+                     len(latencies) * (batch if batch > 1 else 1))
+
+
+def summarize(latencies: list, errors: list, elapsed: float, quotes: int) -> dict:
+    return {
+        "requests": len(latencies),
+        "quotes": quotes,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "seconds": elapsed,
+        "rps": len(latencies) / elapsed if elapsed else 0,
+        "quotes_per_s": quotes / elapsed if elapsed else 0,
+        "p50_ms": (percentile(latencies, 50) or 0) * 1000,
+        "p99_ms": (percentile(latencies, 99) or 0) * 1000,
+    }
+
+
+def print_result(label: str, result: dict):
+    print(f"{label:<22}{result['requests']:>8}{result['rps']:>11.0f}{result['quotes_per_s']:>11.0f}"
+          f"{result['p50_ms']:>9.2f}{result['p99_ms']:>9.2f}{result['errors']:>8}")
+    if result["first_error"]:
+        print(f"   first error: {result['first_error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cargo quote server on a synthetic rate table")
+    parser.add_argument("--routes", type=int, default=10_000, help="Synthetic rate rows (default: 10000)")
+    parser.add_argument("--requests", type=int, default=2000, help="Quotes per run (default: 2000)")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent connections (default: 8)")
+    parser.add_argument("--batch", type=int, default=100, help="Requests per batch call (default: 100)")
+    parser.add_argument("--repeat", type=float, default=0.5,
+                        help="Share of requests from a hot set answered by the LRU (default: 0.5)")
+    parser.add_argument("--socket", action="store_true", help="Serve on a Unix socket instead of TCP")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed (default: 7)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        data = os.path.join(root, "cargo-shipment-data.md")
+        places = make_table(data, args.routes, args.seed)
+        requests = make_requests(places, args.requests, args.repeat, random.Random(args.seed))
+
+        startup = bench_startup(data)
+        print(f"Synthetic table: {startup['rows']} routes, {startup['destinations']} destinations")
+        print(f"   parse + compile {startup['parse_s'] * 1000:.0f}ms, cached load {startup['cached_load_s'] * 1000:.0f}ms, "
+              f"index build {startup['index_s'] * 1000:.0f}ms\n")
+
+        print(f"{'run':<22}{'calls':>8}{'calls/s':>11}{'quotes/s':>11}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}")
+        print_result("in-process", bench_in_process(QuoteEngine(data, cache_size=4096), requests))
+
+        engine = QuoteEngine(data, cache_size=4096)
+        socket_path = os.path.join(root, "quote.sock") if args.socket else None
+        server = make_server(engine, port=0, socket_path=socket_path, quiet=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        if socket_path:
+            connect = lambda: UnixHTTPConnection(socket_path)  # noqa: E731
+        else:
+            connect = lambda: http.client.HTTPConnection("127.0.0.1", server.server_address[1])  # noqa: E731
+
+        via = "unix" if socket_path else "tcp"
+        print_result(f"{via} single", bench_server(connect, requests, args.clients, 1))
+        if args.batch > 1:
+            print_result(f"{via} batch x{args.batch}", bench_server(connect, requests, args.clients, args.batch))
+
+        server.shutdown()
+        server.server_close()
+        stats = engine.stats()
+        print(f"\nQuote cache: {stats['hits']} hits, {stats['misses']} misses ({args.repeat:.0%} hot requests)")
+
+
+if __name__ == "__main__":
+    main()
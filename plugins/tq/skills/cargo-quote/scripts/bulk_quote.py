@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Bulk Cargo Quotes
+
+Quotes a whole CSV of shipments in one pass and writes the cheapest and
+fastest option per shipment. Destinations are resolved once per distinct
+name through the destination index. Every (shipment, matching rate row) pair
+then goes into NumPy arrays and all pricing rules are evaluated column-wise:
+- per-kg, tiered ("50000 for 5kg, then 1100/kg"), flat ("33,000 for 10kg"),
+  per-coly and per-m³ rates
+- penerus fees
+- wooden packing for liquids (ceil(liters / 50) coly × 100,000)
+- admin fees
+- the no-liquid restriction and minimum-quantity checks
+
+Totals match quote.py for every pair.
+
+Input columns (header names are matched loosely, order is free):
+    destination   required (tujuan, kota, city)
+    weight        kg: "100", "100kg" or "1.5 ton" (berat); other units are
+                  rejected with a warning
+    volume        m³ (volume_m3, cbm)
+    liters        liquid volume, also used as weight when weight is empty
+    coly          coly count (koli)
+    liquid        yes/true/1/ya/cairan
+    urgency       express / regular (layanan, service, priority)
+Any other columns (order id, customer) are copied to the output.
+
+Usage:
+    python bulk_quote.py orders.csv                       # CSV to stdout
+    python bulk_quote.py orders.csv -o quotes.csv --summary
+    python bulk_quote.py orders.csv --exclude-below-min --data cargo-shipment-data.md
+"""
+
+import argparse
+import csv
+import re
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: numpy not installed. Run: pip install numpy")
+    sys.exit(1)
+
+from destinations import DestinationIndex
+from quote import COLY_KG, EXPRESS_WORDS_RE, LIQUID_COLY_L, REGULAR_WORDS_RE, WEIGHT_RE
+from rate_table import DATA_ENV, load_table, normalize, parse_amount
+
+
+COLUMN_ALIASES = {
+    "destination": ["destination", "tujuan", "kota tujuan", "kota", "city", "dest"],
+    "weight": ["weight", "weight kg", "berat", "kg", "berat kg"],
+    "volume": ["volume", "volume m3", "m3", "cbm", "kubik"],
+    "liters": ["liters", "liter", "litres", "volume l", "l"],
+    "coly": ["coly", "koli", "colly"],
+    "liquid": ["liquid", "cairan", "is liquid", "cair"],
+    "urgency": ["urgency", "layanan", "service", "priority", "prioritas"],
+}
+TRUTHY = {"y", "yes", "true", "1", "ya", "liquid", "cair", "cairan"}
+NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+BARE_NUMBER_RE = re.compile(r"\s*(\d+(?:[.,]\d+)*)\s*")
+OUTPUT_FIELDS = [
+    "matched", "options",
+    "cheapest_expedition", "cheapest_service", "cheapest_total", "cheapest_eta",
+    "fastest_expedition", "fastest_service", "fastest_total", "fastest_eta",
+    "warnings",
+]
+
+
+def map_csv_columns(fieldnames: list) -> dict:
+    """Field name -> CSV column for the known shipment fields."""
+    names = {normalize(name): name for name in fieldnames}
+    mapping = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in names and names[alias] not in mapping.values():
+                mapping[field] = names[alias]
+                break
+    return mapping
+
+
+def _number(cell: str) -> float:
+    match = NUMBER_RE.search(cell or "")
+    return parse_amount(match.group()) if match else np.nan
+
+
+def _weight(cell: str) -> float:
+    """
+    Weight cell in kg, with the same units as quote.py ("1.5 ton" is 1,500kg).
+
+    Returns:
+        The weight, NaN for an empty cell, or None when the cell carries
+        anything else (an unknown unit such as "lb")
+    """
+    cell = (cell or "").strip().lower()
+    if not cell:
+        return np.nan
+    match = BARE_NUMBER_RE.fullmatch(cell)
+    if match:
+        return parse_amount(match.group(1))
+    match = WEIGHT_RE.fullmatch(cell)
+    if match:
+        return parse_amount(match.group(1)) * (1000 if match.group(2).startswith("ton") else 1)
+    return None
+
+
+def read_shipments(path: str):
+    """
+    Read a shipment CSV.
+
+    Returns:
+        (records, column mapping, fieldnames): records are the raw CSV rows
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        records = list(reader)
+        fieldnames = reader.fieldnames or []
+    mapping = map_csv_columns(fieldnames)
+    if "destination" not in mapping:
+        raise ValueError(f"No destination column in {path} (columns: {', '.join(fieldnames)})")
+    return records, mapping, fieldnames
+
+
+def shipment_arrays(records: list, mapping: dict) -> dict:
+    """Column arrays for the shipments (NaN where a value is missing)."""
+    def column(field):
+        name = mapping.get(field)
+        return [record.get(name, "") if name else "" for record in records]
+
+    weights = [_weight(c) for c in column("weight")]
+    unreadable = np.array([w is None for w in weights], dtype=bool)
+    weight = np.array([np.nan if w is None else w for w in weights], dtype=float)
+    liters = np.array([_number(c) for c in column("liters")], dtype=float)
+    weight = np.where(np.isnan(weight) & ~unreadable, liters, weight)  # 1L ~ 1kg
+    coly = np.array([_number(c) for c in column("coly")], dtype=float)
+    liquid = np.array([c.strip().lower() in TRUTHY for c in column("liquid")], dtype=bool)
+    urgency = []
+    for cell in column("urgency"):
+        cell = cell.lower()
+        urgency.append("express" if EXPRESS_WORDS_RE.search(cell)
+                       else "regular" if REGULAR_WORDS_RE.search(cell) else None)
+    return {
+        "weight": weight,
+        "unreadable_weight": unreadable,
+        "liters": liters,
+        "volume": np.array([_number(c) for c in column("volume")], dtype=float),
+        "coly": coly,
+        "liquid": liquid,
+        "urgency": urgency,
+        "destination": [c.strip() for c in column("destination")],
+    }
+
+
+def rate_arrays(rows: list) -> dict:
+    """Per-rate-row pricing columns, one entry per compiled row (indexed by row id)."""
+    n = len(rows)
+    arrays = {name: np.zeros(n) for name in (
+        "tier_base", "tier_kg", "tier_rate", "flat", "flat_kg", "per_kg", "per_coly", "per_m3",
+        "admin", "packing_fee", "min_kg", "min_coly", "min_m3", "eta"
+    )}
+    for name in ("priced", "has_tier", "has_flat", "has_weight_rate", "has_m3", "no_liquid", "wooden"):
+        arrays[name] = np.zeros(n, dtype=bool)
+    arrays["eta"][:] = np.inf
+    arrays["mode"] = [None] * n
+
+    for row in rows:
+        i = row["id"]
+        for component in row["pricing"]:
+            kind = component["kind"]
+            if kind == "tiered":
+                arrays["has_tier"][i] = True
+                arrays["tier_base"][i] += component["base"]
+                arrays["tier_kg"][i] = component["base_kg"]
+                arrays["tier_rate"][i] += component["rate"]
+            elif kind == "flat":
+                arrays["has_flat"][i] = True
+                arrays["flat"][i] += component["base"]
+                arrays["flat_kg"][i] = component["base_kg"]
+            else:
+                arrays[kind][i] += component["rate"]
+            if kind == "per_m3":
+                arrays["has_m3"][i] = True
+            else:
+                arrays["has_weight_rate"][i] = True
+        arrays["priced"][i] = bool(row["pricing"])
+        arrays["admin"][i] = row["admin_fee"]
+        arrays["packing_fee"][i] = row["packing_fee"]
+        arrays["no_liquid"][i] = row["no_liquid"]
+        arrays["wooden"][i] = row["wooden_packing"]
+        if row["min"]:
+            arrays[f"min_{row['min']['unit']}"][i] = row["min"]["amount"]
+        if row["eta_days"]:
+            arrays["eta"][i] = row["eta_days"][0]
+        arrays["mode"][i] = row["mode"]
+    return arrays
+
+
+def bulk_quote(shipments: dict, rows: list, index: DestinationIndex = None, exclude_below_min: bool = False) -> dict:
+    """
+    Evaluate every shipment against every matching rate row.
+
+    Args:
+        shipments: Column arrays (see shipment_arrays)
+        rows: Compiled rate rows
+        index: Destination index over the rows; built when not given
+        exclude_below_min: Drop options below the row's minimum quantity
+            instead of only warning
+
+    Returns:
+        Dict of per-pair arrays ("shipment", "row", "total", "valid",
+        "below_min", "preferred", "eta") plus "cheapest" and "fastest":
+        per-shipment pair index, -1 when nothing matched. Shipments with an
+        unreadable weight get no valid option.
+    """
+    index = index or DestinationIndex(rows)
+    rates = rate_arrays(rows)
+
+    # Pair every shipment with its matching rows (one lookup per distinct destination)
+    resolved = {}
+    pair_shipment, pair_row, penerus_amount, penerus_per_coly = [], [], [], []
+    for s, destination in enumerate(shipments["destination"]):
+        if destination not in resolved:
+            resolved[destination] = index.lookup(destination) if destination else {"place": "", "matches": []}
+        result = resolved[destination]
+        for row_id, _, _ in result["matches"]:
+            pair_shipment.append(s)
+            pair_row.append(row_id)
+            fee = rows[row_id]["penerus"].get(result["place"])
+            penerus_amount.append(fee["amount"] if fee else 0.0)
+            penerus_per_coly.append(bool(fee) and fee["per"] == "coly")
+
+    s = np.array(pair_shipment, dtype=np.intp)
+    r = np.array(pair_row, dtype=np.intp)
+    weight = shipments["weight"][s]
+    volume = shipments["volume"][s]
+    liquid = shipments["liquid"][s]
+    given_coly = shipments["coly"][s]
+    est_coly = np.maximum(1, np.ceil(np.nan_to_num(weight) / COLY_KG))
+    coly = np.where(np.isnan(given_coly) | (given_coly == 0), est_coly, given_coly)
+
+    has_weight = ~np.isnan(weight)
+    has_volume = ~np.isnan(volume)
+    w = np.nan_to_num(weight)
+    v = np.nan_to_num(volume)
+
+    base = (
+        np.where(rates["has_tier"][r], rates["tier_base"][r] + np.maximum(0, w - rates["tier_kg"][r]) * rates["tier_rate"][r], 0)
+        + np.where(rates["has_flat"][r], rates["flat"][r], 0)
+        + w * rates["per_kg"][r]
+        + coly * rates["per_coly"][r]
+        + v * rates["per_m3"][r]
+    )
+    valid = (
+        rates["priced"][r]
+        & (~rates["has_m3"][r] | has_volume)
+        & (~rates["has_weight_rate"][r] | has_weight)
+        & (~rates["has_flat"][r] | (w <= rates["flat_kg"][r]))
+        & ~(liquid & rates["no_liquid"][r])
+        & ~shipments["unreadable_weight"][s]
+    )
+
+    penerus = np.array(penerus_amount) * np.where(np.array(penerus_per_coly, dtype=bool), coly, 1)
+    liters = shipments["liters"][s]
+    packing_liters = np.where(~np.isnan(liters) & (liters != 0), liters, w)
+    packing_coly = np.maximum(1, np.ceil(packing_liters / LIQUID_COLY_L))
+    packing = np.where(liquid & rates["wooden"][r], packing_coly * rates["packing_fee"][r], 0)
+    total = base + penerus + packing + rates["admin"][r]
+
+    below_min = (
+        (has_weight & (w < rates["min_kg"][r]))
+        | (coly < rates["min_coly"][r])
+        | (has_volume & (v < rates["min_m3"][r]))
+    )
+    if exclude_below_min:
+        valid &= ~below_min
+
+    urgency = shipments["urgency"]
+    mode = rates["mode"]
+    preferred = np.array([urgency[i] is None or mode[j] == urgency[i] for i, j in zip(pair_shipment, pair_row)],
+                         dtype=bool)
+    eta = rates["eta"][r]
+
+    count = len(shipments["destination"])
+    # np.lexsort sorts by its last key first: shipment, then preferred service type
+    cheapest = _first_per_shipment(np.lexsort((eta, total, ~preferred, s)), s, valid, count)
+    fastest = _first_per_shipment(np.lexsort((total, eta, ~preferred, s)), s, valid, count)
+    return {
+        "shipment": s, "row": r, "total": total, "valid": valid, "below_min": below_min,
+        "preferred": preferred, "eta": eta, "cheapest": cheapest, "fastest": fastest,
+        "options": np.bincount(s[valid], minlength=count),
+        "unreadable_weight": shipments["unreadable_weight"],
+        "matched": np.bincount(s, minlength=count),
+    }
+
+
+def _first_per_shipment(order, s, valid, count):
+    """Per shipment, the first valid pair in a sort order; -1 when there is none."""
+    order = order[valid[order]]
+    best = np.full(count, -1, dtype=np.intp)
+    shipments, first = np.unique(s[order], return_index=True)
+    best[shipments] = order[first]
+    return best
+
+
+def write_results(records, fieldnames, result, rows, output, weight_column=None):
+    """Write the input columns plus the cheapest/fastest option columns as CSV."""
+    writer = csv.DictWriter(output, fieldnames=list(fieldnames) + OUTPUT_FIELDS)
+    writer.writeheader()
+    for i, record in enumerate(records):
+        out = dict(record)
+        out["matched"] = int(result["matched"][i])
+        out["options"] = int(result["options"][i])
+        warnings = []
+        for label, pair in (("cheapest", result["cheapest"][i]), ("fastest", result["fastest"][i])):
+            if pair < 0:
+                continue
+            row = rows[result["row"][pair]]
+            out[f"{label}_expedition"] = row["expedition"]
+            out[f"{label}_service"] = row["service"]
+            out[f"{label}_total"] = f"{result['total'][pair]:.0f}"
+            out[f"{label}_eta"] = row["eta"]
+            if result["below_min"][pair]:
+                warnings.append(f"{label} below minimum quantity ({row['min_qty']})")
+            if not result["preferred"][pair]:
+                warnings.append(f"{label} is not the requested service type")
+        if result["unreadable_weight"][i]:
+            warnings.append(f"weight '{record.get(weight_column, '')}' not understood (use kg or ton)")
+        elif not out["matched"]:
+            warnings.append("no expedition serves this destination")
+        elif not out["options"]:
+            warnings.append("no available option (restricted, or contact for quote)")
+        out["warnings"] = "; ".join(warnings)
+        writer.writerow(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quote a CSV of shipments: cheapest and fastest option per row")
+    parser.add_argument("csv", help="Shipment CSV")
+    parser.add_argument("--output", "-o", help="Output CSV (default: stdout)")
+    parser.add_argument("--data", help=f"Expedition data markdown (default: ${DATA_ENV})")
+    parser.add_argument("--exclude-below-min", action="store_true",
+                        help="Skip options below the expedition's minimum quantity instead of warning")
+    parser.add_argument("--summary", action="store_true", help="Print counts and timing to stderr")
+    args = parser.parse_args()
+
+    try:
+        table = load_table(args.data)
+        records, mapping, fieldnames = read_shipments(args.csv)
+    except FileNotFoundError as e:
+        print(f"Error: file not found: {e.filename}")
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    rows = table["rows"]
+    start = time.perf_counter()
+    shipments = shipment_arrays(records, mapping)
+    result = bulk_quote(shipments, rows, exclude_below_min=args.exclude_below_min)
+    elapsed = time.perf_counter() - start
+
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            write_results(records, fieldnames, result, rows, f, mapping.get("weight"))
+    else:
+        write_results(records, fieldnames, result, rows, sys.stdout, mapping.get("weight"))
+
+    if args.summary:
+        quoted = int((result["cheapest"] >= 0).sum())
+        print(f"Quoted {quoted}/{len(records)} shipments ({len(result['row'])} shipment × route pairs) "
+              f"in {elapsed * 1000:.1f}ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+SKILL.md Example Check
+
+Quotes the worked examples from SKILL.md ("Example Calculations") against a
+rate table and checks each total, so parser or pricing changes that break a
+documented calculation are caught. Defaults to the sample table in
+examples/cargo-shipment-data.md, which reproduces the examples.
+
+Usage:
+    python check_examples.py
+    python check_examples.py --data path/to/cargo-shipment-data.md
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from quote import QuoteEngine, format_rupiah
+
+
+SAMPLE_DATA = Path(__file__).resolve().parent.parent / "examples" / "cargo-shipment-data.md"
+
+# (request, expedition, expected total) for Examples 1-5 in SKILL.md
+EXAMPLES = [
+    ("100kg to Surabaya regular", "Mojoroto Express", 85_000),
+    ("50kg to Bandung", "Panca Kobra Sakti", 99_500),
+    ("100kg to Situbondo", "Mojoroto Express", 130_000),
+    ("50 liter liquid to Bandung", "Panca Kobra Sakti", 199_500),
+    ("10kg urgent to Medan", "Alam Sejahtera Logistik", 48_000),
+]
+
+
+def check_examples(data_path: str = None) -> list:
+    """
+    Quote every example.
+
+    Returns:
+        List of (request, expected total, quoted total or None, ok) tuples
+    """
+    engine = QuoteEngine(data_path or SAMPLE_DATA, use_cache=False)
+    results = []
+    for request, expedition, expected in EXAMPLES:
+        quotes = [q for q in engine.quote(request)["quotes"] if q["expedition"] == expedition]
+        total = quotes[0]["total"] if quotes else None
+        results.append((request, expected, total, total == expected))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the SKILL.md worked examples against a rate table")
+    parser.add_argument("--data", help=f"Expedition data markdown (default: {SAMPLE_DATA})")
+    args = parser.parse_args()
+
+    results = check_examples(args.data)
+    for request, expected, total, ok in results:
+        got = format_rupiah(total) if total is not None else "no quote"
+        print(f"{'✅' if ok else '❌'} {request:<30} expected {format_rupiah(expected):<12} got {got}")
+    failed = sum(not ok for *_, ok in results)
+    print(f"\n{len(results) - failed}/{len(results)} examples match")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
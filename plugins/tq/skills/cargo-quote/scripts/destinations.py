@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Destination Index
+
+Precomputed lookup from a destination as users type it to the rate rows that
+serve it, replacing a scan of every expedition row per quote:
+
+    query ─▶ canonical place ─▶ regions it belongs to ─▶ rate rows
+
+- Canonical names (rate_table.canonical, shared with penerus fees) fold
+  case, punctuation, "Kota"/"Kabupaten" prefixes and common aliases (jogja,
+  sby, jatim)
+- Old Indonesian spellings (Djakarta → jakarta, Tjirebon → cirebon,
+  Sitoebondo → situbondo) are folded only when the name as given isn't
+  known, so modern names like Banjarmasin or Cianjur are never rewritten
+- Regions are the expedition groupings from SKILL.md ("Jawa Timur 1" =
+  Cepu, Blora, Sragen, Wonogiri, Tulungagung) plus provinces, so a city
+  matches rows priced for its region and a region matches rows for its cities
+- A trigram index catches typos and leftover spelling variants ("surabya",
+  "surabaja", "situbondoo") when the name isn't known at all
+
+Every lookup is a handful of dict and set operations, independent of the
+number of rate rows.
+
+Used by quote.py; can be run directly to try lookups, or to check that every
+penerus note in the table is charged when quoting its city:
+    python destinations.py "sitoebondo" "jogja" [--data data.md]
+    python destinations.py --check-penerus
+"""
+
+import argparse
+import sys
+import time
+from collections import defaultdict
+
+from rate_table import ALIASES, DATA_ENV, DEFAULT_PENERUS, canonical, load_table
+
+
+# Expedition groupings that name several cities (SKILL.md)
+REGIONS = {
+    "jawa timur 1": ["cepu", "blora", "sragen", "wonogiri", "tulungagung"],
+    "jawa timur 2": ["situbondo", "bondowoso"],
+}
+PROVINCES = {
+    "jawa barat": ["bandung", "bekasi", "bogor", "depok", "cirebon", "karawang", "sukabumi", "tasikmalaya",
+                   "garut", "cimahi", "purwakarta", "subang", "indramayu", "majalengka", "kuningan", "ciamis"],
+    "jawa tengah": ["semarang", "surakarta", "magelang", "salatiga", "pekalongan", "tegal", "kudus",
+                    "jepara", "pati", "klaten", "boyolali", "purwokerto", "cilacap", "kebumen", "sragen",
+                    "wonogiri", "blora", "cepu", "rembang", "demak", "kendal", "batang", "brebes"],
+    "jawa timur": ["surabaya", "malang", "sidoarjo", "gresik", "mojokerto", "kediri", "blitar", "madiun",
+                   "jember", "banyuwangi", "pasuruan", "probolinggo", "situbondo", "bondowoso", "tuban",
+                   "lamongan", "bojonegoro", "tulungagung", "nganjuk", "jombang", "ngawi", "ponorogo",
+                   "pacitan", "trenggalek", "lumajang", "magetan", "batu", "bangkalan", "sampang",
+                   "pamekasan", "sumenep"],
+    "yogyakarta": ["sleman", "bantul", "kulon progo", "gunung kidul", "wonosari"],
+    "jakarta": ["jakarta pusat", "jakarta barat", "jakarta timur", "jakarta selatan", "jakarta utara"],
+    "banten": ["tangerang", "tangerang selatan", "serang", "cilegon", "pandeglang", "lebak"],
+    "bali": ["denpasar", "badung", "gianyar", "tabanan", "singaraja", "buleleng", "kuta", "ubud", "negara"],
+    "sumatera utara": ["medan", "binjai", "pematangsiantar", "tebing tinggi", "sibolga", "deli serdang"],
+    "sulawesi selatan": ["makassar", "parepare", "palopo", "maros", "gowa"],
+}
+
+# Pre-1972 spellings, applied left to right
+OLD_SPELLINGS = [("oe", "u"), ("dj", "j"), ("tj", "c"), ("nj", "ny"), ("sj", "sy")]
+
+FUZZY_THRESHOLD = 0.5  # Minimum trigram Dice similarity for a typo correction
+
+
+def modernize(key: str) -> str:
+    """A canonical key in post-1972 spelling (Djokdja → jokja, Soerabaja → surabaja)."""
+    for old, new in OLD_SPELLINGS:
+        key = key.replace(old, new)
+    return ALIASES.get(key, key)
+
+
+def trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class DestinationIndex:
+    """City → region → rate row index over a compiled rate table."""
+
+    def __init__(self, rows: list):
+        self.routes = defaultdict(list)        # canonical destination -> [(row id, cell name)]
+        self.regions = defaultdict(set)        # canonical city -> regions containing it
+        self.members = defaultdict(set)        # canonical region -> member cities
+        self.words = defaultdict(set)          # word -> route names containing it
+        self.grams = defaultdict(set)          # trigram -> known names
+        self.gram_counts = {}                  # known name -> its trigram count
+        for groups in (REGIONS, PROVINCES):
+            for region, cities in groups.items():
+                for city in cities:
+                    self.regions[city].add(region)
+                    self.members[region].add(city)
+        for name in set(self.regions) | set(self.members):
+            self.index_name(name)
+        for row in rows:
+            self.add_row(row)
+
+    def copy(self) -> "DestinationIndex":
+        """Independent copy to update for a new table while this one keeps serving lookups."""
+        clone = DestinationIndex.__new__(DestinationIndex)
+        clone.regions, clone.members = self.regions, self.members  # Fixed after __init__
+        clone.routes = defaultdict(list, {key: list(entries) for key, entries in self.routes.items()})
+        clone.words = defaultdict(set, {word: set(names) for word, names in self.words.items()})
+        clone.grams = defaultdict(set, {gram: set(names) for gram, names in self.grams.items()})
+        clone.gram_counts = dict(self.gram_counts)
+        return clone
+
+    def add_row(self, row: dict):
+        """Index one compiled rate row's destinations."""
+        for name in row["destinations"]:
+            key = canonical(name)
+            if not key:
+                continue
+            if key not in self.routes:
+                for word in key.split():
+                    self.words[word].add(key)
+                self.index_name(key)
+            self.routes[key].append((row["id"], name))
+
+    def remove_row(self, row: dict):
+        """Drop one rate row's destinations from the index."""
+        for name in row["destinations"]:
+            key = canonical(name)
+            entries = [entry for entry in self.routes.get(key, []) if entry[0] != row["id"]]
+            if entries:
+                self.routes[key] = entries
+            elif key in self.routes:
+                del self.routes[key]
+                for word in key.split():
+                    self.words[word].discard(key)
+
+    def index_name(self, key: str):
+        grams = trigrams(key)
+        self.gram_counts[key] = len(grams)
+        for gram in grams:
+            self.grams[gram].add(key)
+
+    def known(self, key: str) -> bool:
+        return key in self.routes or key in self.regions or key in self.members
+
+    def correct(self, key: str):
+        """Closest known name by trigram similarity, or None below FUZZY_THRESHOLD."""
+        query = trigrams(key)
+        shared = defaultdict(int)
+        for gram in query:
+            for name in self.grams.get(gram, ()):
+                shared[name] += 1
+        best, best_score = None, FUZZY_THRESHOLD
+        for name, count in shared.items():
+            if not self.known(name):
+                continue  # Route removed since it was indexed
+            score = 2 * count / (len(query) + self.gram_counts[name])
+            if score > best_score or (score == best_score and best is not None and name < best):
+                best, best_score = name, score
+        return best
+
+    def lookup(self, query: str) -> dict:
+        """
+        Resolve a destination query to the rate rows serving it.
+
+        Returns:
+            Dict with "place" (canonical name), "corrected" (True when a
+            typo was fixed) and "matches": a list of (row id, destination
+            cell, kind) tuples where kind is exact, partial or regional,
+            best kind first and each row listed once
+        """
+        key = canonical(query)
+        corrected = False
+        if key and not self.known(key) and not self._partial(key):
+            modern = modernize(key)
+            if modern != key and (self.known(modern) or self._partial(modern)):
+                key = modern  # Old spelling of a known place
+            else:
+                fixed = self.correct(key) or (self.correct(modern) if modern != key else None)
+                if fixed:
+                    key, corrected = fixed, True
+
+        seen = set()
+        matches = []
+
+        def add(entries, kind):
+            for row_id, name in entries:
+                if row_id not in seen:
+                    seen.add(row_id)
+                    matches.append((row_id, name, kind))
+
+        add(self.routes.get(key, []), "exact")
+        for name in self._partial(key):
+            add(self.routes[name], "partial")
+        for region in sorted(self.regions.get(key, ())):
+            add(self.routes.get(region, []), "regional")
+        for city in sorted(self.members.get(key, ())):
+            add(self.routes.get(city, []), "regional")
+        return {"place": key, "corrected": corrected, "matches": matches}
+
+    def uncharged_penerus(self, rows: list) -> list:
+        """
+        Penerus notes a quote would never charge.
+
+        A fee is charged when a lookup of its city resolves to the fee's key
+        and returns the row, so this catches unparsed amounts, cities the row
+        doesn't serve and keys folded differently from the index.
+
+        Returns:
+            List of (row id, city or None when no fee was parsed) tuples
+        """
+        uncharged = []
+        for row in rows:
+            if not row["penerus"]:
+                if "penerus" in row["notes"].lower():
+                    uncharged.append((row["id"], None))
+                continue
+            for city, fee in row["penerus"].items():
+                if DEFAULT_PENERUS.get(city) == fee:
+                    continue  # SKILL.md default, applies wherever the route reaches it
+                result = self.lookup(city)
+                if result["place"] != city or row["id"] not in {match[0] for match in result["matches"]}:
+                    uncharged.append((row["id"], city))
+        return uncharged
+
+    def _partial(self, key: str) -> list:
+        """Route names containing every word of the key, or found as a run of words inside it."""
+        if not key:
+            return []
+        words = key.split()
+        candidates = set.intersection(*(self.words.get(word, set()) for word in words))
+        for start in range(len(words)):
+            for end in range(start + 1, len(words) + 1):
+                span = " ".join(words[start:end])
+                if span in self.routes:
+                    candidates.add(span)
+        candidates.discard(key)
+        return sorted(candidates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Look up destinations in the cargo rate table")
+    parser.add_argument("queries", nargs="*", help="Destination names to look up")
+    parser.add_argument("--data", help=f"Expedition data markdown (default: ${DATA_ENV})")
+    parser.add_argument("--check-penerus", action="store_true",
+                        help="List penerus notes that quotes would not charge; exit 1 if any")
+    args = parser.parse_args()
+    if not args.queries and not args.check_penerus:
+        parser.error("give destinations to look up or --check-penerus")
+
+    try:
+        table = load_table(args.data)
+    except FileNotFoundError as e:
+        print(f"Error: data file not found: {e.filename}")
+        sys.exit(1)
+
+    rows = table["rows"]
+    start = time.perf_counter()
+    index = DestinationIndex(rows)
+    print(f"Indexed {len(index.routes)} destinations from {len(rows)} rows "
+          f"in {(time.perf_counter() - start) * 1000:.1f}ms\n")
+
+    for query in args.queries:
+        start = time.perf_counter()
+        result = index.lookup(query)
+        elapsed = (time.perf_counter() - start) * 1e6
+        note = " (corrected)" if result["corrected"] else ""
+        print(f"{query!r} -> {result['place']!r}{note}: {len(result['matches'])} rows in {elapsed:.0f}µs")
+        for row_id, name, kind in result["matches"]:
+            row = rows[row_id]
+            print(f"   {kind:<9} {row['expedition']} - {row['service']} ({name})")
+
+    if args.check_penerus:
+        uncharged = index.uncharged_penerus(rows)
+        for row_id, city in uncharged:
+            row = rows[row_id]
+            reason = f"penerus {city} is never charged" if city else "penerus note has no parsed fee"
+            print(f"⚠️  Row {row_id} {row['expedition']} - {row['destination']}: {reason}")
+        print(f"{len(uncharged)} uncharged penerus note(s)")
+        sys.exit(1 if uncharged else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,559 @@
+#!/usr/bin/env python3
+"""
+Cargo Quote Engine
+
+Quotes a shipment against the compiled expedition rate table (see
+rate_table.py) and prints the cargo-quote result format. Parsing the request,
+matching destinations and applying every pricing rule from SKILL.md happen
+in code, so quotes are deterministic and take milliseconds.
+
+Request grammar (order-free, case-insensitive):
+    weight       100kg | 100 kilos | 1.5 ton
+    liquid       25 liter | 25L  (1L ~ 1kg)  plus "liquid", "cairan", "cair"
+    volume       2 m3 | 2 cbm
+    coly         3 coly | 3 koli
+    urgency      express | urgent | fast | cepat   /   regular | reguler | ekonomis
+    destination  the words after "to" / "ke" / "tujuan", otherwise whatever
+                 is left once the tokens above are removed
+
+Destinations are resolved through destinations.py: exact, partial and
+regional matches, old spellings, aliases and typos.
+
+QuoteEngine keeps the table and destination index warm for long-running
+callers: it notices when the data file changes (mtime, then content hash),
+recompiles only the changed rows, and serves repeated requests from an LRU
+cache that is cleared on every reload.
+
+Usage:
+    python quote.py "100kg general cargo to Surabaya"
+    python quote.py "25 liter liquid product to Bandung urgent" --json
+    python quote.py --data path/to/cargo-shipment-data.md "50kg to Situbondo"
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from destinations import DestinationIndex, canonical
+from rate_table import DATA_ENV, DEFAULT_DATA, load_table, parse_amount, resolve_data_path
+
+
+COLY_KG = 100     # Coly estimate for per-coly fees: 1 coly ~ 50-100kg
+LIQUID_COLY_L = 50  # Wooden packing: 1 coly holds 2 drums @ 25L
+
+NUMBER = r"(\d+(?:[.,]\d+)*)"
+WEIGHT_RE = re.compile(rf"{NUMBER}\s*(kg|kgs|kilos?|kilograms?|ton|tons)\b")
+LITER_RE = re.compile(rf"{NUMBER}\s*(l|lt|ltr|liters?|litres?)\b")
+VOLUME_RE = re.compile(rf"{NUMBER}\s*(m3|m³|cbm|kubik|cubic\s+meters?)(?!\w)")
+COLY_RE = re.compile(rf"{NUMBER}\s*(coly|colly|koli|collies)\b")
+LIQUID_RE = re.compile(r"\b(liquid|liquids|cairan|cair)\b")
+EXPRESS_WORDS_RE = re.compile(r"\b(express|urgent|fast|cepat|kilat|segera)\b")
+REGULAR_WORDS_RE = re.compile(r"\b(regular|reguler|ekonomis|economy|murah|cheap)\b")
+DESTINATION_RE = re.compile(r"\b(?:to|ke|tujuan|destination|dest)\b[:\s]*(.+)")
+FILLER_RE = re.compile(
+    r"\b(general|cargo|product|products|produk|barang|goods|kirim|ship|shipping|send|please|quote|"
+    r"for|of|a|an|the|via|from|dari|untuk|with|dengan)\b"
+)
+SEPARATOR = "━" * 47
+NUMBER_EMOJI = ["1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣", "6️⃣", "7️⃣", "8️⃣", "9️⃣", "🔟"]
+
+
+def parse_request(text: str) -> dict:
+    """
+    Parse a free-text quote request ($ARGUMENTS) with the grammar above.
+
+    Returns:
+        Dict with weight_kg, liters, volume_m3, coly, liquid, urgency
+        ("express", "regular" or None) and destination (None if missing)
+    """
+    lowered = f" {text.lower()} "
+    request = {"weight_kg": None, "liters": None, "volume_m3": None, "coly": None,
+               "liquid": False, "urgency": None, "destination": None}
+
+    def take(pattern):
+        nonlocal lowered
+        match = pattern.search(lowered)
+        if match:
+            lowered = lowered[:match.start()] + " " + lowered[match.end():]
+        return match
+
+    # Volume first, so "2 m3" isn't read as anything else
+    match = take(VOLUME_RE)
+    if match:
+        request["volume_m3"] = parse_amount(match.group(1))
+    match = take(WEIGHT_RE)
+    if match:
+        scale = 1000 if match.group(2).startswith("ton") else 1
+        request["weight_kg"] = parse_amount(match.group(1)) * scale
+    match = take(LITER_RE)
+    if match:
+        request["liters"] = parse_amount(match.group(1))
+        if request["weight_kg"] is None:
+            request["weight_kg"] = request["liters"]
+    match = take(COLY_RE)
+    if match:
+        request["coly"] = int(parse_amount(match.group(1)))
+
+    if take(LIQUID_RE):
+        request["liquid"] = True
+    while take(LIQUID_RE):
+        pass
+    if take(EXPRESS_WORDS_RE):
+        request["urgency"] = "express"
+    elif take(REGULAR_WORDS_RE):
+        request["urgency"] = "regular"
+
+    target = DESTINATION_RE.search(lowered)
+    rest = target.group(1) if target else lowered
+    rest = FILLER_RE.sub(" ", rest)
+    destination = " ".join(re.sub(r"[^\w\s]", " ", rest).split())
+    request["destination"] = destination or None
+    return request
+
+
+def base_cost(pricing: list, weight: float, coly: int, volume: float):
+    """
+    Sum a row's pricing components.
+
+    Returns:
+        (amount or None, note) - None when the price can't be computed from
+        the request (no price, or volume pricing without a volume)
+    """
+    if not pricing:
+        return None, "Contact for quote"
+    total = 0
+    for component in pricing:
+        kind = component["kind"]
+        if kind == "per_m3":
+            if volume is None:
+                return None, "Volume-based pricing - contact for exact quote"
+            total += volume * component["rate"]
+        elif weight is None:
+            return None, "Weight needed for this rate"
+        elif kind == "tiered":
+            total += component["base"] + max(0, weight - component["base_kg"]) * component["rate"]
+        elif kind == "flat":
+            if weight > component["base_kg"]:
+                return None, f"Flat rate covers up to {component['base_kg']:g}kg - contact for quote"
+            total += component["base"]
+        elif kind == "per_kg":
+            total += weight * component["rate"]
+        elif kind == "per_coly":
+            total += coly * component["rate"]
+    return total, None
+
+
+def quote_row(row: dict, request: dict, city: str) -> dict:
+    """
+    Quote one expedition row for a parsed request.
+
+    Returns:
+        Quote dict with base, fees, total (None when unpriced), ETA, contact
+        and warnings; "excluded" holds the reason when the row can't carry
+        the shipment at all
+    """
+    weight = request["weight_kg"]
+    volume = request["volume_m3"]
+    coly_given = request["coly"] is not None
+    coly = request["coly"] or max(1, math.ceil((weight or 0) / COLY_KG))
+    liquid = request["liquid"]
+    warnings = []
+
+    result = {
+        "id": row["id"],
+        "expedition": row["expedition"],
+        "service": row["service"],
+        "destination": row["destination"],
+        "mode": row["mode"],
+        "eta": row["eta"] or None,
+        "eta_days": row["eta_days"],
+        "pic": row["pic"] or None,
+        "phone": row["phone"] or None,
+        "min_qty": row["min_qty"] or None,
+        "notes": row["notes"] or None,
+        "excluded": None,
+    }
+    if liquid and row["no_liquid"]:
+        result["excluded"] = "No liquid cargo (CAIRAN TIDAK BISA)"
+        return result
+
+    base, price_note = base_cost(row["pricing"], weight, coly, volume)
+    if price_note:
+        warnings.append(price_note)
+    elif not coly_given and any(c["kind"] == "per_coly" for c in row["pricing"]):
+        warnings.append(f"Coly count estimated as {coly} (1 coly ≈ {COLY_KG}kg)")
+
+    fees = {}
+    penerus = row["penerus"].get(city)
+    if penerus:
+        fees[f"Penerus {city.title()}"] = penerus["amount"] * (coly if penerus["per"] == "coly" else 1)
+    if liquid and row["wooden_packing"]:
+        liters = request["liters"] or weight or 0
+        packing_coly = max(1, math.ceil(liters / LIQUID_COLY_L))
+        fees["Wooden packing"] = packing_coly * row["packing_fee"]
+        warnings.append(f"Liquid requires wooden packing ({packing_coly} coly × {format_rupiah(row['packing_fee'])})")
+    if row["admin_fee"]:
+        fees["Admin"] = row["admin_fee"]
+
+    minimum = row["min"]
+    if minimum:
+        have = {"kg": weight, "coly": request["coly"] or coly, "m3": volume}[minimum["unit"]]
+        if have is not None and have < minimum["amount"]:
+            unit = "" if minimum["unit"] == "kg" else " "
+            warnings.append(
+                f"Below minimum quantity (min: {minimum['amount']:g}{unit}{minimum['unit']}) - may not be available"
+            )
+
+    result.update(
+        base=base,
+        fees=fees,
+        total=base + sum(fees.values()) if base is not None else None,
+        warnings=warnings,
+    )
+    return result
+
+
+def sort_key(quote: dict, urgency: str):
+    preferred = 0 if urgency is None or quote["mode"] == urgency else 1
+    total = quote["total"] if quote["total"] is not None else math.inf
+    eta = quote["eta_days"][0] if quote["eta_days"] else math.inf
+    return preferred, total, eta
+
+
+def quote(request: dict, rows: list, index: DestinationIndex = None) -> dict:
+    """
+    Quote a parsed request against compiled rate rows.
+
+    Args:
+        request: Parsed request (see parse_request)
+        rows: Compiled rate rows (see rate_table.load_table)
+        index: Destination index over the rows; built when not given
+
+    Returns:
+        Dict with the request, the resolved city, sorted quotes, excluded
+        options and a summary (price range, cheapest, fastest)
+    """
+    destination = request["destination"]
+    resolved = {"place": "", "corrected": False, "matches": []}
+    if destination:
+        resolved = (index or DestinationIndex(rows)).lookup(destination)
+    city = resolved["place"]
+
+    quotes, excluded = [], []
+    for row_id, _, match in resolved["matches"]:
+        result = quote_row(rows[row_id], request, city)
+        result["match"] = match
+        (excluded if result["excluded"] else quotes).append(result)
+    quotes.sort(key=lambda q: sort_key(q, request["urgency"]))
+
+    priced = [q for q in quotes if q["total"] is not None]
+    timed = [q for q in quotes if q["eta_days"]]
+    cheapest = min(priced, key=lambda q: q["total"]) if priced else None
+    fastest = min(timed, key=lambda q: (q["eta_days"][0], q["eta_days"][1])) if timed else None
+    return {
+        "request": request,
+        "city": city,
+        "corrected": resolved["corrected"],
+        "quotes": quotes,
+        "excluded": excluded,
+        "summary": {
+            "min_total": cheapest["total"] if cheapest else None,
+            "max_total": max(q["total"] for q in priced) if priced else None,
+            "cheapest": cheapest and {k: cheapest[k] for k in ("expedition", "service", "total")},
+            "fastest": fastest and {k: fastest[k] for k in ("expedition", "service", "eta")},
+        },
+    }
+
+
+class QuoteEngine:
+    """
+    Rate table, destination index and quote cache that follow the data file.
+
+    Every call first checks the data file (at most once per check_interval
+    seconds). An mtime/size change with identical content only updates the
+    stat; a content change reloads the table, reusing compiled rows whose
+    cells are unchanged and re-indexing only rows whose destinations
+    changed, then clears the quote cache. If the file can't be read (missing
+    mid-save, permissions), quotes keep using the last good table and the
+    file is tried again at the next check.
+
+    Thread-safe; results are shared between callers and must be treated as
+    read-only. A reload builds the next table and index on the side and swaps
+    them in with one assignment, so quotes never wait for a reload or for
+    each other; the lock only guards the LRU and counters.
+    """
+
+    def __init__(self, data_path: str = None, cache_size: int = 1024, check_interval: float = 1.0,
+                 use_cache: bool = True):
+        self.data_path = resolve_data_path(data_path)
+        self.cache_size = cache_size
+        self.check_interval = check_interval
+        self.use_cache = use_cache
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.reload_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.last_reload = {}
+        self.last_error = None
+        table = load_table(self.data_path, use_cache=use_cache)
+        self.current = (table, DestinationIndex(table["rows"]))  # Replaced as a whole, never mutated
+        self.stat = (table["size"], table["mtime_ns"])
+        self.checked = time.monotonic()
+
+    @property
+    def table(self) -> dict:
+        return self.current[0]
+
+    @property
+    def index(self) -> DestinationIndex:
+        return self.current[1]
+
+    @property
+    def rows(self) -> list:
+        return self.table["rows"]
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Reload the table if the data file changed.
+
+        Args:
+            force: Check now, ignoring check_interval; waits for a reload in
+                progress instead of leaving it to that caller
+
+        Returns:
+            True when the table was reloaded
+        """
+        if not force and time.monotonic() - self.checked < self.check_interval:
+            return False
+        if not self.reload_lock.acquire(blocking=force):
+            return False  # Another caller is checking; keep quoting from the current table
+        try:
+            now = time.monotonic()
+            if not force and now - self.checked < self.check_interval:
+                return False
+            self.checked = now
+            old_table, old_index = self.current
+            try:
+                st = os.stat(self.data_path)
+                if (st.st_size, st.st_mtime_ns) == self.stat:
+                    self.last_error = None
+                    return False
+                table = load_table(self.data_path, use_cache=self.use_cache, previous=old_table)
+            except OSError as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                return False
+            self.last_error = None
+            self.stat = (table["size"], table["mtime_ns"])
+            if table["sha256"] == old_table["sha256"]:
+                return False  # Touched, not edited
+
+            index = self._reindex(old_index, old_table["rows"], table["rows"], table["parsed"])
+            with self.lock:
+                self.current = (table, index)
+                self.cache.clear()
+                self.reloads += 1
+            return True
+        finally:
+            self.reload_lock.release()
+
+    def _reindex(self, old_index: DestinationIndex, old_rows: list, new_rows: list,
+                 parsed: dict) -> DestinationIndex:
+        """A copy of old_index updated for the rows whose destinations changed."""
+        start = time.perf_counter()
+        index = old_index.copy()
+        changed = 0
+        for position in range(max(len(old_rows), len(new_rows))):
+            old = old_rows[position] if position < len(old_rows) else None
+            new = new_rows[position] if position < len(new_rows) else None
+            if old and new and old["destinations"] == new["destinations"]:
+                continue
+            if old:
+                index.remove_row(old)
+            if new:
+                index.add_row(new)
+            changed += 1
+        self.last_reload = {
+            "rows": len(new_rows),
+            "compiled": parsed["compiled"] if parsed else None,
+            "reused": parsed["reused"] if parsed else None,
+            "reindexed": changed,
+            "seconds": time.perf_counter() - start,
+        }
+        return index
+
+    def quote(self, request) -> dict:
+        """
+        Quote a request, from the cache when the same request was seen since the last reload.
+
+        Args:
+            request: Free text ($ARGUMENTS) or a parsed request dict
+        """
+        if isinstance(request, str):
+            request = parse_request(request)
+        self.refresh()
+        key = tuple(sorted(
+            {**request, "destination": canonical(request["destination"] or "")}.items()
+        ))
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return self.cache[key]
+            self.misses += 1
+            current = self.current
+
+        table, index = current
+        result = quote(request, table["rows"], index)
+        with self.lock:
+            if self.current is current:  # Not computed from a table replaced meanwhile
+                self.cache[key] = result
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+        return result
+
+    def stats(self) -> dict:
+        with self.lock:
+            table, index = self.current
+            return {
+                "source": str(self.data_path),
+                "sha256": table["sha256"],
+                "rows": len(table["rows"]),
+                "destinations": len(index.routes),
+                "cached": len(self.cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+                "last_reload": self.last_reload,
+                "last_error": self.last_error,
+            }
+
+
+# Output
+
+def format_rupiah(amount: float) -> str:
+    return f"Rp {amount:,.0f}"
+
+
+def describe_request(request: dict) -> str:
+    parts = []
+    if request["liters"] is not None:
+        parts.append(f"{request['liters']:g} liter")
+    elif request["weight_kg"] is not None:
+        parts.append(f"{request['weight_kg']:g}kg")
+    if request["volume_m3"] is not None:
+        parts.append(f"{request['volume_m3']:g} m³")
+    if request["coly"]:
+        parts.append(f"{request['coly']} coly")
+    parts.append("liquid" if request["liquid"] else "general cargo")
+    if request["destination"]:
+        parts.append(f"to {request['destination'].title()}")
+    if request["urgency"]:
+        parts.append(f"({request['urgency']})")
+    return " ".join(parts)
+
+
+def format_quote(result: dict) -> str:
+    """Render a quote() result in the cargo-quote output format."""
+    request = result["request"]
+    quotes = result["quotes"]
+    lines = ["📦 CARGO QUOTE RESULTS", f"Request: {describe_request(request)}"]
+    if result["corrected"]:
+        lines.append(f"Destination matched as: {result['city'].title()}")
+    lines.append("")
+
+    if not quotes:
+        lines.append(f"No matching expedition found for '{request['destination'] or '?'}'.")
+        for q in result["excluded"]:
+            lines.append(f"   ✖ {q['expedition']} - {q['service']}: {q['excluded']}")
+        return "\n".join(lines)
+
+    lines += [f"Found {len(quotes)} matching expedition(s):", "", SEPARATOR, ""]
+    for index, q in enumerate(quotes):
+        number = NUMBER_EMOJI[index] if index < len(NUMBER_EMOJI) else f"{index + 1}."
+        lines.append(f"{number} {q['expedition']} - {q['service'] or 'Service n/a'} ({q['destination']})")
+        if q["total"] is None:
+            lines.append("   💰 Estimated Cost: Contact for quote")
+        elif q["fees"]:
+            fees = " + ".join(f"{name}: {format_rupiah(amount)}" for name, amount in q["fees"].items())
+            lines.append(f"   💰 Estimated Cost: {format_rupiah(q['total'])} "
+                         f"(Base: {format_rupiah(q['base'])} + {fees})")
+        else:
+            lines.append(f"   💰 Estimated Cost: {format_rupiah(q['total'])}")
+        lines.append(f"   ⏱️  ETA: {q['eta'] or 'Contact for ETA'}")
+        contact = " - ".join(filter(None, (q["pic"], q["phone"]))) or "Contact via main office"
+        lines.append(f"   📞 Contact: {contact}")
+        if q["min_qty"]:
+            lines.append(f"   📦 Min Qty: {q['min_qty']}")
+        for warning in q["warnings"]:
+            lines.append(f"   ⚠️  {warning}")
+        if q["notes"]:
+            lines.append(f"   ⚠️  Notes: {q['notes']}")
+        lines += ["", SEPARATOR, ""]
+
+    notes = []
+    if request["liquid"]:
+        notes.append("Liquid cargo requires wooden packing where noted (+100,000/coly, 1 coly = 2 drums @ 25L)")
+        if result["excluded"]:
+            names = ", ".join(sorted({q["expedition"] for q in result["excluded"]}))
+            notes.append(f"Excluded for liquid cargo: {names}")
+    if any(q["mode"] == "express" and "port" in (q["notes"] or "").lower() for q in quotes):
+        notes.append("Air cargo: Port-to-port service, pickup required at destination airport")
+    if any(name.startswith("Penerus") for q in quotes for name in q["fees"]):
+        notes.append("Penerus fees apply for this destination (additional forwarding cost)")
+    if notes:
+        lines.append("💡 IMPORTANT NOTES:")
+        lines += [f"- {note}" for note in notes]
+        lines.append("")
+
+    summary = result["summary"]
+    lines.append("📊 SUMMARY:")
+    if summary["min_total"] is not None:
+        lines.append(f"- Price range: {format_rupiah(summary['min_total'])} - {format_rupiah(summary['max_total'])}")
+    if summary["fastest"]:
+        fastest = summary["fastest"]
+        lines.append(f"- Fastest option: {fastest['expedition']} - {fastest['service']} ({fastest['eta']})")
+    if summary["cheapest"]:
+        cheapest = summary["cheapest"]
+        lines.append(f"- Cheapest option: {cheapest['expedition']} - {cheapest['service']} "
+                     f"({format_rupiah(cheapest['total'])})")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quote a cargo shipment from the expedition rate table")
+    parser.add_argument("request", nargs="+", help='Shipment description, e.g. "100kg general cargo to Surabaya"')
+    parser.add_argument("--data", help=f"Expedition data markdown (default: ${DATA_ENV} or {DEFAULT_DATA})")
+    parser.add_argument("--json", action="store_true", help="Print the quote as JSON")
+    parser.add_argument("--no-cache", action="store_true", help="Re-parse the data file")
+    args = parser.parse_args()
+
+    try:
+        engine = QuoteEngine(args.data, use_cache=not args.no_cache)
+    except FileNotFoundError as e:
+        print(f"Error: data file not found: {e.filename}")
+        print(f"Pass --data or set {DATA_ENV}")
+        sys.exit(1)
+
+    request = parse_request(" ".join(args.request))
+    if not request["destination"]:
+        print("Error: no destination found in the request (e.g. \"100kg to Surabaya\")")
+        sys.exit(1)
+
+    result = engine.quote(request)
+    if args.json:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    else:
+        print(format_quote(result))
+    sys.exit(0 if result["quotes"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Cargo Quote Server
+
+Serves cargo quotes over a small local HTTP API (TCP or Unix socket) so the
+sales chat tool and the ERP can quote without starting a process per request.
+One QuoteEngine stays warm for the server's lifetime: the compiled rate
+table, the destination index and the LRU of recent quotes. Rate edits to the
+data file are picked up on the next request.
+
+Usage:
+    python quote_server.py                              # http://127.0.0.1:8766
+    python quote_server.py --data cargo-shipment-data.md --port 9000
+    python quote_server.py --socket /tmp/cargo-quote.sock
+    curl --unix-socket /tmp/cargo-quote.sock http://x/stats
+
+API (JSON in, JSON out):
+    POST /quote        {"request": "100kg to Surabaya"}
+                       or fields: {"destination", "weight_kg", "liters", "volume_m3",
+                                   "coly", "liquid", "urgency"}
+                       add "text": true for the formatted quote too
+    POST /quote/batch  {"requests": [<request>, ...]} -> {"results": [...]}
+                       (a failing item gets {"error"} without failing the batch)
+    POST /reload       Check the data file now -> {"reloaded"}
+    GET  /stats        Engine and server counters
+    GET  /health       {"ok": true}
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import socketserver
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from quote import QuoteEngine, format_quote, parse_request
+from rate_table import DATA_ENV, DEFAULT_DATA
+
+
+REQUEST_FIELDS = {
+    "destination": str, "weight_kg": (int, float), "liters": (int, float), "volume_m3": (int, float),
+    "coly": int, "liquid": bool, "urgency": str,
+}
+MAX_BATCH = 10_000
+
+
+def build_request(item) -> dict:
+    """
+    Turn a JSON request item into a parsed quote request.
+
+    A string is parsed with the request grammar; an object may give the text
+    under "request" and/or explicit fields, which take precedence.
+
+    Raises:
+        ValueError: malformed item or no destination
+    """
+    if isinstance(item, str):
+        item = {"request": item}
+    if not isinstance(item, dict):
+        raise ValueError("Each request must be a string or an object")
+
+    text = item.get("request")
+    if text is not None and not isinstance(text, str):
+        raise ValueError("'request' must be a string")
+    request = parse_request(text or "")
+    for field, types in REQUEST_FIELDS.items():
+        if field not in item or item[field] is None:
+            continue
+        value = item[field]
+        if not isinstance(value, types) or (types is not bool and isinstance(value, bool)):
+            raise ValueError(f"'{field}' has the wrong type")
+        request[field] = value
+    if request["urgency"] not in (None, "express", "regular"):
+        raise ValueError("'urgency' must be 'express' or 'regular'")
+    if request["liters"] is not None and request["weight_kg"] is None:
+        request["weight_kg"] = request["liters"]
+    if not request["destination"]:
+        raise ValueError("No destination in the request")
+    return request
+
+
+class QuoteRequestHandler(BaseHTTPRequestHandler):
+    """JSON API over a QuoteEngine (set as the server's `engine`)."""
+
+    protocol_version = "HTTP/1.1"
+    routes = [
+        ("POST", r"/quote", "quote"),
+        ("POST", r"/quote/batch", "batch"),
+        ("POST", r"/reload", "reload"),
+        ("GET", r"/stats", "stats"),
+        ("GET", r"/health", "health"),
+    ]
+
+    def setup(self):
+        super().setup()
+        # Headers and body are separate writes; without this, Nagle plus
+        # delayed ACKs add ~40ms to every keep-alive response over TCP
+        if self.connection.family != socket.AF_UNIX:
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, True)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method: str):
+        path = self.path.split("?", 1)[0].rstrip("/")
+        for route_method, pattern, name in self.routes:
+            match = re.fullmatch(pattern, path)
+            if route_method == method and match:
+                break
+        else:
+            return self._send_json(404, {"error": f"No route for {method} {path}"})
+
+        try:
+            body = self._read_json() if method == "POST" else {}
+            status, payload = getattr(self, f"_{name}")(body)
+        except ValueError as e:
+            status, payload = 400, {"error": str(e)}
+        except Exception as e:
+            status, payload = 500, {"error": str(e)}
+        self.server.count(status)
+        self._send_json(status, payload)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        data = json.loads(self.rfile.read(length))
+        if not isinstance(data, dict):
+            raise ValueError("Request body must be a JSON object")
+        return data
+
+    def _send_json(self, status: int, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _quote_one(self, item) -> dict:
+        result = self.server.engine.quote(build_request(item))
+        if isinstance(item, dict) and item.get("text"):
+            return {**result, "text": format_quote(result)}
+        return result
+
+    # Routes
+
+    def _quote(self, body):
+        return 200, self._quote_one(body)
+
+    def _batch(self, body):
+        items = body.get("requests")
+        if not isinstance(items, list):
+            raise ValueError("'requests' must be a list")
+        if len(items) > MAX_BATCH:
+            raise ValueError(f"At most {MAX_BATCH} requests per batch")
+        results = []
+        for item in items:
+            try:
+                results.append(self._quote_one(item))
+            except Exception as e:
+                # Only this item fails; the rest of the batch is still answered
+                results.append({"error": str(e)})
+        return 200, {"results": results}
+
+    def _reload(self, body):
+        return 200, {"reloaded": self.server.engine.refresh(force=True)}
+
+    def _stats(self, body):
+        return 200, {**self.server.engine.stats(), "responses": dict(self.server.responses)}
+
+    def _health(self, body):
+        return 200, {"ok": True}
+
+    def address_string(self):
+        # Unix socket peers have no (host, port) address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name, self.server_port = "localhost", 0
+
+
+def make_server(engine: QuoteEngine, host: str = "127.0.0.1", port: int = 8766,
+                socket_path: str = None, quiet: bool = False):
+    """Build an HTTP server (TCP, or Unix socket when socket_path is set) for an engine."""
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = UnixHTTPServer(socket_path, QuoteRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), QuoteRequestHandler)
+    server.daemon_threads = True
+    server.engine = engine
+    server.quiet = quiet
+    server.responses = {}
+    lock = threading.Lock()
+
+    def count(status: int):
+        with lock:
+            server.responses[status] = server.responses.get(status, 0) + 1
+
+    server.count = count
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve cargo quotes over a local HTTP API")
+    parser.add_argument("--data", help=f"Expedition data markdown (default: ${DATA_ENV} or {DEFAULT_DATA})")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8766, help="Port (default: 8766)")
+    parser.add_argument("--socket", help="Serve on a Unix socket instead of TCP")
+    parser.add_argument("--cache-size", type=int, default=4096, help="Cached quote results (default: 4096)")
+    parser.add_argument("--check-interval", type=float, default=1.0,
+                        help="Seconds between data file checks (default: 1)")
+    parser.add_argument("--quiet", "-q", action="store_true", help="Don't log requests")
+    args = parser.parse_args()
+
+    try:
+        engine = QuoteEngine(args.data, cache_size=args.cache_size, check_interval=args.check_interval)
+    except FileNotFoundError as e:
+        print(f"Error: data file not found: {e.filename}")
+        print(f"Pass --data or set {DATA_ENV}")
+        sys.exit(1)
+    server = make_server(engine, args.host, args.port, args.socket, args.quiet)
+
+    where = args.socket or f"http://{args.host}:{args.port}"
+    stats = engine.stats()
+    print(f"Cargo quote server listening on {where} "
+          f"({stats['rows']} rate rows, {stats['destinations']} destinations from {stats['source']})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""
+Expedition Rate Table
+
+Parses the expedition data markdown (cargo-shipment-data.md) into compiled
+rows: free-text price cells become pricing components, notes become fee and
+restriction flags, ETAs become day ranges. The compiled table is cached as
+JSON next to the data file and reused while the file's size and mtime are
+unchanged, so quotes never re-parse the markdown.
+
+Parsing is tolerant of the spreadsheet export it comes from:
+- Header names are matched against English and Indonesian aliases
+  ("Tujuan", "Harga", "No HP", ...), in any column order
+- "nan", "-" and empty cells are treated as missing
+- Expedition names and contacts are filled down from the row above
+  (merged cells), or taken from the nearest heading when a table has no
+  expedition column
+- Rows holding only notes are appended to the previous row's notes
+
+Used by quote.py; can be run directly to inspect the compiled table:
+    python rate_table.py [data.md] [--json]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+
+DEFAULT_DATA = Path.home() / "Downloads" / "cargo-shipment-data.md"
+DATA_ENV = "CARGO_QUOTE_DATA"
+
+MISSING = {"", "nan", "none", "null", "-", "--", "n/a", "na"}
+
+# Column aliases, checked in this order so e.g. "No HP" is a phone, not a row number
+COLUMN_ALIASES = {
+    "phone": ["phone", "telp", "telepon", "tlp", "no hp", "hp", "wa", "whatsapp", "no telp", "nomor", "contact number"],
+    "pic": ["pic", "contact person", "cp", "kontak", "contact", "sales", "nama pic"],
+    "origin": ["asal", "origin", "kota asal", "dari", "from"],
+    "min_qty": ["min qty", "minimum qty", "minimum", "minimal", "min", "moq", "min order", "min berat"],
+    "eta": ["eta", "estimasi", "lead time", "leadtime", "durasi", "waktu", "transit time", "lama pengiriman", "lama"],
+    "price": ["harga", "price", "tarif", "rate", "biaya", "ongkir", "cost"],
+    "destination": ["tujuan", "destination", "kota tujuan", "rute", "route", "area", "kota", "wilayah", "coverage"],
+    "service": ["layanan", "service", "jenis layanan", "tipe", "type", "jenis", "moda", "mode", "via"],
+    "expedition": ["ekspedisi", "expedition", "nama ekspedisi", "vendor", "carrier", "perusahaan", "company", "forwarder"],
+    "notes": ["notes", "note", "keterangan", "catatan", "ket", "remarks", "remark", "info"],
+}
+FILL_DOWN = ("expedition", "pic", "phone")
+
+AMOUNT = r"(?:rp\.?\s*)?(\d[\d.,]*)\s*(rb|ribu|k|jt|juta)?\b"
+UNIT_KG = r"(?:kg|kilo(?:gram)?s?)"
+UNIT_COLY = r"(?:coly|colly|koli|collies)"
+UNIT_M3 = r"(?:m\.?\s*3|m³|cbm|kubik)"
+TIERED_RE = re.compile(
+    rf"{AMOUNT}\s*(?:for|untuk|utk|/)?\s*(?:first\s+|pertama\s+)?(\d+(?:[.,]\d+)?)\s*{UNIT_KG}\s*(?:pertama|first)?"
+    rf"\s*[,;]?\s*(?:then|next|selanjutnya|berikutnya|lalu|dan|\+)?\s*(?:next\s+)?{AMOUNT}\s*/\s*{UNIT_KG}"
+)
+# A price for a weight with no rate after it: "33,000 for 10kg", "45rb untuk 5kg"
+FLAT_RE = re.compile(
+    rf"{AMOUNT}\s*(?:for|untuk|utk|/)\s*(?:first\s+|pertama\s+)?(\d+(?:[.,]\d+)?)\s*{UNIT_KG}\b"
+)
+COMPONENT_RE = re.compile(rf"{AMOUNT}\s*/\s*({UNIT_KG}|{UNIT_COLY}|{UNIT_M3})")
+BARE_AMOUNT_RE = re.compile(AMOUNT)
+ETA_RE = re.compile(
+    r"(\d+(?:[.,]\d+)?)\s*(?:(?:-|–|s/?d|to|sampai|hingga)\s*(\d+(?:[.,]\d+)?))?\s*(hari|days?|hr|jam|hours?|minggu|weeks?)?"
+)
+MIN_QTY_RE = re.compile(rf"(\d[\d.,]*)\s*({UNIT_KG}|{UNIT_COLY}|{UNIT_M3}|l|lt|liter|ton)?\b")
+PENERUS_RE = re.compile(
+    rf"penerus\s+(?:ke\s+)?([a-z][a-z ]*?)\s*[:=]?\s*[+]?\s*{AMOUNT}(?:\s*/\s*({UNIT_COLY}))?"
+)
+ADMIN_RE = re.compile(rf"admin(?:istrasi)?\s*(?:fee)?\s*[:=]?\s*[+]?\s*{AMOUNT}")
+PACKING_RE = re.compile(rf"pa(?:c)?king\s+kayu(?:[^\d]{{0,20}}{AMOUNT}\s*/\s*{UNIT_COLY})?")
+NO_LIQUID_RE = re.compile(r"cairan\s+tidak\s+(?:bisa|boleh|diterima)|no\s+liquids?|tidak\s+menerima\s+cairan")
+AIR_RE = re.compile(r"\b(?:udara|air\s*cargo|pesawat|port\s*to\s*port|bandara)\b")
+EXPRESS_RE = re.compile(r"\b(?:express|ekspres|kilat|yes|cepat|udara|air)\b")
+REGULAR_RE = re.compile(r"\b(?:reguler|regular|darat|laut|ekonomi|ekonomis|economy)\b")
+
+# Fees documented in SKILL.md, used when a row mentions them without an amount
+DEFAULT_PACKING_FEE = 100_000  # per coly, wooden packing for liquids
+DEFAULT_ADMIN_FEE = 15_000
+DEFAULT_PENERUS = {
+    "situbondo": {"amount": 45_000, "per": "coly"},
+    "tuban": {"amount": 900_000, "per": "shipment"},
+    "gresik": {"amount": 350_000, "per": "shipment"},
+}
+PENERUS_EXPEDITIONS = ("mojoroto",)  # Forward to the DEFAULT_PENERUS cities
+
+# Place name folding shared by penerus fees and the destination index (destinations.py)
+ALIASES = {
+    "jogja": "yogyakarta", "yogya": "yogyakarta", "jogjakarta": "yogyakarta", "diy": "yogyakarta",
+    "solo": "surakarta", "jkt": "jakarta", "dki": "jakarta", "dki jakarta": "jakarta",
+    "sby": "surabaya", "bdg": "bandung", "smg": "semarang", "mlg": "malang", "dps": "denpasar",
+    "mdn": "medan", "mks": "makassar", "ujung pandang": "makassar", "tangsel": "tangerang selatan",
+    "jatim": "jawa timur", "jabar": "jawa barat", "jateng": "jawa tengah",
+    "jatim 1": "jawa timur 1", "jatim 2": "jawa timur 2", "sumut": "sumatera utara",
+    "sulsel": "sulawesi selatan", "sumatra utara": "sumatera utara",
+}
+
+PREFIX_RE = re.compile(r"^(?:kota|kab|kabupaten|kec|kecamatan|prov|provinsi)\s+")
+
+
+def resolve_data_path(path: str = None) -> Path:
+    """The data file: explicit path, then $CARGO_QUOTE_DATA, then ~/Downloads/cargo-shipment-data.md."""
+    return Path(path or os.environ.get(DATA_ENV) or DEFAULT_DATA).expanduser()
+
+
+def is_missing(value: str) -> bool:
+    return value is None or value.strip().lower() in MISSING
+
+
+def normalize(text: str) -> str:
+    """Lowercase, punctuation-free, single-spaced form used for matching names."""
+    return " ".join(re.sub(r"[^\w]+", " ", text.lower()).replace("_", " ").split())
+
+
+def canonical(name: str) -> str:
+    """Canonical key of a place name: normalized, "Kota"/"Kab" prefix dropped, aliases resolved."""
+    key = PREFIX_RE.sub("", normalize(name))
+    return ALIASES.get(key, key)
+
+
+def parse_amount(number: str, suffix: str = None) -> float:
+    """
+    Parse a rupiah amount written either way: "1,270,000", "1.100", "2,5", "45rb".
+
+    A separator followed by exactly three digits is a thousands separator;
+    otherwise the last separator is the decimal point.
+    """
+    number = number.strip(".,")
+    parts = re.split(r"[.,]", number)
+    if len(parts) == 1 or all(len(p) == 3 for p in parts[1:]):
+        value = float("".join(parts))
+    else:
+        value = float("".join(parts[:-1]) + "." + parts[-1])
+    if suffix in ("rb", "ribu", "k"):
+        value *= 1_000
+    elif suffix in ("jt", "juta"):
+        value *= 1_000_000
+    return value
+
+
+def _unit(text: str) -> str:
+    if re.fullmatch(UNIT_COLY, text):
+        return "coly"
+    if re.fullmatch(UNIT_M3, text):
+        return "m3"
+    return "kg"
+
+
+def parse_price(text: str) -> list:
+    """
+    Compile a price cell into pricing components.
+
+    Returns:
+        List of component dicts, summed when quoting:
+          {"kind": "tiered", "base": 50000, "base_kg": 5, "rate": 1100}
+          {"kind": "flat", "base": 33000, "base_kg": 10}  (up to 10kg only)
+          {"kind": "per_kg" | "per_coly" | "per_m3", "rate": 850}
+        A bare amount is read as a per-kg rate. Empty when the price is
+        missing or unreadable ("contact for quote").
+    """
+    if is_missing(text):
+        return []
+    text = text.lower()
+    components = []
+
+    tier = TIERED_RE.search(text)
+    if tier:
+        components.append({
+            "kind": "tiered",
+            "base": parse_amount(tier.group(1), tier.group(2)),
+            "base_kg": parse_amount(tier.group(3)),
+            "rate": parse_amount(tier.group(4), tier.group(5)),
+        })
+        text = text[:tier.start()] + " " + text[tier.end():]
+    else:
+        flat = FLAT_RE.search(text)
+        if flat:
+            components.append({
+                "kind": "flat",
+                "base": parse_amount(flat.group(1), flat.group(2)),
+                "base_kg": parse_amount(flat.group(3)),
+            })
+            text = text[:flat.start()] + " " + text[flat.end():]
+
+    for match in COMPONENT_RE.finditer(text):
+        components.append({
+            "kind": f"per_{_unit(match.group(3))}",
+            "rate": parse_amount(match.group(1), match.group(2)),
+        })
+
+    if not components:
+        bare = BARE_AMOUNT_RE.search(text)
+        if bare:
+            components.append({"kind": "per_kg", "rate": parse_amount(bare.group(1), bare.group(2))})
+    return components
+
+
+def parse_eta(text: str) -> list:
+    """ETA cell ("2-3 hari", "1 day", "24 jam") to [min_days, max_days], or None."""
+    if is_missing(text):
+        return None
+    match = ETA_RE.search(text.lower())
+    if not match:
+        return None
+    low = parse_amount(match.group(1))
+    high = parse_amount(match.group(2)) if match.group(2) else low
+    unit = match.group(3) or "hari"
+    scale = 1 / 24 if unit in ("jam", "hour", "hours") else 7 if unit in ("minggu", "week", "weeks") else 1
+    return [low * scale, high * scale]
+
+
+def parse_min_qty(text: str) -> dict:
+    """Min qty cell ("100kg", "2 coly") to {"amount", "unit"}, or None."""
+    if is_missing(text):
+        return None
+    match = MIN_QTY_RE.search(text.lower())
+    if not match:
+        return None
+    amount = parse_amount(match.group(1))
+    unit = match.group(2) or "kg"
+    if unit == "ton":
+        return {"amount": amount * 1000, "unit": "kg"}
+    if unit in ("l", "lt", "liter"):
+        return {"amount": amount, "unit": "kg"}
+    return {"amount": amount, "unit": _unit(unit)}
+
+
+def split_destinations(text: str) -> list:
+    """A destination cell can list several places: "Surabaya, Gresik / Sidoarjo"."""
+    if is_missing(text):
+        return []
+    text = re.sub(r"\([^)]*\)", " ", text)
+    return [part.strip() for part in re.split(r"[,;/&]|\bdan\b|\band\b", text) if part.strip()]
+
+
+def compile_row(cells: dict) -> dict:
+    """Turn a row of named cells into a compiled rate row."""
+    expedition = cells.get("expedition", "")
+    service = cells.get("service", "")
+    notes = cells.get("notes", "")
+    text = f"{expedition} {service} {notes}".lower()
+
+    penerus = {}
+    for match in PENERUS_RE.finditer(notes.lower()):
+        penerus[canonical(match.group(1))] = {
+            "amount": parse_amount(match.group(2), match.group(3)),
+            "per": "coly" if match.group(4) else "shipment",
+        }
+    if "penerus" in text or any(name in text for name in PENERUS_EXPEDITIONS):
+        for city, fee in DEFAULT_PENERUS.items():
+            penerus.setdefault(city, fee)
+
+    packing = PACKING_RE.search(notes.lower())
+    admin = ADMIN_RE.search(notes.lower())
+    if admin:
+        admin_fee = parse_amount(admin.group(1), admin.group(2))
+    else:
+        admin_fee = DEFAULT_ADMIN_FEE if "admin" in notes.lower() else 0
+
+    if EXPRESS_RE.search(service.lower()):
+        mode = "express"
+    elif REGULAR_RE.search(service.lower()):
+        mode = "regular"
+    else:
+        mode = "express" if AIR_RE.search(text) else None
+
+    return {
+        "expedition": expedition,
+        "service": service,
+        "destination": cells.get("destination", ""),
+        "destinations": split_destinations(cells.get("destination", "")),
+        "price": cells.get("price", ""),
+        "pricing": parse_price(cells.get("price", "")),
+        "eta": cells.get("eta", ""),
+        "eta_days": parse_eta(cells.get("eta", "")),
+        "min_qty": cells.get("min_qty", ""),
+        "min": parse_min_qty(cells.get("min_qty", "")),
+        "pic": cells.get("pic", ""),
+        "phone": cells.get("phone", ""),
+        "notes": notes,
+        "mode": mode,
+        "air": bool(AIR_RE.search(text)),
+        "no_liquid": bool(NO_LIQUID_RE.search(text)),
+        "wooden_packing": bool(packing),
+        "packing_fee": (
+            parse_amount(packing.group(1), packing.group(2))
+            if packing and packing.group(1) else DEFAULT_PACKING_FEE
+        ),
+        "admin_fee": admin_fee,
+        "penerus": penerus,
+    }
+
+
+def map_columns(headers: list) -> dict:
+    """Column index -> field name for a table header, using COLUMN_ALIASES."""
+    names = [normalize(h) for h in headers]
+    mapping = {}
+    # Exact alias matches first, then alias words contained in a longer header
+    for exact in (True, False):
+        for field, aliases in COLUMN_ALIASES.items():
+            if field in mapping.values():
+                continue
+            for index, name in enumerate(names):
+                if index in mapping or not name:
+                    continue
+                if any(name == alias if exact else re.search(rf"\b{alias}\b", name) for alias in aliases):
+                    mapping[index] = field
+                    break
+    return mapping
+
+
+def split_cells(line: str) -> list:
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|") and not line.endswith("\\|"):
+        line = line[:-1]
+    return [cell.strip().replace("\\|", "|") for cell in re.split(r"(?<!\\)\|", line)]
+
+
+def row_key(cells: dict) -> str:
+    """Content key of a row's cells, used to reuse compiled rows across reloads."""
+    return hashlib.sha1(json.dumps(cells, sort_keys=True, ensure_ascii=False).encode()).hexdigest()[:16]
+
+
+def parse_tables(text: str, previous: list = None) -> tuple:
+    """
+    Parse every expedition table in a markdown document.
+
+    Args:
+        text: Markdown document
+        previous: Compiled rows of an earlier version of the document; rows
+            whose cells are unchanged are reused instead of compiled again
+
+    Returns:
+        Tuple of the compiled rows (see compile_row), in document order, each
+        with its position as "id" and its content key as "key", and counts
+        {"compiled", "reused"} of rows compiled now and taken from previous
+    """
+    records = []
+    heading = ""
+    lines = text.splitlines()
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        if line.startswith("#"):
+            heading = line.lstrip("#").strip()
+        is_table = (
+            line.startswith("|") and i + 1 < len(lines)
+            and re.fullmatch(r"\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?", lines[i + 1].strip())
+        )
+        if not is_table:
+            i += 1
+            continue
+
+        mapping = map_columns(split_cells(line))
+        fields = set(mapping.values())
+        usable = "price" in fields and "destination" in fields and ("expedition" in fields or heading)
+        i += 2
+        above = {}
+        while i < len(lines) and lines[i].strip().startswith("|"):
+            if usable:
+                raw = split_cells(lines[i])
+                cells = {
+                    field: raw[index]
+                    for index, field in mapping.items()
+                    if index < len(raw) and not is_missing(raw[index])
+                }
+                if "expedition" not in fields:
+                    cells["expedition"] = heading
+                for field in FILL_DOWN:
+                    if field not in cells and field in above:
+                        cells[field] = above[field]
+
+                if "destination" not in cells and "price" not in cells:
+                    # Continuation row: extra notes for the row above
+                    if cells.get("notes") and records:
+                        records[-1]["notes"] = f"{records[-1].get('notes', '')} {cells['notes']}".strip()
+                elif cells.get("expedition"):
+                    records.append(cells)
+                    above = cells
+            i += 1
+
+    reusable = {row["key"]: row for row in previous or [] if "key" in row}
+    rows = []
+    counts = {"compiled": 0, "reused": 0}
+    for index, cells in enumerate(records):
+        key = row_key(cells)
+        if key in reusable:
+            row = dict(reusable[key])
+            counts["reused"] += 1
+        else:
+            row = compile_row(cells)
+            counts["compiled"] += 1
+        row.update(id=index, key=key)
+        rows.append(row)
+    return rows, counts
+
+
+# Compiled cache
+
+def _parser_version() -> str:
+    """Hash of this file, so cached tables are dropped whenever the parser changes."""
+    return hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
+
+
+def cache_path_for(data_path: Path) -> Path:
+    return data_path.with_name(f".{data_path.name}.quote-cache.json")
+
+
+def load_table(data_path: str = None, use_cache: bool = True, previous: dict = None) -> dict:
+    """
+    Load the compiled rate table, parsing the markdown only when it changed.
+
+    Args:
+        data_path: Expedition data markdown (default: see resolve_data_path)
+        use_cache: Reuse and update the JSON cache next to the data file
+        previous: An earlier table of the same file; its compiled rows are
+            reused for unchanged table rows
+
+    Returns:
+        Dict with "source", "size", "mtime_ns", "sha256", "rows" and
+        "parsed": {"compiled", "reused"} row counts, or None when the table
+        came from the cache
+    """
+    path = resolve_data_path(data_path)
+    st = path.stat()
+    cache_path = cache_path_for(path)
+    version = _parser_version()
+
+    if use_cache:
+        try:
+            cached = json.loads(cache_path.read_text())
+            if (cached["version"] == version and cached["size"] == st.st_size
+                    and cached["mtime_ns"] == st.st_mtime_ns):
+                return {**cached, "parsed": None}
+        except (OSError, ValueError, KeyError):
+            pass
+
+    data = path.read_bytes()
+    rows, parsed = parse_tables(
+        data.decode("utf-8", errors="replace"),
+        previous["rows"] if previous and previous.get("version") == version else None
+    )
+    table = {
+        "version": version,
+        "source": str(path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "rows": rows,
+    }
+    if use_cache:
+        try:
+            tmp = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(table, ensure_ascii=False))
+            tmp.replace(cache_path)
+        except OSError:
+            pass  # Read-only data folder: quote without a cache
+    return {**table, "parsed": parsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse the expedition rate table and show the compiled rows")
+    parser.add_argument("data", nargs="?", help=f"Expedition data markdown (default: ${DATA_ENV} or {DEFAULT_DATA})")
+    parser.add_argument("--json", action="store_true", help="Print the compiled table as JSON")
+    args = parser.parse_args()
+
+    try:
+        table = load_table(args.data, use_cache=False)
+    except FileNotFoundError as e:
+        print(f"Error: data file not found: {e.filename}")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(table, indent=2, ensure_ascii=False))
+        return
+    for row in table["rows"]:
+        pricing = ", ".join(
+            f"flat {c['base']:g}/{c['base_kg']:g}kg" if c["kind"] == "flat" else
+            f"{c['kind']} {c.get('base', '')}{'+' if 'base' in c else ''}{c['rate']:g}"
+            for c in row["pricing"]
+        ) or "contact for quote"
+        flags = [name for name in ("air", "no_liquid", "wooden_packing") if row[name]]
+        print(f"{row['id']:>4} {row['expedition'][:24]:<24} {row['service'][:14]:<14} "
+              f"{', '.join(row['destinations'])[:28]:<28} {pricing:<28} {' '.join(flags)}")
+    print(f"\n{len(table['rows'])} rows from {table['source']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Chat Server Benchmark
+
+Measures how many ImageChat sessions fit in a GB of memory and how many
+requests per second a SessionManager sustains. A synthetic client stands in
+for the Gemini API: it answers every message with a fixed-size image after a
+configurable delay, so the numbers reflect the server, not the model.
+
+  memory      Create --sessions sessions of --turns turns each and report
+              traced heap per session (and sessions per GB), with and
+              without LRU eviction (--max-sessions)
+  throughput  --clients concurrent users each send --requests messages to
+              their own session; reports requests/s and latency percentiles,
+              in-process or through the HTTP API (--http)
+
+Usage:
+    python benchmark_chat_server.py
+    python benchmark_chat_server.py --sessions 500 --turns 4 --image-kb 1500
+    python benchmark_chat_server.py --clients 64 --requests 20 --latency 0.5 --http
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+import urllib.request
+
+from google.genai import types
+
+from chat import percentile
+from chat_server import SessionManager, make_server
+from session_store import SessionStore
+
+
+class SyntheticChat:
+    """Minimal stand-in for a genai chat: fixed-size image replies after a delay."""
+
+    def __init__(self, history: list, image_bytes: int, latency: float):
+        self.history = list(history)
+        self.image_bytes = image_bytes
+        self.latency = latency
+
+    def get_history(self, curated: bool = False) -> list:
+        return self.history
+
+    def send_message_stream(self, message, config=None):
+        yield self.send_message(message, config)
+
+    def send_message(self, message, config=None):
+        time.sleep(self.latency)
+        part = types.Part.from_bytes(data=os.urandom(self.image_bytes), mime_type="image/png")
+        reply = types.Content(role="model", parts=[part])
+        self.history += [types.Content(role="user", parts=[types.Part(text=message)]), reply]
+        return types.GenerateContentResponse(
+            candidates=[types.Candidate(content=reply)],
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=len(message) // 4 + 1,
+                candidates_token_count=1290,
+                total_token_count=len(message) // 4 + 1291
+            )
+        )
+
+
+class SyntheticClient:
+    """Exposes `chats.create()` like genai.Client, returning SyntheticChat objects."""
+
+    def __init__(self, image_bytes: int, latency: float):
+        self.chats = self
+        self.image_bytes = image_bytes
+        self.latency = latency
+
+    def create(self, model: str, config=None, history: list = None):
+        return SyntheticChat(history or [], self.image_bytes, self.latency)
+
+
+def make_manager(root: str, client, **kwargs) -> SessionManager:
+    return SessionManager(
+        SessionStore(os.path.join(root, "sessions")),
+        client=client,
+        output_dir=os.path.join(root, "images"),
+        **kwargs
+    )
+
+
+def bench_memory(args, root: str, max_sessions: int) -> dict:
+    """Traced heap growth for sessions kept resident (or capped by eviction)."""
+    client = SyntheticClient(args.image_kb * 1024, latency=0)
+    manager = make_manager(root, client, max_sessions=max_sessions, idle_ttl=3600)
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    for _ in range(args.sessions):
+        session_id = manager.create()
+        for turn in range(args.turns):
+            manager.send(session_id, f"Refinement {turn}")
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    per_session = (current - baseline) / args.sessions
+    return {
+        "max_sessions": max_sessions,
+        "resident": manager.stats()["resident"],
+        "heap_mb": (current - baseline) / 1024 / 1024,
+        "peak_mb": (peak - baseline) / 1024 / 1024,
+        "per_session_kb": per_session / 1024,
+        "sessions_per_gb": (1024 ** 3) / per_session if per_session > 0 else None,
+        "seconds": elapsed
+    }
+
+
+def bench_throughput(args, root: str) -> dict:
+    """Concurrent users, one session each, sending messages as fast as allowed."""
+    client = SyntheticClient(args.image_kb * 1024, latency=args.latency)
+    manager = make_manager(
+        root, client,
+        max_sessions=args.clients, idle_ttl=3600, max_concurrent=args.max_concurrent
+    )
+
+    server = None
+    if args.http:
+        server = make_server(manager, port=0, quiet=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def post(path: str, body: dict) -> dict:
+        request = urllib.request.Request(
+            base + path, data=json.dumps(body).encode(),
+            headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read())
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def user(index: int):
+        try:
+            session_id = post("/sessions", {})["id"] if server else manager.create()
+            for turn in range(args.requests):
+                start = time.perf_counter()
+                if server:
+                    post(f"/sessions/{session_id}/messages", {"message": f"User {index} turn {turn}"})
+                else:
+                    manager.send(session_id, f"User {index} turn {turn}")
+                with lock:
+                    latencies.append(time.perf_counter() - start)
+        except Exception as e:
+            with lock:
+                errors.append(str(e))
+
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(args.clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    if server:
+        server.shutdown()
+        server.server_close()
+
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "seconds": elapsed,
+        "rps": len(latencies) / elapsed if elapsed else 0,
+        "p50_ms": (percentile(latencies, 50) or 0) * 1000,
+        "p99_ms": (percentile(latencies, 99) or 0) * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the multi-tenant image chat server")
+    parser.add_argument("--sessions", type=int, default=200, help="Sessions for the memory run (default: 200)")
+    parser.add_argument("--turns", type=int, default=3, help="Turns per session (default: 3)")
+    parser.add_argument("--image-kb", type=int, default=1024, help="Synthetic image size in KB (default: 1024)")
+    parser.add_argument("--max-sessions", type=int, default=20,
+                        help="Resident cap for the eviction memory run (default: 20)")
+    parser.add_argument("--clients", type=int, default=32, help="Concurrent users for throughput (default: 32)")
+    parser.add_argument("--requests", type=int, default=10, help="Messages per user (default: 10)")
+    parser.add_argument("--latency", type=float, default=0.2, help="Synthetic model latency in s (default: 0.2)")
+    parser.add_argument("--max-concurrent", type=int, default=16,
+                        help="Global in-flight request limit (default: 16)")
+    parser.add_argument("--http", action="store_true", help="Drive throughput through the HTTP API")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        print(f"Memory: {args.sessions} sessions x {args.turns} turns, {args.image_kb}KB images")
+        print(f"{'resident cap':<14}{'resident':>10}{'heap':>12}{'peak':>12}{'per session':>14}{'sessions/GB':>13}")
+        for index, cap in enumerate((args.sessions, args.max_sessions)):
+            result = bench_memory(args, os.path.join(root, f"memory{index}"), cap)
+            per_gb = result["sessions_per_gb"]
+            print(
+                f"{cap:<14}{result['resident']:>10}{result['heap_mb']:>10.1f}MB"
+                f"{result['peak_mb']:>10.1f}MB{result['per_session_kb']:>12.0f}KB"
+                f"{per_gb if per_gb is None else round(per_gb):>13}"
+            )
+
+        via = "HTTP" if args.http else "in-process"
+        print(f"\nThroughput ({via}): {args.clients} users x {args.requests} messages, "
+              f"{args.latency * 1000:.0f}ms model latency, {args.max_concurrent} concurrent")
+        result = bench_throughput(args, os.path.join(root, "throughput"))
+        print(
+            f"{result['requests']} requests ({result['errors']} errors) in {result['seconds']:.2f}s: "
+            f"{result['rps']:.1f} req/s, p50 {result['p50_ms']:.0f}ms, p99 {result['p99_ms']:.0f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Input Preparation Benchmark
+
+Compares per-request preparation time and peak RSS for the two ways edit.py
+can turn input files into request parts:
+
+  pil  - Image.open() each file and let it be re-encoded for the request
+         (the pre-existing behaviour; mirrors the SDK's PIL -> Blob conversion)
+  raw  - read_image(): sniff headers via mmap and send the file bytes as
+         typed parts, with no decode
+
+Each strategy runs in a fresh subprocess so peak RSS is not shared.
+
+Usage:
+    python benchmark_inputs.py                      # 14 synthetic 2K JPEGs
+    python benchmark_inputs.py --count 14 --size 2048
+    python benchmark_inputs.py --images a.jpg b.png c.webp
+"""
+
+import argparse
+import io
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+STRATEGIES = ["pil", "raw"]
+
+
+def make_images(directory: Path, count: int, size: int) -> list:
+    """Write synthetic noisy JPEGs so encoders can't shortcut flat colour."""
+    import os
+    from PIL import Image
+
+    paths = []
+    for i in range(count):
+        image = Image.frombytes("RGB", (size, size), os.urandom(size * size * 3))
+        path = directory / f"input_{i:02d}.jpg"
+        image.save(path, "JPEG", quality=90)
+        paths.append(str(path))
+    return paths
+
+
+def prepare_pil(paths: list) -> list:
+    from google.genai import types
+    from PIL import Image
+
+    parts = []
+    for path in paths:
+        image = Image.open(path)
+        out = io.BytesIO()
+        if image.format == "JPEG" and image.mode in ("1", "L", "RGB", "RGBX", "CMYK"):
+            image.save(out, "JPEG", quality="keep")
+            mime_type = "image/jpeg"
+        else:
+            image.save(out, "PNG")
+            mime_type = "image/png"
+        parts.append(types.Part.from_bytes(data=out.getvalue(), mime_type=mime_type))
+    return parts
+
+
+def prepare_raw(paths: list) -> list:
+    from image_inputs import read_image, to_parts
+
+    return to_parts([read_image(path) for path in paths])
+
+
+def run_worker(strategy: str, paths: list, rounds: int):
+    """Measure one strategy in this process and print a JSON result."""
+    prepare = prepare_pil if strategy == "pil" else prepare_raw
+
+    # Import cost is not part of per-request preparation
+    from google.genai import types  # noqa: F401
+    from PIL import Image  # noqa: F401
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        parts = prepare(paths)
+        timings.append(time.perf_counter() - start)
+        del parts
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # ru_maxrss is KB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    timings.sort()
+    print(json.dumps({
+        "strategy": strategy,
+        "median_ms": timings[len(timings) // 2] * 1000,
+        "min_ms": timings[0] * 1000,
+        "peak_rss_mb": rss_after * scale / 1024 / 1024,
+        "rss_growth_mb": (rss_after - rss_before) * scale / 1024 / 1024
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark input image preparation")
+    parser.add_argument("--images", nargs="+", help="Input images (default: synthetic)")
+    parser.add_argument("--count", type=int, default=14, help="Synthetic image count (default: 14)")
+    parser.add_argument("--size", type=int, default=2048, help="Synthetic image edge in px (default: 2048)")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed rounds per strategy (default: 5)")
+    parser.add_argument("--worker", choices=STRATEGIES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.images, args.rounds)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = args.images or make_images(Path(tmp), args.count, args.size)
+        total = sum(Path(p).stat().st_size for p in paths)
+        print(f"Preparing {len(paths)} image(s), {total / 1024 / 1024:.1f}MB on disk, "
+              f"{args.rounds} rounds each\n")
+        print(f"{'strategy':<10}{'median':>12}{'min':>12}{'peak RSS':>12}{'RSS growth':>14}")
+
+        for strategy in STRATEGIES:
+            output = subprocess.run(
+                [sys.executable, __file__, "--worker", strategy,
+                 "--rounds", str(args.rounds), "--images", *paths],
+                capture_output=True, text=True, check=True,
+                cwd=Path(__file__).parent
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(
+                f"{strategy:<10}{result['median_ms']:>10.1f}ms{result['min_ms']:>10.1f}ms"
+                f"{result['peak_rss_mb']:>10.1f}MB{result['rss_growth_mb']:>12.1f}MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
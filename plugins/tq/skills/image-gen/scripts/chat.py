@@ -11,6 +11,16 @@ Usage:
     python chat.py
     python chat.py --model pro --thinking
     python chat.py --output-dir ./my-images
+    python chat.py --keep-images 2       # Keep the last 2 images in context
+    python chat.py --resume 20250101-120000-ab12cd
+    python chat.py --no-auto-save
+    python chat.py --script session.jsonl            # Headless, JSON results on stdout
+    python chat.py --script a.jsonl --script b.jsonl # Concurrent sessions
+    cat session.jsonl | python chat.py --script -
+
+Generation runs in the background: keep typing while an image renders.
+Follow-up prompts are queued, status/history/save answer immediately, and
+every generated image is auto-saved by a background writer.
 
 Commands (during chat):
     save <filename>     Save current image to file
@@ -20,10 +30,23 @@ Commands (during chat):
     model <flash|pro>   Switch model
     thinking on|off     Toggle thinking mode (Pro only)
     history             Show conversation history
+    export-metrics <p>  Write per-turn latency/token telemetry (.json or .csv)
+    sessions            List saved sessions
+    resume <id>         Restore a saved session (id prefix is enough)
+    branch <n> <prompt> Try n alternative refinements concurrently
+    pick <i>            Continue from alternative i
+    keep <i> <name>     Keep alternative i as a named branch
+    checkout <name>     Switch to a named branch
     clear               Start fresh conversation
     help                Show commands
     quit/exit           Exit chat
 
+Script files hold one JSON command per line, run in order:
+    {"message": "A cozy coffee shop interior"}
+    {"cmd": "aspect", "value": "16:9"}
+    {"message": "Add warm morning light"}
+    {"cmd": "save", "value": "coffee_shop.png"}
+
 Example session:
     > Generate a cozy coffee shop interior
     [Image generated]
@@ -36,9 +59,14 @@ Example session:
 """
 
 import argparse
+import json
 import os
+import queue
 import re
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
@@ -55,6 +83,8 @@ except ImportError:
     print("Error: google-genai not installed. Run: pip install google-genai Pillow")
     sys.exit(1)
 
+from session_store import DEFAULT_SESSION_DIR, SessionStore
+
 
 MODELS = {
     "flash": "gemini-2.5-flash-image",
@@ -64,6 +94,70 @@ MODELS = {
 ASPECT_RATIOS = ["1:1", "2:3", "3:2", "3:4", "4:3", "4:5", "5:4", "9:16", "16:9", "21:9"]
 SIZES = ["1K", "2K", "4K"]
 
+# Images kept in the context sent upstream; older ones become text placeholders
+DEFAULT_KEEP_IMAGES = 1
+
+
+def format_bytes(size: int) -> str:
+    """Format a byte count for display."""
+    for unit in ("B", "KB", "MB"):
+        if abs(size) < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+def part_bytes(parts: list) -> int:
+    """Approximate the payload size of a list of Part (inline data + text)."""
+    total = 0
+    for part in parts:
+        if part.inline_data is not None and part.inline_data.data:
+            total += len(part.inline_data.data)
+        elif part.text:
+            total += len(part.text.encode())
+    return total
+
+
+def content_bytes(contents: list) -> int:
+    """Approximate the payload size of a list of Content (inline data + text)."""
+    return sum(part_bytes(content.parts or []) for content in contents)
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers (None if empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize_metrics(metrics: list) -> dict:
+    """
+    Aggregate per-turn telemetry into running totals and latency percentiles.
+
+    Args:
+        metrics: Per-turn records as kept in ImageChat.metrics
+
+    Returns:
+        Dict with turn/error counts, token and byte totals, and p50/p90/p99
+        for wall latency and time to first byte (seconds)
+    """
+    ok = [m for m in metrics if m["success"]]
+    summary = {
+        "turns": len(metrics),
+        "errors": len(metrics) - len(ok),
+        "request_bytes": sum(m["request_bytes"] for m in metrics),
+        "response_bytes": sum(m["response_bytes"] for m in metrics)
+    }
+    for key in ("prompt_tokens", "candidates_tokens", "thoughts_tokens", "total_tokens"):
+        summary[key] = sum(m[key] or 0 for m in metrics)
+    for key in ("seconds", "ttfb"):
+        values = [m[key] for m in ok if m[key] is not None]
+        for pct in (50, 90, 99):
+            summary[f"{key}_p{pct}"] = percentile(values, pct)
+    return summary
+
 
 class ImageChat:
     """Multi-turn image generation chat session."""
@@ -74,49 +168,57 @@ class ImageChat:
         thinking: bool = False,
         output_dir: str = "./generated-images",
         aspect_ratio: str = "1:1",
-        image_size: str = None
+        image_size: str = None,
+        keep_images: int = DEFAULT_KEEP_IMAGES,
+        store: SessionStore = None,
+        client=None
     ):
-        if not os.environ.get("GEMINI_API_KEY"):
+        """
+        Args:
+            keep_images: Most recent images kept in the context sent with each turn.
+                Older image parts are replaced by a short text placeholder. None keeps all.
+            store: SessionStore to persist every turn to (None keeps the session in memory)
+            client: Shared genai.Client (e.g. one pooled client for many sessions);
+                a new one is created when omitted
+        """
+        if client is None and not os.environ.get("GEMINI_API_KEY"):
             raise ValueError("GEMINI_API_KEY environment variable not set")
 
-        self.client = genai.Client()
+        self.client = client or genai.Client()
         self.model = model
         self.thinking = thinking
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.aspect_ratio = aspect_ratio
         self.image_size = image_size
+        self.keep_images = keep_images
+        self.store = store
+        self.session_id = None
 
         self.chat = None
         self.current_image = None
         self.history = []
         self.image_count = 0
+        self.last_turn = None
+        self.metrics = []
+
+        # Speculative branching: unpicked alternatives and named branches
+        self.branch_name = "main"
+        self.branches = {}
+        self.candidates = []
+        self.candidate_base = 0
 
         self._start_chat()
 
-    def _start_chat(self):
-        """Initialize or restart the chat session."""
+    def _start_chat(self, history: list = None):
+        """Initialize or restart the chat session, optionally replaying prior turns."""
         model_name = MODELS.get(self.model, MODELS["flash"])
 
-        config_kwargs = {}
-        image_config_kwargs = {"aspect_ratio": self.aspect_ratio}
-
-        if self.image_size and self.model == "pro":
-            image_config_kwargs["image_size"] = self.image_size
-
-        config_kwargs["image_config"] = types.ImageConfig(**image_config_kwargs)
-
-        if self.thinking and self.model == "pro":
-            config_kwargs["thinking_config"] = types.ThinkingConfig(thinking_budget=1024)
-
-        config = types.GenerateContentConfig(**config_kwargs)
-
         self.chat = self.client.chats.create(
             model=model_name,
-            config=config
+            config=self._build_config(),
+            history=history or []
         )
-        self.history = []
-        self.current_image = None
 
     def _build_config(self):
         """Build current config for requests."""
@@ -133,32 +235,375 @@ class ImageChat:
 
         return types.GenerateContentConfig(**config_kwargs)
 
+    def _compact_history(self):
+        """
+        Apply the image retention policy to the context sent upstream.
+
+        Keeps the newest `keep_images` image parts and replaces older ones with
+        a text placeholder naming the prompt that produced them, so request
+        size stays flat however long the session runs. Text turns are kept.
+        """
+        if self.keep_images is None:
+            return
+
+        history = self.chat.get_history(curated=True)
+        image_positions = [
+            (i, j)
+            for i, content in enumerate(history)
+            for j, part in enumerate(content.parts or [])
+            if part.inline_data is not None
+        ]
+        dropped = set(image_positions[:max(len(image_positions) - self.keep_images, 0)])
+        if not dropped:
+            return
+
+        compacted = []
+        for i, content in enumerate(history):
+            parts = []
+            for j, part in enumerate(content.parts or []):
+                if (i, j) not in dropped:
+                    parts.append(part)
+                    continue
+                # Streamed replies can span several model contents; find the turn's prompt
+                user_turn = next(
+                    (history[k] for k in range(i - 1, -1, -1) if history[k].role == "user"),
+                    None
+                )
+                prompt = next(
+                    (p.text for p in (user_turn.parts or []) if p.text),
+                    None
+                ) if user_turn is not None else None
+                summary = "[Earlier image omitted from context"
+                summary += f"; generated for: {prompt[:120]}]" if prompt else "]"
+                parts.append(types.Part(text=summary))
+            compacted.append(types.Content(role=content.role, parts=parts))
+
+        self._start_chat(compacted)
+
     def send(self, message: str) -> tuple[bool, str]:
         """
         Send a message and get response.
 
+        The reply is streamed so time to first byte can be measured. Per-turn
+        telemetry (latency, TTFB, request/response bytes, token usage) is
+        appended to `metrics`; `last_turn` is the latest record.
+
         Returns:
             (success, message) tuple
         """
+        turn = None
+        start = None
         try:
-            response = self.chat.send_message(message)
+            self._compact_history()
+            context = self.chat.get_history(curated=True)
+            turn_start = len(context)
+            turn = self.last_turn = {
+                "turn": len(self.metrics) + 1,
+                "time": datetime.now().isoformat(timespec="seconds"),
+                "model": self.model,
+                "thinking": self.thinking,
+                "aspect_ratio": self.aspect_ratio,
+                "image_size": self.image_size,
+                "request_bytes": content_bytes(context) + len(message.encode()),
+                "response_bytes": 0,
+                "images_in_context": sum(
+                    1 for c in context for p in (c.parts or []) if p.inline_data is not None
+                ),
+                "ttfb": None,
+                "seconds": None,
+                "prompt_tokens": None,
+                "candidates_tokens": None,
+                "thoughts_tokens": None,
+                "total_tokens": None,
+                "success": False
+            }
+            self.metrics.append(turn)
+
+            # Current settings ride along as per-request overrides, so config
+            # changes never require restarting the session
+            start = time.perf_counter()
+            parts = []
+            usage = None
+            for chunk in self.chat.send_message_stream(message, config=self._build_config()):
+                if turn["ttfb"] is None:
+                    turn["ttfb"] = time.perf_counter() - start
+                parts.extend(chunk.parts or [])
+                usage = chunk.usage_metadata or usage
+            turn["seconds"] = time.perf_counter() - start
+
+            turn["response_bytes"] = part_bytes(parts)
+            if usage is not None:
+                turn["prompt_tokens"] = usage.prompt_token_count
+                turn["candidates_tokens"] = usage.candidates_token_count
+                turn["thoughts_tokens"] = usage.thoughts_token_count
+                turn["total_tokens"] = usage.total_token_count
+
+            result, entries, image = self._read_response(message, parts)
+            if image is not None:
+                self.current_image = image
+                self.image_count += 1
+            self.candidates = []
+            turn["success"] = result[0]
+
+            self.history.extend(entries)
+            self._persist_turn(turn_start, entries, metrics=turn)
+            return result
 
-            self.history.append({"role": "user", "content": message})
+        except Exception as e:
+            if turn is not None and turn["seconds"] is None and start is not None:
+                turn["seconds"] = time.perf_counter() - start
+            return False, str(e)
 
-            for part in response.parts:
-                if part.inline_data is not None:
-                    self.current_image = part.as_image()
-                    self.image_count += 1
-                    self.history.append({"role": "assistant", "content": "[Image generated]"})
-                    return True, "Image generated"
-                elif part.text is not None:
-                    self.history.append({"role": "assistant", "content": part.text})
-                    return True, part.text
+    def metrics_summary(self) -> dict:
+        """Running totals and latency percentiles for this session."""
+        return summarize_metrics(self.metrics)
 
-            return False, "No response received"
+    def export_metrics(self, path: str) -> str:
+        """
+        Write per-turn telemetry to disk.
 
-        except Exception as e:
-            return False, str(e)
+        A .csv path gets one row per turn; anything else gets JSON with the
+        session id, summary and per-turn records.
+
+        Returns:
+            The written path
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix.lower() == ".csv":
+            import csv
+            with open(path, "w", newline="") as f:
+                fields = list(self.metrics[0]) if self.metrics else ["turn"]
+                writer = csv.DictWriter(f, fieldnames=fields)
+                writer.writeheader()
+                writer.writerows(self.metrics)
+        else:
+            path.write_text(json.dumps({
+                "session_id": self.session_id,
+                "summary": self.metrics_summary(),
+                "turns": self.metrics
+            }, indent=2))
+        return str(path)
+
+    def _read_response(self, message: str, parts: list) -> tuple:
+        """
+        Extract the turn result from a reply's parts.
+
+        The final image wins even when text (or streamed text chunks) comes
+        first; thought parts are ignored.
+
+        Returns:
+            ((success, message), display entries, image or None)
+        """
+        entries = [{"role": "user", "content": message}]
+        answer = [part for part in parts if not part.thought]
+        images = [part for part in answer if part.inline_data is not None]
+        text = "".join(part.text for part in answer if part.text)
+
+        if images:
+            entries.append({"role": "assistant", "content": "[Image generated]"})
+            return (True, "Image generated"), entries, images[-1].as_image()
+        if text:
+            entries.append({"role": "assistant", "content": text})
+            return (True, text), entries, None
+        return (False, "No response received"), entries, None
+
+    def branch(self, count: int, message: str) -> list:
+        """
+        Send `count` alternative refinements of the current state concurrently.
+
+        Each alternative runs in its own chat forked from the current context,
+        so exploring costs one round trip of wall time. The main line is left
+        untouched until an alternative is adopted with pick().
+
+        Returns:
+            Candidate dicts with index, success, response, image and seconds
+        """
+        if count < 1:
+            raise ValueError("Branch count must be at least 1")
+
+        self._compact_history()
+        base = self.chat.get_history(curated=True)
+        config = self._build_config()
+        model_name = MODELS.get(self.model, MODELS["flash"])
+
+        def run(index: int) -> dict:
+            chat = self.client.chats.create(model=model_name, config=config, history=base)
+            start = time.perf_counter()
+            try:
+                response = chat.send_message(message, config=config)
+                (success, text), entries, image = self._read_response(message, response.parts or [])
+            except Exception as e:
+                success, text, entries, image = False, str(e), [], None
+            return {
+                "index": index,
+                "success": success,
+                "response": text,
+                "image": image,
+                "entries": entries,
+                "chat": chat,
+                "seconds": time.perf_counter() - start
+            }
+
+        with ThreadPoolExecutor(max_workers=count) as pool:
+            candidates = list(pool.map(run, range(1, count + 1)))
+
+        self.candidate_base = len(base)
+        self.candidates = candidates
+        return candidates
+
+    def _candidate(self, index: int) -> dict:
+        if not self.candidates:
+            raise ValueError("No pending branch alternatives. Use 'branch N <prompt>' first.")
+        if not 1 <= index <= len(self.candidates):
+            raise ValueError(f"Choose an alternative from 1 to {len(self.candidates)}")
+        candidate = self.candidates[index - 1]
+        if not candidate["success"]:
+            raise ValueError(f"Alternative {index} failed: {candidate['response']}")
+        return candidate
+
+    def pick(self, index: int):
+        """Continue the conversation from alternative `index`; unkept alternatives are discarded."""
+        candidate = self._candidate(index)
+        self.chat = candidate["chat"]
+        if candidate["image"] is not None:
+            self.current_image = candidate["image"]
+            self.image_count += 1
+        self.history.extend(candidate["entries"])
+        self._persist_turn(self.candidate_base, candidate["entries"])
+        self.candidates = []
+
+    def keep(self, index: int, name: str):
+        """Keep alternative `index` as a named branch that can be checked out later."""
+        if name == self.branch_name or name in self.branches:
+            raise ValueError(f"Branch '{name}' already exists")
+        candidate = self._candidate(index)
+        contents = candidate["chat"].get_history(curated=True)
+
+        session_id = None
+        if self.store is not None:
+            session_id = self.store.fork_session(self.session_id, self._settings())
+            self.store.append_turn(
+                session_id, contents[self.candidate_base:], candidate["entries"], self._settings()
+            )
+
+        self.branches[name] = {
+            # Own chat object, so picking the same alternative doesn't share state
+            "chat": self.client.chats.create(
+                model=MODELS.get(self.model, MODELS["flash"]),
+                config=self._build_config(),
+                history=contents
+            ),
+            "history": self.history + candidate["entries"],
+            "current_image": candidate["image"] or self.current_image,
+            "image_count": self.image_count + (candidate["image"] is not None),
+            "session_id": session_id
+        }
+
+    def checkout(self, name: str):
+        """Switch to a named branch; the current line is kept under its own name."""
+        if name == self.branch_name:
+            return
+        if name not in self.branches:
+            raise ValueError(f"No branch named '{name}'")
+        branch = self.branches.pop(name)
+        self.branches[self.branch_name] = {
+            "chat": self.chat,
+            "history": self.history,
+            "current_image": self.current_image,
+            "image_count": self.image_count,
+            "session_id": self.session_id
+        }
+        self.chat = branch["chat"]
+        self.history = branch["history"]
+        self.current_image = branch["current_image"]
+        self.image_count = branch["image_count"]
+        self.session_id = branch["session_id"]
+        self.branch_name = name
+        self.candidates = []
+
+    def _settings(self) -> dict:
+        return {
+            "model": self.model,
+            "thinking": self.thinking,
+            "aspect_ratio": self.aspect_ratio,
+            "image_size": self.image_size,
+            "keep_images": self.keep_images
+        }
+
+    def _persist_turn(self, start: int, entries: list, metrics: dict = None):
+        """Append the turn that began at history index `start` to the session store."""
+        if self.store is None:
+            return
+        contents = self.chat.get_history(curated=True)[start:]
+        if not contents:
+            return  # Invalid responses are not part of the replayable context
+        if self.session_id is None:
+            self.session_id = self.store.create_session(self._settings())
+        self.store.append_turn(
+            self.session_id, contents, entries, self._settings(), metrics=metrics
+        )
+
+    def list_sessions(self) -> list:
+        """List saved sessions, most recent first."""
+        if self.store is None:
+            raise ValueError("Session persistence is disabled")
+        return self.store.list_sessions()
+
+    def resume(self, session_id: str) -> dict:
+        """
+        Restore a saved session from disk without any API calls.
+
+        Settings, display history, image count and the current image are
+        restored, and the chat context is rebuilt from the stored turns. Only
+        the images the retention policy would keep are read from the store.
+
+        Returns:
+            The session meta
+        """
+        if self.store is None:
+            raise ValueError("Session persistence is disabled")
+
+        session_id = self.store.resolve(session_id)
+        meta = self.store.read_meta(session_id)
+        turns = self.store.read_turns(session_id)
+
+        settings = meta["settings"]
+        self.model = settings.get("model", self.model)
+        self.thinking = settings.get("thinking", self.thinking)
+        self.aspect_ratio = settings.get("aspect_ratio", self.aspect_ratio)
+        self.image_size = settings.get("image_size", self.image_size)
+
+        records = [record for turn in turns for record in turn["contents"]]
+        image_refs = [
+            part for record in records for part in record["parts"] if "object" in part
+        ]
+        keep = len(image_refs) if self.keep_images is None else self.keep_images
+        for part in image_refs[:max(len(image_refs) - keep, 0)]:
+            part.clear()
+            part["text"] = "[Earlier image omitted from context]"
+
+        contents = self.store.load_contents(records)
+        self._start_chat(contents)
+        self.candidates = []
+
+        self.session_id = session_id
+        self.history = [entry for turn in turns for entry in turn["history"]]
+        self.metrics = [turn["metrics"] for turn in turns if turn.get("metrics")]
+        self.image_count = len(image_refs)
+        self.current_image = None
+        for content in reversed(contents):
+            image_part = next((p for p in content.parts if p.inline_data is not None), None)
+            if image_part is not None:
+                self.current_image = image_part.as_image()
+                break
+
+        return meta
+
+    def default_filename(self) -> str:
+        """Auto-generated filename for the current image."""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return f"chat_{timestamp}_{self.image_count}.png"
 
     def save(self, filename: str = None) -> str:
         """Save current image to file."""
@@ -166,8 +611,7 @@ class ImageChat:
             raise ValueError("No image to save. Generate an image first.")
 
         if filename is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"chat_{timestamp}_{self.image_count}.png"
+            filename = self.default_filename()
 
         # Ensure .png extension
         if not filename.lower().endswith(('.png', '.jpg', '.jpeg', '.webp')):
@@ -179,40 +623,44 @@ class ImageChat:
         return str(output_path)
 
     def set_aspect_ratio(self, ratio: str):
-        """Change aspect ratio for future generations."""
+        """Change aspect ratio for future generations (history is kept)."""
         if ratio not in ASPECT_RATIOS:
             raise ValueError(f"Invalid ratio. Choose from: {ASPECT_RATIOS}")
         self.aspect_ratio = ratio
-        self._start_chat()  # Restart chat with new config
 
     def set_size(self, size: str):
-        """Change image size (Pro model only)."""
+        """Change image size (Pro model only; history is kept)."""
         if size not in SIZES:
             raise ValueError(f"Invalid size. Choose from: {SIZES}")
         if self.model != "pro":
             raise ValueError("Size setting only available for Pro model")
         self.image_size = size
-        self._start_chat()
 
     def set_model(self, model: str):
-        """Switch model."""
+        """Switch model, replaying the conversation into a new session."""
         if model not in MODELS:
             raise ValueError(f"Invalid model. Choose from: {list(MODELS.keys())}")
+        if model == self.model:
+            return
+        history = list(self.chat.get_history(curated=True))
         self.model = model
-        self._start_chat()
+        self._start_chat(history)
 
     def set_thinking(self, enabled: bool):
-        """Toggle thinking mode (Pro only)."""
+        """Toggle thinking mode (Pro only; history is kept)."""
         if enabled and self.model != "pro":
             raise ValueError("Thinking mode only available for Pro model")
         self.thinking = enabled
-        self._start_chat()
 
     def clear(self):
         """Clear conversation and start fresh."""
         self._start_chat()
+        self.session_id = None
+        self.history = []
         self.current_image = None
         self.image_count = 0
+        self.metrics = []
+        self.candidates = []
 
     def get_history(self) -> list:
         """Get conversation history."""
@@ -227,9 +675,335 @@ class ImageChat:
             "image_size": self.image_size,
             "images_generated": self.image_count,
             "has_current_image": self.current_image is not None,
-            "history_length": len(self.history)
+            "history_length": len(self.history),
+            "keep_images": self.keep_images,
+            "session_id": self.session_id,
+            "branch": self.branch_name,
+            "pending_alternatives": len(self.candidates),
+            "telemetry": self.metrics_summary()
+        }
+
+
+class ChatWorker:
+    """
+    Runs ImageChat operations on a background thread so the REPL never blocks.
+
+    Jobs execute one at a time in submission order, so prompts and setting
+    changes typed while a generation is in flight apply in the order entered.
+    Generated images are handed to a second thread that writes them to disk.
+    """
+
+    def __init__(self, chat: ImageChat, notify, auto_save: bool = True):
+        self.chat = chat
+        self.notify = notify
+        self.auto_save = auto_save
+        self.jobs = queue.Queue()
+        self.writes = queue.Queue()
+        self.current = None
+
+        threading.Thread(target=self._run_jobs, daemon=True).start()
+        threading.Thread(target=self._run_writes, daemon=True).start()
+
+    def submit(self, label: str, fn, *args):
+        """Queue fn(*args); its returned text (if any) is reported via notify."""
+        self.jobs.put((label, fn, args))
+
+    def send(self, message: str):
+        """Queue a message to the model."""
+        self.submit(message, self._send, message)
+
+    def status(self) -> dict:
+        current = self.current
+        return {
+            "in_flight": current[0] if current else None,
+            "elapsed": time.perf_counter() - current[1] if current else None,
+            "queued": self.jobs.qsize(),
+            "pending_writes": self.writes.qsize()
         }
 
+    def wait(self):
+        """Block until every queued job and pending write has finished."""
+        self.jobs.join()
+        self.writes.join()
+
+    def _send(self, message: str) -> str:
+        success, response = self.chat.send(message)
+        if not success:
+            return f"Error: {response}"
+
+        if response == "Image generated":
+            lines = ["[Image generated]" + ("" if self.auto_save else " Use 'save' to save it.")]
+            if self.auto_save:
+                path = self.chat.output_dir / self.chat.default_filename()
+                self.writes.put((self.chat.current_image, path))
+        else:
+            lines = [f"Response: {response}"]
+
+        turn = self.chat.last_turn
+        if turn and turn["seconds"] is not None:
+            tokens = f", {turn['total_tokens']} tokens" if turn["total_tokens"] else ""
+            lines.append(
+                f"(request {format_bytes(turn['request_bytes'])}, "
+                f"{turn['images_in_context']} image(s) in context, "
+                f"first byte {turn['ttfb'] or 0:.1f}s, {turn['seconds']:.1f}s{tokens})"
+            )
+        return "\n".join(lines)
+
+    def branch(self, count: int, message: str):
+        """Queue a branch of `count` concurrent alternatives."""
+        self.submit(message, self._branch, count, message)
+
+    def _branch(self, count: int, message: str) -> str:
+        candidates = self.chat.branch(count, message)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        wall = max(c["seconds"] for c in candidates)
+        lines = [f"{len(candidates)} alternative(s) in {wall:.1f}s:"]
+
+        for candidate in candidates:
+            index = candidate["index"]
+            if candidate["image"] is not None:
+                # Previews are always written: they are how alternatives get compared
+                path = self.chat.output_dir / f"branch_{timestamp}_{index}.png"
+                self.writes.put((candidate["image"], path))
+                lines.append(f"  [{index}] {path.name} ({candidate['seconds']:.1f}s)")
+            elif candidate["success"]:
+                lines.append(f"  [{index}] Response: {candidate['response'][:80]}")
+            else:
+                lines.append(f"  [{index}] Error: {candidate['response']}")
+
+        lines.append("Use 'pick <i>' to continue from one or 'keep <i> <name>' to save it as a branch.")
+        return "\n".join(lines)
+
+    def _run_jobs(self):
+        while True:
+            label, fn, args = self.jobs.get()
+            self.current = (label, time.perf_counter())
+            try:
+                message = fn(*args)
+            except Exception as e:
+                message = f"Error: {e}"
+            self.current = None
+            if message:
+                self.notify(message)
+            self.jobs.task_done()
+
+    def _run_writes(self):
+        while True:
+            image, path = self.writes.get()
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                image.save(str(path))
+                self.notify(f"Auto-saved: {path}")
+            except Exception as e:
+                self.notify(f"Error auto-saving {path}: {e}")
+            self.writes.task_done()
+
+
+def run_command(chat: ImageChat, command: dict, auto_save: bool = True, tag: str = None):
+    """
+    Execute one scripted command against a chat.
+
+    Args:
+        chat: The ImageChat to drive
+        command: {"message": ...} or {"cmd": <name>, "value": ...}; branch takes
+            "n" and "message", keep takes "value" (index) and "name"
+        auto_save: Save each generated image with an auto-generated name
+        tag: Prefix for auto-saved filenames, so concurrent sessions don't collide
+
+    Returns:
+        JSON-safe result for the command
+
+    Raises:
+        ValueError: Unknown command, bad arguments, or a failed request
+    """
+    if "message" in command and "cmd" not in command:
+        name = "message"
+    else:
+        name = command.get("cmd")
+    value = command.get("value")
+
+    if name == "message":
+        success, response = chat.send(command["message"])
+        if not success:
+            raise ValueError(response)
+        result = {"response": response, **(chat.last_turn or {})}
+        if response == "Image generated" and auto_save:
+            filename = chat.default_filename()
+            if tag:
+                filename = re.sub(r"[^\w.-]", "-", tag) + "_" + filename
+            result["saved"] = chat.save(filename)
+        return result
+    if name == "aspect":
+        chat.set_aspect_ratio(value)
+    elif name == "size":
+        chat.set_size(str(value).upper())
+    elif name == "model":
+        chat.set_model(str(value).lower())
+    elif name == "thinking":
+        chat.set_thinking(value in (True, "on"))
+    elif name == "save":
+        return {"saved": chat.save(value)}
+    elif name == "status":
+        return chat.get_status()
+    elif name == "metrics":
+        result = {"summary": chat.metrics_summary()}
+        if value:
+            result["exported"] = chat.export_metrics(value)
+        return result
+    elif name == "history":
+        return chat.get_history()
+    elif name == "clear":
+        chat.clear()
+    elif name == "resume":
+        return chat.resume(value)
+    elif name == "branch":
+        candidates = chat.branch(int(command.get("n", 2)), command["message"])
+        return [
+            {k: c[k] for k in ("index", "success", "response", "seconds")}
+            for c in candidates
+        ]
+    elif name == "pick":
+        chat.pick(int(value))
+    elif name == "keep":
+        chat.keep(int(value), command["name"])
+    elif name == "checkout":
+        chat.checkout(value)
+    else:
+        raise ValueError(f"Unknown command: {name!r}")
+    return chat.get_status()
+
+
+def read_script(path: str) -> list:
+    """Read JSONL commands from a file, or stdin for '-'. Blank and # lines are skipped."""
+    f = sys.stdin if path == "-" else open(path)
+    try:
+        return [
+            json.loads(line) for line in f
+            if line.strip() and not line.lstrip().startswith("#")
+        ]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def run_script(chat: ImageChat, tag: str, commands: list, emit, auto_save: bool = True) -> int:
+    """
+    Run scripted commands in order, emitting one JSON result per command.
+
+    Returns:
+        Number of failed commands
+    """
+    failed = 0
+    script_start = time.perf_counter()
+    for line, command in enumerate(commands, 1):
+        start = time.perf_counter()
+        record = {"session": tag, "line": line, "command": command}
+        try:
+            record["result"] = run_command(chat, command, auto_save, tag)
+            record["ok"] = True
+        except Exception as e:
+            record["ok"] = False
+            record["error"] = str(e)
+            failed += 1
+        record["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        emit(record)
+
+    emit({
+        "session": tag,
+        "summary": {
+            "commands": len(commands),
+            "failed": failed,
+            "session_id": chat.session_id,
+            "elapsed_ms": round((time.perf_counter() - script_start) * 1000, 1)
+        }
+    })
+    return failed
+
+
+def run_headless(args, make_chat) -> int:
+    """
+    Run every --script as its own concurrent chat session.
+
+    With --resume and several scripts, each script continues its own fork of
+    the resumed session, so concurrent scripts never append to the same turn
+    log. The fork ids are reported in each script's summary record.
+
+    Returns:
+        Process exit code (1 if any command failed)
+    """
+    if args.script.count("-") > 1:
+        print("Error: stdin ('-') can only be used for one script", file=sys.stderr)
+        return 1
+
+    emit_lock = threading.Lock()
+
+    def emit(record: dict):
+        with emit_lock:
+            print(json.dumps(record, default=str), flush=True)
+
+    fork_lock = threading.Lock()
+    source = []
+
+    def fork(store: SessionStore) -> str:
+        # Resolve the prefix once: after the first fork it may match the forks too
+        with fork_lock:
+            if not source:
+                source.append(store.resolve(args.resume))
+            return store.fork_session(source[0], store.read_meta(source[0])["settings"])
+
+    def run(index: int, path: str) -> int:
+        tag = "stdin" if path == "-" else Path(path).stem
+        if len(args.script) > 1:
+            tag = f"{index}:{tag}"
+        try:
+            commands = read_script(path)
+            chat = make_chat()
+            if args.resume:
+                session_id = args.resume
+                if len(args.script) > 1 and chat.store is not None:
+                    session_id = fork(chat.store)
+                chat.resume(session_id)
+        except Exception as e:
+            emit({"session": tag, "ok": False, "error": str(e)})
+            return 1
+        return run_script(chat, tag, commands, emit, args.auto_save)
+
+    with ThreadPoolExecutor(max_workers=len(args.script)) as pool:
+        failures = list(pool.map(run, range(1, len(args.script) + 1), args.script))
+    return 1 if any(failures) else 0
+
+
+def keep_images_arg(value: str):
+    """Parse --keep-images: a positive count, or 'all' to disable compaction."""
+    if value.lower() == "all":
+        return None
+    try:
+        count = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("must be a positive integer or 'all'")
+    if count < 1:
+        raise argparse.ArgumentTypeError("must be a positive integer or 'all'")
+    return count
+
+
+def print_telemetry(summary: dict):
+    """Print running totals and latency percentiles from summarize_metrics()."""
+    if not summary["turns"]:
+        return
+
+    def fmt(value):
+        return "-" if value is None else f"{value:.1f}s"
+
+    print(f"Turns: {summary['turns']} ({summary['errors']} failed)")
+    print(f"Tokens: {summary['total_tokens']} total "
+          f"({summary['prompt_tokens']} prompt, {summary['candidates_tokens']} output, "
+          f"{summary['thoughts_tokens']} thinking)")
+    print(f"Bytes: {format_bytes(summary['request_bytes'])} sent, "
+          f"{format_bytes(summary['response_bytes'])} received")
+    for key, label in (("seconds", "Latency"), ("ttfb", "First byte")):
+        print(f"{label}: p50 {fmt(summary[key + '_p50'])}, "
+              f"p90 {fmt(summary[key + '_p90'])}, p99 {fmt(summary[key + '_p99'])}")
+
 
 def print_help():
     """Print available commands."""
@@ -240,11 +1014,23 @@ Commands:
   size <1K|2K|4K>     Set image size (Pro model only)
   model <flash|pro>   Switch model
   thinking on|off     Toggle thinking mode (Pro only)
-  status              Show current settings
+  status              Show current settings and telemetry
+  export-metrics <path>  Write per-turn telemetry (.json or .csv)
   history             Show conversation history
+  sessions            List saved sessions
+  resume <id>         Restore a saved session (id prefix is enough)
+  branch <n> <prompt> Try n alternative refinements at once
+  pick <i>            Continue from alternative i (others are discarded)
+  keep <i> <name>     Keep alternative i as a named branch
+  branches            List pending alternatives and named branches
+  checkout <name>     Switch to a named branch
   clear               Start fresh conversation
   help                Show this help
-  quit|exit           Exit chat
+  quit|exit           Exit chat (waits for queued work)
+
+Generation runs in the background: keep typing while an image renders.
+Prompts and setting changes are queued in order; status, history and save
+answer immediately.
 
 Tips:
   - Describe images naturally, like talking to a creative
@@ -285,31 +1071,129 @@ def main():
         default=None,
         help="Image size (Pro only)"
     )
+    parser.add_argument(
+        "--keep-images",
+        type=keep_images_arg,
+        default=DEFAULT_KEEP_IMAGES,
+        help=f"Images kept in context per turn, older ones are summarized (default: {DEFAULT_KEEP_IMAGES}; 'all' keeps every image)"
+    )
+    parser.add_argument(
+        "--session-dir",
+        default=str(DEFAULT_SESSION_DIR),
+        help=f"Where sessions are saved (default: {DEFAULT_SESSION_DIR})"
+    )
+    parser.add_argument(
+        "--no-persist",
+        action="store_true",
+        help="Don't save the session to disk"
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="SESSION_ID",
+        help="Resume a saved session"
+    )
+    parser.add_argument(
+        "--no-auto-save",
+        dest="auto_save",
+        action="store_false",
+        help="Don't auto-save generated images (use 'save' instead)"
+    )
+    parser.add_argument(
+        "--script",
+        action="append",
+        metavar="FILE",
+        help="Run JSONL commands headlessly ('-' for stdin); repeat for concurrent sessions"
+    )
 
     args = parser.parse_args()
 
-    try:
-        chat = ImageChat(
+    def make_chat():
+        return ImageChat(
             model=args.model,
             thinking=args.thinking,
             output_dir=args.output_dir,
             aspect_ratio=args.aspect,
-            image_size=args.size
+            image_size=args.size,
+            keep_images=args.keep_images,
+            store=None if args.no_persist else SessionStore(args.session_dir)
         )
+
+    if args.script:
+        sys.exit(run_headless(args, make_chat))
+
+    try:
+        chat = make_chat()
+        if args.resume:
+            meta = chat.resume(args.resume)
+            print(f"Resumed session {meta['id']} ({meta['turns']} turns)")
     except Exception as e:
         print(f"Error initializing chat: {e}")
         sys.exit(1)
 
-    print(f"Image Chat initialized ({args.model} model)")
+    print(f"Image Chat initialized ({chat.model} model)")
     print("Type 'help' for commands, 'quit' to exit")
     print("-" * 40)
 
+    print_lock = threading.Lock()
+
+    def notify(message: str):
+        # Background results arrive while input() is waiting; redraw the prompt after them
+        with print_lock:
+            print(f"\n{message}\n> ", end="", flush=True)
+
+    worker = ChatWorker(chat, notify, auto_save=args.auto_save)
+
+    def queued(label: str, fn, *fn_args):
+        busy = worker.status()
+        ahead = busy["queued"] + (1 if busy["in_flight"] else 0)
+        if ahead:
+            print(f"Queued behind {ahead} job(s).")
+        worker.submit(label, fn, *fn_args)
+
+    def set_aspect(ratio):
+        chat.set_aspect_ratio(ratio)
+        return (f"Aspect ratio set to: {ratio}\n"
+                "Note: Conversation history preserved, applies from the next message.")
+
+    def set_size(size):
+        chat.set_size(size)
+        return (f"Size set to: {size}\n"
+                "Note: Conversation history preserved, applies from the next message.")
+
+    def set_model(model):
+        chat.set_model(model)
+        return (f"Switched to {model} model\n"
+                "Note: Conversation history replayed into the new model session.")
+
+    def set_thinking(setting):
+        chat.set_thinking(setting == "on")
+        return f"Thinking mode: {setting}"
+
+    def resume(session_id):
+        meta = chat.resume(session_id)
+        return f"Resumed session {meta['id']} ({meta['turns']} turns, {chat.model} model)"
+
+    def clear():
+        chat.clear()
+        return "Conversation cleared. Starting fresh."
+
+    def pick(index):
+        chat.pick(index)
+        return f"Continuing from alternative {index}."
+
+    def keep(index, name):
+        chat.keep(index, name)
+        return f"Kept alternative {index} as branch '{name}'."
+
+    def checkout(name):
+        chat.checkout(name)
+        return f"Switched to branch '{name}' ({chat.image_count} image(s))."
+
     while True:
         try:
             user_input = input("\n> ").strip()
         except (EOFError, KeyboardInterrupt):
-            print("\nGoodbye!")
-            break
+            user_input = "quit"
 
         if not user_input:
             continue
@@ -318,6 +1202,13 @@ def main():
         lower_input = user_input.lower()
 
         if lower_input in ("quit", "exit", "q"):
+            busy = worker.status()
+            if busy["in_flight"] or busy["queued"] or busy["pending_writes"]:
+                print("Waiting for queued work to finish (Ctrl+C to abort)...")
+                try:
+                    worker.wait()
+                except KeyboardInterrupt:
+                    pass
             print("Goodbye!")
             break
 
@@ -326,12 +1217,31 @@ def main():
 
         elif lower_input == "status":
             status = chat.get_status()
+            busy = worker.status()
             print(f"Model: {status['model']}")
             print(f"Thinking: {'on' if status['thinking'] else 'off'}")
             print(f"Aspect ratio: {status['aspect_ratio']}")
             print(f"Image size: {status['image_size'] or 'default'}")
             print(f"Images generated: {status['images_generated']}")
             print(f"Has current image: {status['has_current_image']}")
+            print(f"Images kept in context: {status['keep_images'] or 'all'}")
+            print(f"Branch: {status['branch']}"
+                  + (f" ({status['pending_alternatives']} alternative(s) pending)"
+                     if status["pending_alternatives"] else ""))
+            if busy["in_flight"]:
+                print(f"In flight: {busy['in_flight'][:60]} ({busy['elapsed']:.1f}s)")
+            print(f"Queued: {busy['queued']}, pending saves: {busy['pending_writes']}")
+            print_telemetry(status["telemetry"])
+
+        elif lower_input.startswith("export-metrics"):
+            parts = user_input.split(maxsplit=1)
+            if len(parts) < 2:
+                print("Usage: export-metrics <path.json|path.csv>")
+                continue
+            try:
+                print(f"Metrics written to: {chat.export_metrics(parts[1].strip())}")
+            except Exception as e:
+                print(f"Error exporting metrics: {e}")
 
         elif lower_input == "history":
             history = chat.get_history()
@@ -342,10 +1252,65 @@ def main():
                     role = "You" if entry["role"] == "user" else "AI"
                     content = entry["content"][:100] + "..." if len(entry["content"]) > 100 else entry["content"]
                     print(f"{i+1}. {role}: {content}")
+            busy = worker.status()
+            if busy["in_flight"]:
+                print(f"(generating: {busy['in_flight'][:60]}, {busy['elapsed']:.1f}s)")
+
+        elif lower_input == "sessions":
+            try:
+                sessions = chat.list_sessions()
+            except Exception as e:
+                print(f"Error: {e}")
+                continue
+            if not sessions:
+                print("No saved sessions yet.")
+            for meta in sessions[:20]:
+                marker = "*" if meta["id"] == chat.session_id else " "
+                title = (meta["title"] or "")[:50]
+                print(f"{marker} {meta['id']}  {meta['turns']:>3} turns  {meta['updated']}  {title}")
+
+        elif lower_input.startswith("resume "):
+            queued(user_input, resume, user_input.split(maxsplit=1)[1].strip())
 
         elif lower_input == "clear":
-            chat.clear()
-            print("Conversation cleared. Starting fresh.")
+            queued(user_input, clear)
+
+        elif lower_input.startswith("branch "):
+            parts = user_input.split(maxsplit=2)
+            if len(parts) < 3 or not parts[1].isdigit() or int(parts[1]) < 1:
+                print("Usage: branch <n> <prompt>")
+                continue
+            busy = worker.status()
+            ahead = busy["queued"] + (1 if busy["in_flight"] else 0)
+            print(f"Queued behind {ahead} job(s)." if ahead
+                  else f"Generating {parts[1]} alternative(s) in background...")
+            worker.branch(int(parts[1]), parts[2])
+
+        elif lower_input.startswith("pick "):
+            value = user_input.split(maxsplit=1)[1].strip()
+            if not value.isdigit():
+                print("Usage: pick <i>")
+                continue
+            queued(user_input, pick, int(value))
+
+        elif lower_input.startswith("keep "):
+            parts = user_input.split()
+            if len(parts) != 3 or not parts[1].isdigit():
+                print("Usage: keep <i> <name>")
+                continue
+            queued(user_input, keep, int(parts[1]), parts[2])
+
+        elif lower_input == "branches":
+            for candidate in chat.candidates:
+                state = "image" if candidate["image"] is not None else (
+                    "text" if candidate["success"] else "failed")
+                print(f"  [{candidate['index']}] pending alternative ({state})")
+            print(f"* {chat.branch_name} ({chat.image_count} image(s))")
+            for name, branch in chat.branches.items():
+                print(f"  {name} ({branch['image_count']} image(s))")
+
+        elif lower_input.startswith("checkout "):
+            queued(user_input, checkout, user_input.split(maxsplit=1)[1].strip())
 
         elif lower_input.startswith("save"):
             parts = user_input.split(maxsplit=1)
@@ -357,50 +1322,23 @@ def main():
                 print(f"Error saving: {e}")
 
         elif lower_input.startswith("aspect "):
-            ratio = user_input.split(maxsplit=1)[1].strip()
-            try:
-                chat.set_aspect_ratio(ratio)
-                print(f"Aspect ratio set to: {ratio}")
-                print("Note: Conversation history preserved, new config applied.")
-            except Exception as e:
-                print(f"Error: {e}")
+            queued(user_input, set_aspect, user_input.split(maxsplit=1)[1].strip())
 
         elif lower_input.startswith("size "):
-            size = user_input.split(maxsplit=1)[1].strip().upper()
-            try:
-                chat.set_size(size)
-                print(f"Size set to: {size}")
-            except Exception as e:
-                print(f"Error: {e}")
+            queued(user_input, set_size, user_input.split(maxsplit=1)[1].strip().upper())
 
         elif lower_input.startswith("model "):
-            model = user_input.split(maxsplit=1)[1].strip().lower()
-            try:
-                chat.set_model(model)
-                print(f"Switched to {model} model")
-                print("Note: Conversation cleared with model change.")
-            except Exception as e:
-                print(f"Error: {e}")
+            queued(user_input, set_model, user_input.split(maxsplit=1)[1].strip().lower())
 
         elif lower_input.startswith("thinking "):
-            setting = user_input.split(maxsplit=1)[1].strip().lower()
-            try:
-                chat.set_thinking(setting == "on")
-                print(f"Thinking mode: {setting}")
-            except Exception as e:
-                print(f"Error: {e}")
+            queued(user_input, set_thinking, user_input.split(maxsplit=1)[1].strip().lower())
 
         else:
-            # Regular message - send to model
-            print("Generating...")
-            success, response = chat.send(user_input)
-            if success:
-                if response == "Image generated":
-                    print("[Image generated] Use 'save' to save it.")
-                else:
-                    print(f"Response: {response}")
-            else:
-                print(f"Error: {response}")
+            # Regular message - generated in the background
+            busy = worker.status()
+            ahead = busy["queued"] + (1 if busy["in_flight"] else 0)
+            print(f"Queued behind {ahead} job(s)." if ahead else "Generating in background...")
+            worker.send(user_input)
 
 
 if __name__ == "__main__":
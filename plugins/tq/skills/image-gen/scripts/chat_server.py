@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+Multi-tenant Image Chat Server
+
+Serves many concurrent ImageChat sessions from one process behind a small
+local HTTP API. All sessions share one pooled genai client. Each session runs
+one request at a time, and a global limit caps in-flight requests. Idle
+sessions are evicted (LRU and TTL); their state is already on disk through
+the session store, so an evicted session is restored transparently on its
+next request, without any API calls.
+
+Usage:
+    python chat_server.py                          # http://127.0.0.1:8765
+    python chat_server.py --port 9000 --max-sessions 200 --idle-ttl 600
+    python chat_server.py --socket /tmp/image-chat.sock
+    curl --unix-socket /tmp/image-chat.sock http://x/stats
+
+API (JSON in, JSON out):
+    POST   /sessions                     {"model", "aspect_ratio", ...} -> {"id", ...}
+    GET    /sessions/<id>                Session status
+    POST   /sessions/<id>/messages       {"message"} -> {"response", "image", "turn"}
+    GET    /sessions/<id>/image          Current image bytes
+    POST   /sessions/<id>/settings       {"aspect_ratio", "image_size", "model", "thinking"}
+    DELETE /sessions/<id>                Evict from memory (kept on disk)
+    GET    /stats                        Manager counters
+
+Session ids must be given in full and there is no listing endpoint: an id
+is the only handle on a user's chat, so callers can't discover or reach
+each other's sessions by prefix. (The chat.py CLI still accepts prefixes.)
+"""
+
+import argparse
+import json
+import os
+import re
+import socketserver
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    from google import genai
+except ImportError:
+    print("Error: google-genai not installed. Run: pip install google-genai Pillow")
+    sys.exit(1)
+
+from chat import DEFAULT_KEEP_IMAGES, ImageChat
+from session_store import DEFAULT_SESSION_DIR, SessionStore
+
+
+class SessionBusy(Exception):
+    """A session or the whole server is at its concurrency limit."""
+
+
+class SessionManager:
+    """
+    Holds many ImageChat sessions keyed by session id.
+
+    Sessions live in an LRU-ordered dict. When more than `max_sessions` are
+    resident, or one has been idle longer than `idle_ttl`, it is evicted:
+    its settings are flushed to the store (turns are already persisted as
+    they happen) and the in-memory chat is dropped. Busy sessions are never
+    evicted.
+    """
+
+    def __init__(
+        self,
+        store: SessionStore,
+        client=None,
+        output_dir: str = "./generated-images",
+        max_sessions: int = 100,
+        idle_ttl: float = 900,
+        max_concurrent: int = 8,
+        per_session: int = 1,
+        acquire_timeout: float = 30,
+        keep_images: int = DEFAULT_KEEP_IMAGES
+    ):
+        """
+        Args:
+            store: SessionStore backing every session (required for eviction)
+            client: Shared genai.Client; one is created when omitted
+            max_sessions: Sessions kept in memory before LRU eviction
+            idle_ttl: Seconds of inactivity before a session is evicted
+            max_concurrent: Requests in flight across all sessions
+            per_session: Requests in flight per session (the chat is sequential,
+                so values above 1 only make sense for read-only use)
+            acquire_timeout: Seconds to wait for a slot before SessionBusy
+            keep_images: Image retention policy passed to each ImageChat
+        """
+        self.store = store
+        self.client = client or genai.Client()
+        self.output_dir = output_dir
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.per_session = per_session
+        self.acquire_timeout = acquire_timeout
+        self.keep_images = keep_images
+
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.counters = {
+            "created": 0, "restored": 0, "evicted": 0,
+            "requests": 0, "rejected": 0, "errors": 0
+        }
+
+    def _count(self, counter: str):
+        with self.lock:
+            self.counters[counter] += 1
+
+    def _new_chat(self, **settings) -> ImageChat:
+        return ImageChat(
+            output_dir=self.output_dir,
+            keep_images=self.keep_images,
+            store=self.store,
+            client=self.client,
+            **settings
+        )
+
+    def create(self, settings: dict = None) -> str:
+        """Start a new session and return its id."""
+        chat = self._new_chat(**(settings or {}))
+        chat.session_id = self.store.create_session(chat._settings())
+        with self.lock:
+            self._admit(chat.session_id, chat)
+            self.counters["created"] += 1
+        self.evict_idle()
+        return chat.session_id
+
+    def _admit(self, session_id: str, chat: ImageChat):
+        self.sessions[session_id] = {
+            "chat": chat,
+            "slots": threading.BoundedSemaphore(self.per_session),
+            "active": 0,
+            "last_used": time.monotonic()
+        }
+        self.sessions.move_to_end(session_id)
+
+    def _entry(self, session_id: str, reserve: bool = False) -> dict:
+        """
+        Return the resident entry for a session, restoring it from disk if needed.
+
+        With reserve, the entry is marked active in the same critical section,
+        so it can't be evicted while the caller waits for a slot.
+
+        Raises:
+            KeyError: No saved session has exactly this id
+        """
+        with self.lock:
+            entry = self.sessions.get(session_id)
+            if entry is not None:
+                self.sessions.move_to_end(session_id)
+                entry["last_used"] = time.monotonic()
+                entry["active"] += reserve
+                return entry
+
+        # Exact ids only: prefix resolution would let one caller reach another's session
+        if not self.store.exists(session_id):
+            raise KeyError(session_id)
+
+        # Restore outside the lock; reading turns from disk can take a moment
+        chat = self._new_chat()
+        chat.resume(session_id)
+
+        with self.lock:
+            entry = self.sessions.get(session_id)
+            if entry is None:  # Another thread may have restored it meanwhile
+                self._admit(session_id, chat)
+                entry = self.sessions[session_id]
+                self.counters["restored"] += 1
+            entry["last_used"] = time.monotonic()
+            entry["active"] += reserve
+        self.evict_idle()
+        return entry
+
+    def run(self, session_id: str, fn):
+        """
+        Run fn(chat) under the session's and the global concurrency limits.
+
+        Raises:
+            SessionBusy: No slot became free within acquire_timeout
+        """
+        entry = self._entry(session_id, reserve=True)
+        try:
+            if not entry["slots"].acquire(timeout=self.acquire_timeout):
+                self._count("rejected")
+                raise SessionBusy(f"Session {session_id} is busy")
+            try:
+                if not self.slots.acquire(timeout=self.acquire_timeout):
+                    self._count("rejected")
+                    raise SessionBusy("Server is at its concurrency limit")
+                try:
+                    return fn(entry["chat"])
+                finally:
+                    self.slots.release()
+            finally:
+                entry["slots"].release()
+        finally:
+            with self.lock:
+                entry["active"] -= 1
+                entry["last_used"] = time.monotonic()
+
+    def send(self, session_id: str, message: str) -> dict:
+        """Send a message to a session; returns the response and turn telemetry."""
+        def send(chat):
+            success, response = chat.send(message)
+            self._count("requests")
+            if not success:
+                self._count("errors")
+                raise ValueError(response)
+            return {
+                "response": response,
+                "image": response == "Image generated",
+                "turn": chat.last_turn
+            }
+        return self.run(session_id, send)
+
+    def update_settings(self, session_id: str, settings: dict) -> dict:
+        """Apply setting changes; they take effect from the next message."""
+        def update(chat):
+            if "model" in settings:
+                chat.set_model(settings["model"])
+            if "aspect_ratio" in settings:
+                chat.set_aspect_ratio(settings["aspect_ratio"])
+            if "image_size" in settings:
+                chat.set_size(settings["image_size"])
+            if "thinking" in settings:
+                chat.set_thinking(bool(settings["thinking"]))
+            self.store.save_settings(chat.session_id, chat._settings())
+            return chat.get_status()
+        return self.run(session_id, update)
+
+    def status(self, session_id: str) -> dict:
+        return self._entry(session_id)["chat"].get_status()
+
+    def image(self, session_id: str) -> tuple:
+        """Current image of a session as (bytes, mime_type)."""
+        chat = self._entry(session_id)["chat"]
+        if chat.current_image is None:
+            raise ValueError("Session has no image yet")
+        return chat.current_image.image_bytes, chat.current_image.mime_type or "image/png"
+
+    def evict(self, session_id: str) -> bool:
+        """Drop a session from memory (its state stays on disk). Busy sessions are kept."""
+        with self.lock:
+            entry = self.sessions.get(session_id)
+            if entry is None or entry["active"]:
+                return False
+            del self.sessions[session_id]
+            self.counters["evicted"] += 1
+        chat = entry["chat"]
+        self.store.save_settings(chat.session_id, chat._settings())
+        return True
+
+    def evict_idle(self) -> int:
+        """Evict sessions over the LRU limit or idle past the TTL. Returns the count evicted."""
+        now = time.monotonic()
+        with self.lock:
+            idle = [
+                sid for sid, entry in self.sessions.items()
+                if not entry["active"] and now - entry["last_used"] > self.idle_ttl
+            ]
+            excess = len(self.sessions) - len(idle) - self.max_sessions
+            # OrderedDict iterates least recently used first
+            for sid, entry in self.sessions.items():
+                if excess <= 0:
+                    break
+                if sid not in idle and not entry["active"]:
+                    idle.append(sid)
+                    excess -= 1
+        return sum(self.evict(sid) for sid in idle)
+
+    def stats(self) -> dict:
+        with self.lock:
+            active = sum(entry["active"] for entry in self.sessions.values())
+            return {"resident": len(self.sessions), "active": active, **self.counters}
+
+    def start_reaper(self, interval: float = 30):
+        """Evict idle sessions periodically on a daemon thread."""
+        def reap():
+            while True:
+                time.sleep(interval)
+                self.evict_idle()
+        threading.Thread(target=reap, daemon=True).start()
+
+
+class ChatRequestHandler(BaseHTTPRequestHandler):
+    """JSON API over a SessionManager (set as the server's `manager`)."""
+
+    protocol_version = "HTTP/1.1"
+    routes = [
+        ("POST", r"/sessions", "create"),
+        ("GET", r"/stats", "stats"),
+        ("GET", r"/sessions/([\w-]+)", "status"),
+        ("DELETE", r"/sessions/([\w-]+)", "evict"),
+        ("POST", r"/sessions/([\w-]+)/messages", "message"),
+        ("POST", r"/sessions/([\w-]+)/settings", "settings"),
+        ("GET", r"/sessions/([\w-]+)/image", "image"),
+    ]
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method: str):
+        path = self.path.split("?", 1)[0].rstrip("/")
+        for route_method, pattern, name in self.routes:
+            match = re.fullmatch(pattern, path)
+            if route_method == method and match:
+                break
+        else:
+            return self._send_json(404, {"error": f"No route for {method} {path}"})
+
+        try:
+            body = self._read_json() if method == "POST" else {}
+            status, payload = getattr(self, f"_{name}")(*match.groups(), body)
+        except SessionBusy as e:
+            status, payload = 429, {"error": str(e)}
+        except (FileNotFoundError, KeyError) as e:
+            status, payload = 404, {"error": f"Unknown session: {e}"}
+        except ValueError as e:
+            status, payload = (404 if str(e).startswith("No session") else 400), {"error": str(e)}
+        except Exception as e:
+            status, payload = 500, {"error": str(e)}
+
+        if isinstance(payload, tuple):
+            self._send_bytes(status, *payload)
+        else:
+            self._send_json(status, payload)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        data = json.loads(self.rfile.read(length))
+        if not isinstance(data, dict):
+            raise ValueError("Request body must be a JSON object")
+        return data
+
+    def _send_bytes(self, status: int, data: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status: int, payload):
+        self._send_bytes(status, json.dumps(payload, default=str).encode(), "application/json")
+
+    # Routes
+
+    def _create(self, body):
+        settings = {k: body[k] for k in ("model", "thinking", "aspect_ratio", "image_size") if k in body}
+        return 201, {"id": self.server.manager.create(settings)}
+
+    def _stats(self, body):
+        return 200, self.server.manager.stats()
+
+    def _status(self, session_id, body):
+        return 200, self.server.manager.status(session_id)
+
+    def _evict(self, session_id, body):
+        return 200, {"evicted": self.server.manager.evict(session_id)}
+
+    def _message(self, session_id, body):
+        if not body.get("message"):
+            raise ValueError("'message' is required")
+        return 200, self.server.manager.send(session_id, body["message"])
+
+    def _settings(self, session_id, body):
+        return 200, self.server.manager.update_settings(session_id, body)
+
+    def _image(self, session_id, body):
+        return 200, self.server.manager.image(session_id)
+
+    def address_string(self):
+        # Unix socket peers have no (host, port) address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name, self.server_port = "localhost", 0
+
+
+def make_server(manager: SessionManager, host: str = "127.0.0.1", port: int = 8765,
+                socket_path: str = None, quiet: bool = False):
+    """Build an HTTP server (TCP, or Unix socket when socket_path is set) for a manager."""
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = UnixHTTPServer(socket_path, ChatRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), ChatRequestHandler)
+    server.manager = manager
+    server.quiet = quiet
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve many ImageChat sessions over a local HTTP API")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Port (default: 8765)")
+    parser.add_argument("--socket", help="Serve on a Unix socket instead of TCP")
+    parser.add_argument("--session-dir", default=str(DEFAULT_SESSION_DIR),
+                        help=f"Where sessions are saved (default: {DEFAULT_SESSION_DIR})")
+    parser.add_argument("--output-dir", "-o", default="./generated-images",
+                        help="Output directory for saved images")
+    parser.add_argument("--max-sessions", type=int, default=100,
+                        help="Sessions kept in memory before LRU eviction (default: 100)")
+    parser.add_argument("--idle-ttl", type=float, default=900,
+                        help="Seconds idle before a session is evicted (default: 900)")
+    parser.add_argument("--max-concurrent", type=int, default=8,
+                        help="Requests in flight across all sessions (default: 8)")
+    parser.add_argument("--quiet", "-q", action="store_true", help="Don't log requests")
+    args = parser.parse_args()
+
+    if not os.environ.get("GEMINI_API_KEY"):
+        print("Error: GEMINI_API_KEY environment variable not set")
+        sys.exit(1)
+
+    manager = SessionManager(
+        SessionStore(args.session_dir),
+        output_dir=args.output_dir,
+        max_sessions=args.max_sessions,
+        idle_ttl=args.idle_ttl,
+        max_concurrent=args.max_concurrent
+    )
+    manager.start_reaper(interval=min(60, max(1, args.idle_ttl / 4)))
+    server = make_server(manager, args.host, args.port, args.socket, args.quiet)
+
+    where = args.socket or f"http://{args.host}:{args.port}"
+    print(f"Image chat server listening on {where} "
+          f"(max {args.max_sessions} resident sessions, {args.max_concurrent} concurrent requests)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,11 +15,27 @@ Usage:
     python edit.py remove -i photo.jpg --element "person in background" -o cleaned.png
     python edit.py recolor -i car.png --target "car body" --color "metallic red" -o car_red.png
     python edit.py combine --images img1.png img2.png -p "Blend these seamlessly" -o combined.png
+    python edit.py pipeline -i car.png -c steps.json -o car_final.png --save-steps
+    python edit.py fanout -i product.jpg --styles "watercolor" "pop art" "film noir" -o ./looks
+
+Pipeline spec (JSON, or YAML with PyYAML installed):
+{
+    "model": "pro",
+    "steps": [
+        {"op": "background", "new_bg": "mountain road at dusk"},
+        {"op": "recolor", "target": "car body", "color": "metallic red"},
+        {"op": "add", "element": "motion blur", "position": "background"}
+    ]
+}
 """
 
 import argparse
+import json
 import os
+import re
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 try:
@@ -28,15 +44,22 @@ try:
 except ImportError:
     pass
 
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
 try:
     from google import genai
     from google.genai import types
-    from PIL import Image
+    from PIL import Image, ImageDraw, ImageOps
 except ImportError:
     print("Error: Required packages not installed.")
     print("Run: pip install google-genai Pillow")
     sys.exit(1)
 
+from image_inputs import UploadCache, prepare_images, print_stats, read_image, to_parts
+
 
 # Model constants
 MODELS = {
@@ -47,6 +70,128 @@ MODELS = {
 ASPECT_RATIOS = ["1:1", "2:3", "3:2", "3:4", "4:3", "4:5", "5:4", "9:16", "16:9", "21:9"]
 SIZES = ["1K", "2K", "4K"]
 
+# Prompt templates for each edit operation, filled from the CLI / pipeline step fields
+EDIT_PROMPTS = {
+    "edit": "{prompt}",
+    "style": "Transform this image into the artistic style of {style}. Preserve the original composition but render all elements in this new style.",
+    "background": "Keep the main subject exactly the same but change the background to {new_bg}. Ensure lighting and shadows match naturally.",
+    "add": "Add {element} to the {position} of this image. Make it look natural and match the lighting and style of the original.",
+    "remove": "Remove {element} from this image. Fill in the area naturally to match the surroundings. Keep everything else exactly the same.",
+    "recolor": "Change only the color of {target} to {color}. Keep everything else in the image exactly the same, preserving the original style, lighting, and composition."
+}
+
+
+# Fan-out operations and the prompt field each variant fills
+FANOUT_FIELDS = {
+    "style": "style",
+    "background": "new_bg",
+    "recolor": "color"
+}
+
+CONTACT_SHEET_CELL = 320
+
+
+def slugify(text: str, max_words: int = 4) -> str:
+    """Create a slug from text for filenames."""
+    words = re.sub(r'[^\w\s]', '', text.lower()).split()[:max_words]
+    return '_'.join(words) if words else 'variant'
+
+
+def build_prompt(op: str, **params) -> str:
+    """Build the prompt for an edit operation from its parameters."""
+    if op not in EDIT_PROMPTS:
+        raise ValueError(f"Unknown edit operation: {op}. Choose from: {list(EDIT_PROMPTS.keys())}")
+    if op == "add":
+        params.setdefault("position", "center")
+    try:
+        return EDIT_PROMPTS[op].format(**params)
+    except KeyError as e:
+        raise ValueError(f"Missing '{e.args[0]}' for {op} operation")
+
+
+def build_config(
+    model: str,
+    aspect_ratio: str = None,
+    image_size: str = None,
+    thinking: bool = False
+):
+    """Build the request config, or None when everything is default."""
+    config_kwargs = {}
+    image_config_kwargs = {}
+
+    if aspect_ratio:
+        image_config_kwargs["aspect_ratio"] = aspect_ratio
+    if image_size and model == "pro":
+        image_config_kwargs["image_size"] = image_size
+
+    if image_config_kwargs:
+        config_kwargs["image_config"] = types.ImageConfig(**image_config_kwargs)
+
+    # Thinking mode (Pro only)
+    if thinking and model == "pro":
+        config_kwargs["thinking_config"] = types.ThinkingConfig(
+            thinking_budget=1024
+        )
+
+    return types.GenerateContentConfig(**config_kwargs) if config_kwargs else None
+
+
+def save_response_image(response, output_path: str) -> str:
+    """Save the first image in a response. Raises if the response has none."""
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    for part in response.parts or []:
+        if part.inline_data is not None:
+            image = part.as_image()
+            image.save(str(output_path))
+            return str(output_path)
+        elif part.text is not None:
+            print(f"Model response: {part.text}")
+
+    raise RuntimeError("No image generated in response")
+
+
+def load_inputs(
+    paths: list,
+    model: str,
+    image_size: str = None,
+    preprocess: bool = True,
+    upload_cache: UploadCache = None
+) -> list:
+    """
+    Load input images as request parts.
+
+    Inputs are always sent as typed byte parts. With preprocessing enabled,
+    oversized or metadata-bearing images are downscaled, re-encoded and stripped
+    in parallel before upload; everything else is read as raw bytes. With an
+    upload cache, images are sent once through the Files API and referenced
+    by URI afterwards.
+    """
+    if not paths:
+        return []
+
+    if preprocess:
+        # Flash always renders at 1K; Pro defaults to 1K unless a size is requested
+        bound = image_size if (image_size and model == "pro") else "1K"
+        prepared, stats = prepare_images(paths, bound)
+        print_stats(stats)
+    else:
+        # Send the files' bytes as typed parts; nothing is decoded
+        prepared = [read_image(path) for path in paths]
+
+    if upload_cache is None:
+        return to_parts(prepared)
+
+    start = time.perf_counter()
+    hits, uploads = upload_cache.hits, upload_cache.uploads
+    parts = upload_cache.parts(prepared)
+    print(
+        f"Upload cache: {upload_cache.hits - hits} reused, "
+        f"{upload_cache.uploads - uploads} uploaded in {time.perf_counter() - start:.2f}s"
+    )
+    return parts
+
 
 def edit_image(
     input_path: str,
@@ -56,7 +201,9 @@ def edit_image(
     aspect_ratio: str = None,
     image_size: str = None,
     additional_images: list = None,
-    thinking: bool = False
+    thinking: bool = False,
+    preprocess: bool = True,
+    upload_cache=None
 ) -> str:
     """
     Edit an image using Gemini Nano Banana API.
@@ -70,6 +217,8 @@ def edit_image(
         image_size: Resolution for pro model ("1K", "2K", "4K")
         additional_images: List of additional image paths for composition
         thinking: Enable thinking mode (Pro only)
+        preprocess: Downscale, re-encode and strip metadata from inputs before upload
+        upload_cache: UploadCache (or True for a Files API cache) used for additional images
 
     Returns:
         Path to the saved image
@@ -80,56 +229,34 @@ def edit_image(
     client = genai.Client()
     model_name = MODELS.get(model, MODELS["flash"])
 
-    # Load input image(s)
-    source_image = Image.open(input_path)
-    contents = [prompt, source_image]
+    if upload_cache is True:
+        upload_cache = UploadCache(client.files)
 
-    # Add additional images for composition
+    # Load input image(s), including additional images for composition
+    image_paths = [input_path]
     if additional_images:
         max_additional = 13 if model == "pro" else 2  # Pro supports up to 14 total, Flash up to 3
-        for i, img_path in enumerate(additional_images[:max_additional]):
-            contents.append(Image.open(img_path))
-
-    # Build config
-    config_kwargs = {}
-    image_config_kwargs = {}
-
-    if aspect_ratio:
-        image_config_kwargs["aspect_ratio"] = aspect_ratio
-    if image_size and model == "pro":
-        image_config_kwargs["image_size"] = image_size
+        image_paths.extend(additional_images[:max_additional])
 
-    if image_config_kwargs:
-        config_kwargs["image_config"] = types.ImageConfig(**image_config_kwargs)
+    if upload_cache is None:
+        contents = [prompt] + load_inputs(image_paths, model, image_size, preprocess)
+    else:
+        # The source changes every edit; only the reused references go through the cache
+        contents = [prompt] + load_inputs(image_paths[:1], model, image_size, preprocess)
+        contents += load_inputs(image_paths[1:], model, image_size, preprocess, upload_cache)
 
-    # Thinking mode (Pro only)
-    if thinking and model == "pro":
-        config_kwargs["thinking_config"] = types.ThinkingConfig(
-            thinking_budget=1024
-        )
-
-    config = types.GenerateContentConfig(**config_kwargs) if config_kwargs else None
+    config = build_config(model, aspect_ratio, image_size, thinking)
 
     # Generate
+    start = time.perf_counter()
     response = client.models.generate_content(
         model=model_name,
         contents=contents,
         config=config
     )
+    print(f"Request completed in {time.perf_counter() - start:.2f}s")
 
-    # Save result
-    output_path = Path(output_path)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-
-    for part in response.parts:
-        if part.inline_data is not None:
-            image = part.as_image()
-            image.save(str(output_path))
-            return str(output_path)
-        elif part.text is not None:
-            print(f"Model response: {part.text}")
-
-    raise RuntimeError("No image generated in response")
+    return save_response_image(response, output_path)
 
 
 def style_transfer(
@@ -137,11 +264,12 @@ def style_transfer(
     style: str,
     output_path: str,
     model: str = "flash",
-    thinking: bool = False
+    thinking: bool = False,
+    preprocess: bool = True
 ) -> str:
     """Apply artistic style transfer to an image."""
-    prompt = f"Transform this image into the artistic style of {style}. Preserve the original composition but render all elements in this new style."
-    return edit_image(input_path, prompt, output_path, model, thinking=thinking)
+    prompt = build_prompt("style", style=style)
+    return edit_image(input_path, prompt, output_path, model, thinking=thinking, preprocess=preprocess)
 
 
 def change_background(
@@ -149,11 +277,12 @@ def change_background(
     new_background: str,
     output_path: str,
     model: str = "flash",
-    thinking: bool = False
+    thinking: bool = False,
+    preprocess: bool = True
 ) -> str:
     """Replace the background of an image."""
-    prompt = f"Keep the main subject exactly the same but change the background to {new_background}. Ensure lighting and shadows match naturally."
-    return edit_image(input_path, prompt, output_path, model, thinking=thinking)
+    prompt = build_prompt("background", new_bg=new_background)
+    return edit_image(input_path, prompt, output_path, model, thinking=thinking, preprocess=preprocess)
 
 
 def add_element(
@@ -162,11 +291,12 @@ def add_element(
     position: str,
     output_path: str,
     model: str = "flash",
-    thinking: bool = False
+    thinking: bool = False,
+    preprocess: bool = True
 ) -> str:
     """Add an element to an image."""
-    prompt = f"Add {element} to the {position} of this image. Make it look natural and match the lighting and style of the original."
-    return edit_image(input_path, prompt, output_path, model, thinking=thinking)
+    prompt = build_prompt("add", element=element, position=position)
+    return edit_image(input_path, prompt, output_path, model, thinking=thinking, preprocess=preprocess)
 
 
 def remove_element(
@@ -174,11 +304,12 @@ def remove_element(
     element: str,
     output_path: str,
     model: str = "flash",
-    thinking: bool = False
+    thinking: bool = False,
+    preprocess: bool = True
 ) -> str:
     """Remove an element from an image."""
-    prompt = f"Remove {element} from this image. Fill in the area naturally to match the surroundings. Keep everything else exactly the same."
-    return edit_image(input_path, prompt, output_path, model, thinking=thinking)
+    prompt = build_prompt("remove", element=element)
+    return edit_image(input_path, prompt, output_path, model, thinking=thinking, preprocess=preprocess)
 
 
 def recolor(
@@ -187,11 +318,12 @@ def recolor(
     new_color: str,
     output_path: str,
     model: str = "flash",
-    thinking: bool = False
+    thinking: bool = False,
+    preprocess: bool = True
 ) -> str:
     """Change the color of a specific element."""
-    prompt = f"Change only the color of {target} to {new_color}. Keep everything else in the image exactly the same, preserving the original style, lighting, and composition."
-    return edit_image(input_path, prompt, output_path, model, thinking=thinking)
+    prompt = build_prompt("recolor", target=target, color=new_color)
+    return edit_image(input_path, prompt, output_path, model, thinking=thinking, preprocess=preprocess)
 
 
 def combine_images(
@@ -200,49 +332,288 @@ def combine_images(
     output_path: str,
     model: str = "pro",
     aspect_ratio: str = None,
-    thinking: bool = False
+    thinking: bool = False,
+    preprocess: bool = True,
+    upload_cache=None
 ) -> str:
-    """Combine multiple images into a new composition."""
+    """Combine multiple images into a new composition.
+
+    upload_cache: UploadCache (or True for a Files API cache) used for all inputs
+    """
     if not os.environ.get("GEMINI_API_KEY"):
         raise ValueError("GEMINI_API_KEY environment variable not set")
 
     client = genai.Client()
     model_name = MODELS.get(model, MODELS["pro"])
 
+    if upload_cache is True:
+        upload_cache = UploadCache(client.files)
+
     # Load all images
-    contents = [prompt]
     max_images = 14 if model == "pro" else 3
-    for path in image_paths[:max_images]:
-        contents.append(Image.open(path))
-
-    # Build config
-    config_kwargs = {}
-    if aspect_ratio:
-        config_kwargs["image_config"] = types.ImageConfig(aspect_ratio=aspect_ratio)
-
-    if thinking and model == "pro":
-        config_kwargs["thinking_config"] = types.ThinkingConfig(
-            thinking_budget=1024
-        )
+    contents = [prompt] + load_inputs(
+        image_paths[:max_images], model, preprocess=preprocess, upload_cache=upload_cache
+    )
 
-    config = types.GenerateContentConfig(**config_kwargs) if config_kwargs else None
+    config = build_config(model, aspect_ratio, thinking=thinking)
 
+    start = time.perf_counter()
     response = client.models.generate_content(
         model=model_name,
         contents=contents,
         config=config
     )
+    print(f"Request completed in {time.perf_counter() - start:.2f}s")
+
+    return save_response_image(response, output_path)
+
+
+def load_pipeline(spec_path: str) -> dict:
+    """
+    Load a pipeline spec from JSON or YAML.
+
+    The spec is either a list of steps or a dict with "steps" plus optional
+    "model", "aspect", "size" and "thinking" defaults.
+    """
+    text = Path(spec_path).read_text()
+    if Path(spec_path).suffix.lower() in (".yaml", ".yml"):
+        if yaml is None:
+            raise ValueError("YAML pipeline specs need PyYAML. Run: pip install pyyaml")
+        spec = yaml.safe_load(text)
+    else:
+        spec = json.loads(text)
+
+    if isinstance(spec, list):
+        spec = {"steps": spec}
+    if not isinstance(spec, dict) or not spec.get("steps"):
+        raise ValueError("Pipeline spec must contain a non-empty list of steps")
+
+    for i, step in enumerate(spec["steps"], 1):
+        if not isinstance(step, dict) or "op" not in step:
+            raise ValueError(f"Step {i} must be an object with an 'op' field")
+        # Validate every step up front so a typo doesn't fail after paid generations
+        build_prompt(step["op"], **{k: v for k, v in step.items() if k != "op"})
+
+    return spec
+
+
+def run_pipeline(
+    input_path: str,
+    steps: list,
+    output_path: str,
+    model: str = "flash",
+    aspect_ratio: str = None,
+    image_size: str = None,
+    thinking: bool = False,
+    preprocess: bool = True,
+    save_steps: bool = False
+) -> dict:
+    """
+    Run a chain of edit steps in one multi-turn session.
+
+    The source image is uploaded once with the first step; later steps are
+    sent as follow-up messages so the model edits the working image already
+    in its context instead of re-uploading each intermediate output.
+
+    Args:
+        input_path: Path to the source image
+        steps: List of step dicts, each with "op" plus that operation's fields
+        output_path: Where to save the final image
+        model: "flash" or "pro"
+        aspect_ratio: Output aspect ratio (None to match input)
+        image_size: Resolution for pro model ("1K", "2K", "4K")
+        thinking: Enable thinking mode (Pro only)
+        preprocess: Downscale, re-encode and strip metadata from the input before upload
+        save_steps: Also save each intermediate output next to output_path
+
+    Returns:
+        Dict with the final "output" path and per-step "steps" results
+    """
+    if not os.environ.get("GEMINI_API_KEY"):
+        raise ValueError("GEMINI_API_KEY environment variable not set")
+
+    prompts = [
+        build_prompt(step["op"], **{k: v for k, v in step.items() if k != "op"})
+        for step in steps
+    ]
+
+    client = genai.Client()
+    chat = client.chats.create(
+        model=MODELS.get(model, MODELS["flash"]),
+        config=build_config(model, aspect_ratio, image_size, thinking)
+    )
+
+    output_path = Path(output_path)
+    source = load_inputs([input_path], model, image_size, preprocess)
+    results = []
+    total_start = time.perf_counter()
+
+    for i, (step, prompt) in enumerate(zip(steps, prompts), 1):
+        message = [prompt] + source if i == 1 else prompt
+
+        start = time.perf_counter()
+        response = chat.send_message(message)
+        elapsed = time.perf_counter() - start
+
+        if i == len(steps):
+            step_path = output_path
+        elif save_steps:
+            step_path = output_path.with_name(
+                f"{output_path.stem}.step{i}_{step['op']}{output_path.suffix or '.png'}"
+            )
+        else:
+            step_path = None
+
+        if step_path is not None:
+            saved = save_response_image(response, step_path)
+        elif any(part.inline_data is not None for part in response.parts or []):
+            saved = None
+        else:
+            raise RuntimeError(f"Step {i} ({step['op']}) produced no image")
+
+        results.append({"step": i, "op": step["op"], "seconds": elapsed, "path": saved})
+        print(f"  [{i}/{len(steps)}] {step['op']}: {elapsed:.2f}s" + (f" -> {saved}" if saved else ""))
+
+    print(f"Pipeline completed in {time.perf_counter() - total_start:.2f}s")
+    return {"output": str(output_path), "steps": results}
+
+
+def make_contact_sheet(entries: list, output_path: str, columns: int = 4) -> str:
+    """
+    Tile images into a labelled grid.
+
+    Args:
+        entries: List of (label, image_path) tuples
+        output_path: Where to save the sheet
+        columns: Maximum images per row
+
+    Returns:
+        Path to the saved contact sheet
+    """
+    cell = CONTACT_SHEET_CELL
+    label_height = 24
+    columns = min(columns, len(entries))
+    rows = (len(entries) + columns - 1) // columns
+
+    sheet = Image.new("RGB", (columns * cell, rows * (cell + label_height)), "white")
+    draw = ImageDraw.Draw(sheet)
+
+    for i, (label, path) in enumerate(entries):
+        x = (i % columns) * cell
+        y = (i // columns) * (cell + label_height)
+        with Image.open(path) as image:
+            thumb = ImageOps.contain(image.convert("RGB"), (cell - 8, cell - 8))
+        sheet.paste(thumb, (x + (cell - thumb.width) // 2, y + (cell - thumb.height) // 2))
+        draw.text((x + 6, y + cell + 4), label[:48], fill="black")
 
     output_path = Path(output_path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
+    sheet.save(str(output_path))
+    return str(output_path)
 
-    for part in response.parts:
-        if part.inline_data is not None:
-            image = part.as_image()
-            image.save(str(output_path))
-            return str(output_path)
 
-    raise RuntimeError("No image generated in response")
+def fan_out(
+    input_path: str,
+    op: str,
+    variants: list,
+    output_dir: str,
+    model: str = "flash",
+    target: str = None,
+    thinking: bool = False,
+    preprocess: bool = True,
+    upload_cache=None,
+    max_workers: int = 4,
+    contact_sheet: bool = True
+) -> list:
+    """
+    Render many variants of one edit against the same input concurrently.
+
+    The input is prepared (and optionally uploaded) once and the resulting
+    part is shared by every request, so N variants cost one upload and
+    roughly one round trip of wall time.
+
+    Args:
+        input_path: Path to the source image
+        op: "style", "background" or "recolor"
+        variants: Style, background or color values, one output per value
+        output_dir: Directory for outputs, named {input_stem}_{NN}_{variant}.png
+            where NN is the variant's position, so similar variants never collide
+        model: "flash" or "pro"
+        target: Element to recolor (recolor only)
+        thinking: Enable thinking mode (Pro only)
+        preprocess: Downscale, re-encode and strip metadata from the input before upload
+        upload_cache: UploadCache (or True for a Files API cache) for the input
+        max_workers: Concurrent requests
+        contact_sheet: Also write contact_sheet.png with the input and all variants
+
+    Returns:
+        List of result dicts ({"index", "variant", "status", "path"/"error", "seconds"}) in variant order
+    """
+    if op not in FANOUT_FIELDS:
+        raise ValueError(f"Unsupported fan-out operation: {op}. Choose from: {list(FANOUT_FIELDS.keys())}")
+    if op == "recolor" and not target:
+        raise ValueError("Recolor fan-out needs a target element")
+    if not os.environ.get("GEMINI_API_KEY"):
+        raise ValueError("GEMINI_API_KEY environment variable not set")
+
+    client = genai.Client()
+    model_name = MODELS.get(model, MODELS["flash"])
+    config = build_config(model, thinking=thinking)
+
+    if upload_cache is True:
+        upload_cache = UploadCache(client.files)
+
+    # Prepare and upload the input once for every variant
+    source = load_inputs([input_path], model, preprocess=preprocess, upload_cache=upload_cache)
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stem = Path(input_path).stem
+
+    def render(index: int, variant: str) -> dict:
+        params = {FANOUT_FIELDS[op]: variant}
+        if op == "recolor":
+            params["target"] = target
+        start = time.perf_counter()
+        try:
+            response = client.models.generate_content(
+                model=model_name,
+                contents=[build_prompt(op, **params)] + source,
+                config=config
+            )
+            path = save_response_image(response, output_dir / f"{stem}_{index:02d}_{slugify(variant)}.png")
+            return {"index": index, "variant": variant, "status": "success", "path": path,
+                    "seconds": time.perf_counter() - start}
+        except Exception as e:
+            return {"index": index, "variant": variant, "status": "error", "error": str(e),
+                    "seconds": time.perf_counter() - start}
+
+    print(f"Rendering {len(variants)} {op} variant(s) with {model_name}...")
+    start = time.perf_counter()
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(render, index, variant) for index, variant in enumerate(variants, 1)]
+        for future in as_completed(futures):
+            result = future.result()
+            results[result["index"]] = result
+            if result["status"] == "success":
+                print(f"  {result['variant']}: {result['path']} ({result['seconds']:.2f}s)")
+            else:
+                print(f"  {result['variant']}: ERROR - {result['error']}")
+
+    ordered = [results[index] for index in sorted(results)]
+    succeeded = [r for r in ordered if r["status"] == "success"]
+    print(f"Rendered {len(succeeded)}/{len(variants)} variant(s) in {time.perf_counter() - start:.2f}s")
+
+    if contact_sheet and succeeded:
+        sheet = make_contact_sheet(
+            [("original", input_path)] + [(r["variant"], r["path"]) for r in succeeded],
+            output_dir / "contact_sheet.png"
+        )
+        print(f"Contact sheet: {sheet}")
+
+    return ordered
 
 
 def main():
@@ -255,6 +626,8 @@ Examples:
   python edit.py background -i portrait.jpg --new-bg "sunset beach" -o portrait_sunset.jpg
   python edit.py style -i photo.jpg --style "Van Gogh" -o artistic.png --model pro
   python edit.py combine --images face.png body.png -p "Merge seamlessly" -o merged.png
+  python edit.py pipeline -i car.png -c steps.json -o car_final.png --save-steps
+  python edit.py fanout -i product.jpg --styles "watercolor" "pop art" -o ./looks
         """
     )
 
@@ -269,6 +642,8 @@ Examples:
                               help="Model: flash (fast, up to 3 images) or pro (quality, up to 14 images, 4K)")
         subparser.add_argument("--thinking", action="store_true",
                               help="Enable thinking mode (Pro only)")
+        subparser.add_argument("--no-preprocess", dest="preprocess", action="store_false",
+                              help="Upload inputs as-is (skip downscale, re-encode and metadata strip)")
 
     # Generic edit
     edit_parser = subparsers.add_parser("edit", help="Generic image editing")
@@ -277,6 +652,8 @@ Examples:
     edit_parser.add_argument("--aspect", "-a", choices=ASPECT_RATIOS, help="Output aspect ratio")
     edit_parser.add_argument("--size", "-s", choices=SIZES, help="Image size (Pro only)")
     edit_parser.add_argument("--additional", nargs="+", help="Additional reference images")
+    edit_parser.add_argument("--upload-cache", action="store_true",
+                            help="Upload additional images once via the Files API and reuse them")
 
     # Style transfer
     style_parser = subparsers.add_parser("style", help="Apply artistic style")
@@ -316,6 +693,47 @@ Examples:
                                help="Model (default: pro for combining)")
     combine_parser.add_argument("--aspect", "-a", choices=ASPECT_RATIOS, help="Output aspect ratio")
     combine_parser.add_argument("--thinking", action="store_true", help="Enable thinking mode (Pro only)")
+    combine_parser.add_argument("--no-preprocess", dest="preprocess", action="store_false",
+                               help="Upload inputs as-is (skip downscale, re-encode and metadata strip)")
+    combine_parser.add_argument("--upload-cache", action="store_true",
+                               help="Upload images once via the Files API and reuse them")
+
+    # Multi-step pipeline
+    pipeline_parser = subparsers.add_parser("pipeline", help="Run a multi-step edit pipeline in one session")
+    pipeline_parser.add_argument("--input", "-i", required=True, help="Input image path")
+    pipeline_parser.add_argument("--config", "-c", required=True, help="Pipeline spec (JSON or YAML)")
+    pipeline_parser.add_argument("--output", "-o", required=True, help="Final output image path")
+    pipeline_parser.add_argument("--model", "-m", choices=["flash", "pro"],
+                                help="Model (overrides spec; default: flash)")
+    pipeline_parser.add_argument("--aspect", "-a", choices=ASPECT_RATIOS, help="Output aspect ratio (overrides spec)")
+    pipeline_parser.add_argument("--size", "-s", choices=SIZES, help="Image size, Pro only (overrides spec)")
+    pipeline_parser.add_argument("--thinking", action="store_true", default=None,
+                                help="Enable thinking mode (Pro only)")
+    pipeline_parser.add_argument("--save-steps", action="store_true",
+                                help="Also save each intermediate output")
+    pipeline_parser.add_argument("--no-preprocess", dest="preprocess", action="store_false",
+                                help="Upload input as-is (skip downscale, re-encode and metadata strip)")
+
+    # Variant fan-out
+    fanout_parser = subparsers.add_parser("fanout", help="Render many style/background/color variants concurrently")
+    fanout_parser.add_argument("--input", "-i", required=True, help="Input image path")
+    variant_group = fanout_parser.add_mutually_exclusive_group(required=True)
+    variant_group.add_argument("--styles", nargs="+", help="Styles to apply, one output each")
+    variant_group.add_argument("--backgrounds", nargs="+", help="Backgrounds to try, one output each")
+    variant_group.add_argument("--colors", nargs="+", help="Colors to try on --target, one output each")
+    fanout_parser.add_argument("--target", help="Element to recolor (with --colors)")
+    fanout_parser.add_argument("--output-dir", "-o", required=True, help="Directory for variant outputs")
+    fanout_parser.add_argument("--model", "-m", choices=["flash", "pro"], default="flash",
+                              help="Model: flash (fast) or pro (quality)")
+    fanout_parser.add_argument("--thinking", action="store_true", help="Enable thinking mode (Pro only)")
+    fanout_parser.add_argument("--workers", "-w", type=int, default=4,
+                              help="Concurrent requests (default: 4)")
+    fanout_parser.add_argument("--no-contact-sheet", dest="contact_sheet", action="store_false",
+                              help="Skip writing contact_sheet.png")
+    fanout_parser.add_argument("--no-preprocess", dest="preprocess", action="store_false",
+                              help="Upload input as-is (skip downscale, re-encode and metadata strip)")
+    fanout_parser.add_argument("--upload-cache", action="store_true",
+                              help="Upload the input via the Files API and reuse it across runs")
 
     args = parser.parse_args()
 
@@ -327,20 +745,54 @@ Examples:
         if args.command == "edit":
             result = edit_image(
                 args.input, args.prompt, args.output,
-                args.model, args.aspect, args.size, args.additional, args.thinking
+                args.model, args.aspect, args.size, args.additional, args.thinking,
+                args.preprocess, args.upload_cache or None
             )
         elif args.command == "style":
-            result = style_transfer(args.input, args.style, args.output, args.model, args.thinking)
+            result = style_transfer(args.input, args.style, args.output, args.model, args.thinking, args.preprocess)
         elif args.command == "background":
-            result = change_background(args.input, args.new_bg, args.output, args.model, args.thinking)
+            result = change_background(args.input, args.new_bg, args.output, args.model, args.thinking, args.preprocess)
         elif args.command == "add":
-            result = add_element(args.input, args.element, args.position, args.output, args.model, args.thinking)
+            result = add_element(args.input, args.element, args.position, args.output, args.model, args.thinking, args.preprocess)
         elif args.command == "remove":
-            result = remove_element(args.input, args.element, args.output, args.model, args.thinking)
+            result = remove_element(args.input, args.element, args.output, args.model, args.thinking, args.preprocess)
         elif args.command == "recolor":
-            result = recolor(args.input, args.target, args.color, args.output, args.model, args.thinking)
+            result = recolor(args.input, args.target, args.color, args.output, args.model, args.thinking, args.preprocess)
         elif args.command == "combine":
-            result = combine_images(args.images, args.prompt, args.output, args.model, args.aspect, args.thinking)
+            result = combine_images(
+                args.images, args.prompt, args.output, args.model, args.aspect, args.thinking,
+                args.preprocess, args.upload_cache or None
+            )
+        elif args.command == "pipeline":
+            spec = load_pipeline(args.config)
+            result = run_pipeline(
+                args.input, spec["steps"], args.output,
+                model=args.model or spec.get("model", "flash"),
+                aspect_ratio=args.aspect or spec.get("aspect"),
+                image_size=args.size or spec.get("size"),
+                thinking=args.thinking if args.thinking is not None else spec.get("thinking", False),
+                preprocess=args.preprocess,
+                save_steps=args.save_steps
+            )["output"]
+
+        elif args.command == "fanout":
+            if args.colors and not args.target:
+                parser.error("--colors requires --target")
+            if args.styles:
+                op, variants = "style", args.styles
+            elif args.backgrounds:
+                op, variants = "background", args.backgrounds
+            else:
+                op, variants = "recolor", args.colors
+            results = fan_out(
+                args.input, op, variants, args.output_dir,
+                model=args.model, target=args.target, thinking=args.thinking,
+                preprocess=args.preprocess, upload_cache=args.upload_cache or None,
+                max_workers=args.workers, contact_sheet=args.contact_sheet
+            )
+            if not any(r["status"] == "success" for r in results):
+                raise RuntimeError("No variants generated")
+            return
 
         print(f"Image saved to: {result}")
 
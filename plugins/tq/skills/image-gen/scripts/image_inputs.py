@@ -0,0 +1,531 @@
+#!/usr/bin/env python3
+"""
+Input Image Preparation
+
+Shared helpers for turning local image files into request parts for the
+Nano Banana API. Inputs are downscaled to the target resolution bound,
+re-encoded, stripped of metadata and cached by content hash so repeated
+edits of the same source skip the work entirely. Files that are already
+within bounds, metadata-free and in a supported format are sent as raw
+bytes without ever being decoded. Reused reference images (logos, products,
+style references) can also be uploaded once through the Files API and
+referenced by URI on later requests.
+
+Used by edit.py; not intended to be run directly.
+"""
+
+import hashlib
+import io
+import json
+import mmap
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+try:
+    from google.genai import types
+    from PIL import Image, ImageOps
+except ImportError:
+    print("Error: Required packages not installed.")
+    print("Run: pip install google-genai Pillow")
+    sys.exit(1)
+
+
+# Longest-edge bound (pixels) for each output size. The model never works
+# above these, so larger inputs only cost upload bandwidth.
+SIZE_BOUNDS = {
+    "1K": 1024,
+    "2K": 2048,
+    "4K": 4096
+}
+
+JPEG_QUALITY = 90
+
+# Bump when the encoding settings change so stale cache entries are ignored
+PREPROCESS_VERSION = 1
+
+DEFAULT_CACHE_DIR = Path(
+    os.environ.get("IMAGE_GEN_CACHE_DIR", "~/.cache/image-gen")
+).expanduser()
+
+# Files API uploads expire after 48 hours. Entries closer than this margin to
+# expiry are re-uploaded so a URI never lapses mid-request.
+FILE_TTL_SECONDS = 48 * 3600
+EXPIRY_MARGIN_SECONDS = 10 * 60
+
+# Formats the API accepts directly, keyed by magic-number sniffing
+SUPPORTED_MIME_TYPES = {"image/png", "image/jpeg", "image/webp", "image/heic", "image/heif"}
+
+# PNG ancillary chunks carrying metadata that should not leave the machine
+PNG_METADATA_CHUNKS = {b"eXIf", b"tEXt", b"iTXt", b"zTXt", b"tIME"}
+
+# JPEG APPn segments carrying EXIF/XMP (APP1) and IPTC (APP13)
+JPEG_METADATA_MARKERS = {0xE1, 0xED}
+
+# JPEG start-of-frame markers (excluding DHT, JPG and DAC)
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def format_bytes(size: int) -> str:
+    """Format a byte count for display."""
+    for unit in ("B", "KB", "MB"):
+        if abs(size) < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+def sniff_mime(header: bytes) -> str:
+    """Detect an image MIME type from its leading bytes. Returns None if unknown."""
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if header.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    if header[4:8] == b"ftyp":
+        brand = header[8:12]
+        if brand in (b"heic", b"heix", b"hevc", b"hevx"):
+            return "image/heic"
+        if brand in (b"mif1", b"msf1", b"heif"):
+            return "image/heif"
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    return None
+
+
+def _probe_png(buf) -> tuple:
+    width = int.from_bytes(buf[16:20], "big")
+    height = int.from_bytes(buf[20:24], "big")
+    has_metadata = False
+    pos = 8
+    while pos + 8 <= len(buf):
+        length = int.from_bytes(buf[pos:pos + 4], "big")
+        chunk = bytes(buf[pos + 4:pos + 8])
+        if chunk in PNG_METADATA_CHUNKS:
+            has_metadata = True
+        if chunk == b"IEND":
+            break
+        pos += length + 12
+    return width, height, has_metadata
+
+
+def _probe_jpeg(buf) -> tuple:
+    width = height = None
+    has_metadata = False
+    pos = 2
+    while pos + 4 <= len(buf):
+        if buf[pos] != 0xFF:
+            break
+        marker = buf[pos + 1]
+        if marker == 0xFF:  # Fill byte
+            pos += 1
+            continue
+        if marker == 0xD8 or 0xD0 <= marker <= 0xD7:  # SOI/RST carry no length
+            pos += 2
+            continue
+        if marker in (0xD9, 0xDA):  # EOI / start of scan: headers are done
+            break
+        length = int.from_bytes(buf[pos + 2:pos + 4], "big")
+        if marker in JPEG_METADATA_MARKERS:
+            has_metadata = True
+        elif marker in JPEG_SOF_MARKERS:
+            height = int.from_bytes(buf[pos + 5:pos + 7], "big")
+            width = int.from_bytes(buf[pos + 7:pos + 9], "big")
+        pos += 2 + length
+    return width, height, has_metadata
+
+
+def _probe_webp(buf) -> tuple:
+    chunk = bytes(buf[12:16])
+    if chunk == b"VP8X":
+        flags = buf[20]
+        width = int.from_bytes(buf[24:27], "little") + 1
+        height = int.from_bytes(buf[27:30], "little") + 1
+        return width, height, bool(flags & 0x0C)  # EXIF or XMP present
+    if chunk == b"VP8 ":
+        width = int.from_bytes(buf[26:28], "little") & 0x3FFF
+        height = int.from_bytes(buf[28:30], "little") & 0x3FFF
+        return width, height, False
+    if chunk == b"VP8L":
+        bits = int.from_bytes(buf[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1, False
+    return None, None, False
+
+
+def probe_image(path: str) -> dict:
+    """
+    Read format, dimensions and metadata presence from an image file's headers.
+
+    The file is memory-mapped so only the header pages are touched; no pixel
+    data is decoded. Width/height are None when they cannot be determined.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return {"mime_type": None, "width": None, "height": None,
+                    "has_metadata": False, "bytes": 0}
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            mime_type = sniff_mime(buf[:16])
+            probe = {
+                "image/png": _probe_png,
+                "image/jpeg": _probe_jpeg,
+                "image/webp": _probe_webp
+            }.get(mime_type)
+            width, height, has_metadata = probe(buf) if probe else (None, None, False)
+
+    return {
+        "mime_type": mime_type,
+        "width": width,
+        "height": height,
+        "has_metadata": has_metadata,
+        "bytes": size
+    }
+
+
+def read_image(path: str) -> dict:
+    """
+    Read an image file as raw bytes with its sniffed MIME type, without decoding.
+
+    Formats the API doesn't accept directly (GIF, BMP, TIFF, ...) are decoded
+    and re-encoded as PNG at their original size instead.
+
+    Returns:
+        Dict in the same shape as preprocess_image()
+
+    Raises:
+        ValueError: PIL can't read the file either
+    """
+    probe = probe_image(path)
+    data = Path(path).read_bytes()
+    if probe["mime_type"] not in SUPPORTED_MIME_TYPES:
+        try:
+            converted = _to_png(data)
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            raise ValueError(f"Unsupported image format: {path}") from e
+        return {
+            "path": str(path),
+            "data": converted,
+            "mime_type": "image/png",
+            "original_bytes": len(data),
+            "bytes": len(converted),
+            "cached": False,
+            "passthrough": False
+        }
+
+    return {
+        "path": str(path),
+        "data": data,
+        "mime_type": probe["mime_type"],
+        "original_bytes": len(data),
+        "bytes": len(data),
+        "cached": False,
+        "passthrough": True
+    }
+
+
+def _to_png(data: bytes) -> bytes:
+    """Losslessly re-encode an image (first frame of animations) as PNG, keeping its size."""
+    with Image.open(io.BytesIO(data)) as image:
+        has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+        out = io.BytesIO()
+        image.convert("RGBA" if has_alpha else "RGB").save(out, "PNG")
+        return out.getvalue()
+
+
+def needs_transform(probe: dict, bound: int) -> bool:
+    """Whether an image must be decoded to meet the size bound, format or privacy rules."""
+    if probe["mime_type"] not in ("image/png", "image/jpeg", "image/webp"):
+        return True
+    if probe["width"] is None or probe["height"] is None:
+        return True
+    return probe["has_metadata"] or max(probe["width"], probe["height"]) > bound
+
+
+def _encode(data: bytes, bound: int) -> tuple[bytes, str]:
+    """Downscale, strip metadata and re-encode an image. Returns (bytes, mime_type)."""
+    with Image.open(io.BytesIO(data)) as source:
+        source_format = source.format
+        # Bake EXIF orientation into the pixels before the metadata is dropped
+        image = ImageOps.exif_transpose(source)
+
+        resized = max(image.size) > bound
+        if resized:
+            image.thumbnail((bound, bound), Image.LANCZOS)
+
+        has_alpha = image.mode in ("RGBA", "LA") or (
+            image.mode == "P" and "transparency" in image.info
+        )
+
+        out = io.BytesIO()
+        # Alpha and untouched lossless sources stay PNG; everything else is JPEG.
+        # No exif/icc/info is passed to save(), so all metadata is dropped.
+        if has_alpha or (source_format == "PNG" and not resized):
+            image.convert("RGBA" if has_alpha else "RGB").save(out, "PNG", optimize=True)
+            return out.getvalue(), "image/png"
+
+        image.convert("RGB").save(out, "JPEG", quality=JPEG_QUALITY, optimize=True)
+        return out.getvalue(), "image/jpeg"
+
+
+def preprocess_image(
+    path: str,
+    image_size: str = "1K",
+    cache_dir: Path = DEFAULT_CACHE_DIR
+) -> dict:
+    """
+    Prepare a single input image for upload.
+
+    Images that are already within the bound, metadata-free and in a supported
+    format are passed through as raw bytes; PIL is only used when a transform
+    is actually needed.
+
+    Args:
+        path: Path to the source image
+        image_size: Target resolution ("1K", "2K", "4K") used as the longest-edge bound
+        cache_dir: Directory for processed images, keyed by content hash
+
+    Returns:
+        Dict with path, data, mime_type, original_bytes, bytes, cached and passthrough flags
+    """
+    bound = SIZE_BOUNDS.get(image_size, SIZE_BOUNDS["1K"])
+    if not needs_transform(probe_image(path), bound):
+        return read_image(path)
+
+    data = Path(path).read_bytes()
+
+    digest = hashlib.sha256(data)
+    digest.update(f"|{bound}|{JPEG_QUALITY}|{PREPROCESS_VERSION}".encode())
+    key = digest.hexdigest()
+
+    cache_path = Path(cache_dir) / "inputs"
+    for ext, mime_type in ((".jpg", "image/jpeg"), (".png", "image/png")):
+        cached = cache_path / f"{key}{ext}"
+        if cached.exists():
+            processed = cached.read_bytes()
+            return {
+                "path": str(path),
+                "data": processed,
+                "mime_type": mime_type,
+                "original_bytes": len(data),
+                "bytes": len(processed),
+                "cached": True,
+                "passthrough": False
+            }
+
+    processed, mime_type = _encode(data, bound)
+
+    ext = ".png" if mime_type == "image/png" else ".jpg"
+    try:
+        cache_path.mkdir(parents=True, exist_ok=True)
+        tmp = cache_path / f"{key}{ext}.{os.getpid()}.tmp"
+        tmp.write_bytes(processed)
+        tmp.replace(cache_path / f"{key}{ext}")
+    except OSError:
+        pass  # Cache is best-effort
+
+    return {
+        "path": str(path),
+        "data": processed,
+        "mime_type": mime_type,
+        "original_bytes": len(data),
+        "bytes": len(processed),
+        "cached": False,
+        "passthrough": False
+    }
+
+
+def prepare_images(
+    paths: list,
+    image_size: str = "1K",
+    max_workers: int = 4,
+    cache_dir: Path = DEFAULT_CACHE_DIR
+) -> tuple[list, dict]:
+    """
+    Preprocess several input images in parallel.
+
+    Returns:
+        (prepared, stats) where prepared is a list of preprocess_image() dicts in
+        input order and stats summarises bytes saved and preparation time
+    """
+    start = time.perf_counter()
+
+    if len(paths) == 1:
+        prepared = [preprocess_image(paths[0], image_size, cache_dir)]
+    else:
+        # PIL releases the GIL while decoding, resizing and encoding
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            prepared = list(executor.map(
+                lambda p: preprocess_image(p, image_size, cache_dir), paths
+            ))
+
+    original = sum(p["original_bytes"] for p in prepared)
+    processed = sum(p["bytes"] for p in prepared)
+    stats = {
+        "count": len(prepared),
+        "cached": sum(1 for p in prepared if p["cached"]),
+        "passthrough": sum(1 for p in prepared if p["passthrough"]),
+        "original_bytes": original,
+        "bytes": processed,
+        "bytes_saved": original - processed,
+        "prepare_seconds": time.perf_counter() - start
+    }
+    return prepared, stats
+
+
+def to_parts(prepared: list) -> list:
+    """Convert prepared image dicts into request parts."""
+    return [
+        types.Part.from_bytes(data=p["data"], mime_type=p["mime_type"])
+        for p in prepared
+    ]
+
+
+def print_stats(stats: dict):
+    """Print a one-line summary of input preparation."""
+    print(
+        f"Inputs: {stats['count']} image(s), "
+        f"{format_bytes(stats['original_bytes'])} -> {format_bytes(stats['bytes'])} "
+        f"({format_bytes(stats['bytes_saved'])} saved, {stats['cached']} cached, "
+        f"{stats['passthrough']} passed through, "
+        f"prepared in {stats['prepare_seconds']:.2f}s)"
+    )
+
+
+class UploadCache:
+    """
+    Files API upload cache for reused reference images.
+
+    Each distinct image is uploaded once, keyed by the SHA-256 of its bytes.
+    The returned URI and expiry are recorded in a JSON index so later requests
+    (and later runs) reference the URI instead of re-sending the bytes.
+    Expired entries are re-uploaded transparently.
+
+    `files` is anything with the `client.files.upload(file=..., config=...)`
+    interface, e.g. `genai.Client().files` or a `LocalFiles` stand-in.
+    """
+
+    def __init__(self, files, index_path: Path = DEFAULT_CACHE_DIR / "uploads.json"):
+        self.files = files
+        self.index_path = Path(index_path)
+        self.entries = self._load()
+        self.hits = 0
+        self.uploads = 0
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        try:
+            return json.loads(self.index_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self.entries, indent=2, sort_keys=True))
+        tmp.replace(self.index_path)
+
+    def _is_fresh(self, entry: dict) -> bool:
+        return entry["expires"] - EXPIRY_MARGIN_SECONDS > time.time()
+
+    def _upload(self, key: str, data: bytes, mime_type: str) -> dict:
+        uploaded = self.files.upload(
+            file=io.BytesIO(data),
+            config=types.UploadFileConfig(
+                mime_type=mime_type,
+                display_name=f"image-gen-{key[:16]}"
+            )
+        )
+        if uploaded.expiration_time is not None:
+            expires = uploaded.expiration_time.timestamp()
+        else:
+            expires = time.time() + FILE_TTL_SECONDS
+
+        return {
+            "name": uploaded.name,
+            "uri": uploaded.uri,
+            "mime_type": uploaded.mime_type or mime_type,
+            "bytes": len(data),
+            "expires": expires
+        }
+
+    def part_for(self, data: bytes, mime_type: str):
+        """Return a URI part for the image bytes, uploading them if needed."""
+        key = hashlib.sha256(data).hexdigest()
+
+        with self._lock:
+            entry = self.entries.get(key)
+        if entry is not None and self._is_fresh(entry):
+            with self._lock:
+                self.hits += 1
+        else:
+            entry = self._upload(key, data, mime_type)
+            with self._lock:
+                self.entries[key] = entry
+                self.uploads += 1
+                self._save()
+
+        return types.Part.from_uri(file_uri=entry["uri"], mime_type=entry["mime_type"])
+
+    def parts(self, prepared: list, max_workers: int = 4) -> list:
+        """Convert prepared image dicts into URI parts, uploading misses in parallel."""
+        # Collapse duplicates first so the same bytes are never uploaded twice concurrently
+        keys = [hashlib.sha256(p["data"]).hexdigest() for p in prepared]
+        unique = dict(zip(keys, prepared))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            resolved = dict(zip(unique, executor.map(
+                lambda p: self.part_for(p["data"], p["mime_type"]), unique.values()
+            )))
+        return [resolved[key] for key in keys]
+
+    def prune(self) -> int:
+        """Drop expired entries from the index. Returns the number removed."""
+        with self._lock:
+            expired = [k for k, e in self.entries.items() if not self._is_fresh(e)]
+            for key in expired:
+                del self.entries[key]
+            if expired:
+                self._save()
+        return len(expired)
+
+
+class LocalFiles:
+    """
+    Local stand-in for `client.files`.
+
+    Stores uploads under a directory and returns `file://` URIs with an expiry,
+    so UploadCache can be exercised offline and in tests.
+    """
+
+    def __init__(self, root: str, ttl_seconds: int = FILE_TTL_SECONDS):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.upload_count = 0
+
+    def upload(self, *, file, config=None):
+        if isinstance(config, dict):
+            mime_type = config.get("mime_type")
+        else:
+            mime_type = getattr(config, "mime_type", None)
+
+        data = Path(file).read_bytes() if isinstance(file, (str, os.PathLike)) else file.read()
+        name = f"files/{uuid.uuid4().hex}"
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        self.upload_count += 1
+
+        return types.File(
+            name=name,
+            uri=path.resolve().as_uri(),
+            mime_type=mime_type,
+            size_bytes=len(data),
+            expiration_time=datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+        )
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Chat Session Store
+
+Durable storage for ImageChat sessions. Generated image bytes go into a
+content-addressed object store (deduplicated by SHA-256); each session is a
+small meta.json plus an append-only turns.jsonl, so saving a turn writes only
+that turn. Restoring rebuilds the chat context from disk without any API calls.
+
+Layout:
+    <root>/objects/ab/abcdef...        Image bytes, named by SHA-256
+    <root>/sessions/<id>/meta.json     Settings, title, timestamps, turn count
+    <root>/sessions/<id>/turns.jsonl   One JSON record per turn
+
+Used by chat.py; not intended to be run directly.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import sys
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+try:
+    from google.genai import types
+except ImportError:
+    print("Error: google-genai not installed. Run: pip install google-genai Pillow")
+    sys.exit(1)
+
+
+DEFAULT_SESSION_DIR = Path(
+    os.environ.get("IMAGE_GEN_SESSION_DIR", "~/.image-gen/sessions")
+).expanduser()
+
+
+def _write_atomic(path: Path, data: bytes):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+
+
+class SessionStore:
+    """Content-addressed image store plus per-session turn logs."""
+
+    def __init__(self, root: str = DEFAULT_SESSION_DIR):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.sessions_dir = self.root / "sessions"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.sessions_dir.mkdir(parents=True, exist_ok=True)
+
+    # Objects
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest
+
+    def put_object(self, data: bytes) -> str:
+        """Store bytes once, returning their SHA-256. Existing objects are not rewritten."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _write_atomic(path, data)
+        return digest
+
+    def get_object(self, digest: str) -> bytes:
+        return self._object_path(digest).read_bytes()
+
+    # Serialization
+
+    def _dump_part(self, part) -> dict:
+        record = {}
+        if part.inline_data is not None and part.inline_data.data:
+            record["object"] = self.put_object(part.inline_data.data)
+            record["mime_type"] = part.inline_data.mime_type
+        elif part.text is not None:
+            record["text"] = part.text
+        else:
+            return None
+        if part.thought:
+            record["thought"] = True
+        if part.thought_signature:
+            record["thought_signature"] = base64.b64encode(part.thought_signature).decode()
+        return record
+
+    def _load_part(self, record: dict):
+        kwargs = {}
+        if "object" in record:
+            kwargs["inline_data"] = types.Blob(
+                data=self.get_object(record["object"]),
+                mime_type=record["mime_type"]
+            )
+        else:
+            kwargs["text"] = record["text"]
+        if record.get("thought"):
+            kwargs["thought"] = True
+        if record.get("thought_signature"):
+            kwargs["thought_signature"] = base64.b64decode(record["thought_signature"])
+        return types.Part(**kwargs)
+
+    def dump_contents(self, contents: list) -> list:
+        """Convert Content objects to JSON-safe records, storing image bytes as objects."""
+        records = []
+        for content in contents:
+            parts = [self._dump_part(part) for part in content.parts or []]
+            records.append({"role": content.role, "parts": [p for p in parts if p is not None]})
+        return records
+
+    def load_contents(self, records: list) -> list:
+        """Rebuild Content objects from records written by dump_contents()."""
+        return [
+            types.Content(role=r["role"], parts=[self._load_part(p) for p in r["parts"]])
+            for r in records
+        ]
+
+    # Sessions
+
+    def _session_dir(self, session_id: str) -> Path:
+        return self.sessions_dir / session_id
+
+    def exists(self, session_id: str) -> bool:
+        """Whether a session with exactly this id is saved."""
+        return (
+            bool(session_id) and session_id not in (".", "..") and "/" not in session_id
+            and (self._session_dir(session_id) / "meta.json").is_file()
+        )
+
+    def create_session(self, settings: dict) -> str:
+        """Create an empty session and return its id."""
+        session_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self._session_dir(session_id).mkdir(parents=True)
+        now = datetime.now().isoformat(timespec="seconds")
+        self._write_meta(session_id, {
+            "id": session_id,
+            "title": None,
+            "created": now,
+            "updated": now,
+            "turns": 0,
+            "settings": settings
+        })
+        return session_id
+
+    def fork_session(self, source_id: str, settings: dict) -> str:
+        """
+        Create a new session that starts with a copy of another session's turns.
+
+        Turn records reference image objects by hash, so forking copies only
+        the small turn log. With source_id None an empty session is created.
+        """
+        session_id = self.create_session(settings)
+        if source_id is None:
+            return session_id
+
+        source = self.read_meta(source_id)
+        turns_path = self._session_dir(source_id) / "turns.jsonl"
+        if turns_path.exists():
+            _write_atomic(
+                self._session_dir(session_id) / "turns.jsonl",
+                turns_path.read_bytes()
+            )
+        meta = self.read_meta(session_id)
+        meta.update(title=source["title"], turns=source["turns"], forked_from=source_id)
+        self._write_meta(session_id, meta)
+        return session_id
+
+    def _write_meta(self, session_id: str, meta: dict):
+        _write_atomic(
+            self._session_dir(session_id) / "meta.json",
+            json.dumps(meta, indent=2).encode()
+        )
+
+    def save_settings(self, session_id: str, settings: dict):
+        """Record settings changed since the last turn, so a restore picks them up."""
+        meta = self.read_meta(session_id)
+        if meta["settings"] != settings:
+            meta["settings"] = settings
+            self._write_meta(session_id, meta)
+
+    def read_meta(self, session_id: str) -> dict:
+        return json.loads((self._session_dir(session_id) / "meta.json").read_text())
+
+    def append_turn(
+        self, session_id: str, contents: list, history: list, settings: dict, metrics: dict = None
+    ) -> dict:
+        """
+        Append one turn to a session.
+
+        Args:
+            session_id: Session to append to
+            contents: The turn's Content objects (user message and model reply)
+            history: Display entries ({"role", "content"}) added by this turn
+            settings: Chat settings in effect for the turn
+            metrics: Optional telemetry for the turn (latency, bytes, tokens)
+
+        Returns:
+            The updated session meta
+        """
+        meta = self.read_meta(session_id)
+        record = {
+            "turn": meta["turns"] + 1,
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "settings": settings,
+            "contents": self.dump_contents(contents),
+            "history": history
+        }
+        if metrics is not None:
+            record["metrics"] = metrics
+        with open(self._session_dir(session_id) / "turns.jsonl", "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+        meta["turns"] = record["turn"]
+        meta["updated"] = record["time"]
+        meta["settings"] = settings
+        if meta["title"] is None:
+            meta["title"] = next(
+                (h["content"] for h in history if h["role"] == "user"), None
+            )
+        self._write_meta(session_id, meta)
+        return meta
+
+    def read_turns(self, session_id: str) -> list:
+        path = self._session_dir(session_id) / "turns.jsonl"
+        if not path.exists():
+            return []
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def list_sessions(self) -> list:
+        """All session metas, most recently updated first."""
+        metas = []
+        for meta_path in self.sessions_dir.glob("*/meta.json"):
+            try:
+                metas.append(json.loads(meta_path.read_text()))
+            except (OSError, ValueError):
+                continue
+        return sorted(metas, key=lambda m: m["updated"], reverse=True)
+
+    def resolve(self, prefix: str) -> str:
+        """Resolve a full or unique-prefix session id."""
+        if self._session_dir(prefix).is_dir():
+            return prefix
+        matches = [p.name for p in self.sessions_dir.iterdir() if p.name.startswith(prefix)]
+        if not matches:
+            raise ValueError(f"No session matching '{prefix}'")
+        if len(matches) > 1:
+            raise ValueError(f"Ambiguous session id '{prefix}': {', '.join(sorted(matches))}")
+        return matches[0]
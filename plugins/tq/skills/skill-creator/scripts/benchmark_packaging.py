@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Packaging Benchmark - Compression policy before/after
+
+Compares packaging time and archive size for:
+
+  deflate-all  Every file through ZIP_DEFLATED at the default level
+               (the packager's original behaviour)
+  policy       package_skill's file-type policy: compressed formats stored,
+               other files sampled, large binaries at the fastest level,
+               large files streamed
+
+Both strategies share the same file scan and archive writer and differ only
+in the per-file compression choice. Every run is a clean build, so
+incremental reuse doesn't hide the compression cost.
+
+Usage:
+    python benchmark_packaging.py                        # Synthetic asset-heavy skill
+    python benchmark_packaging.py path/to/skill [...]    # Real skills
+    python benchmark_packaging.py --images 40 --image-kb 300 --rounds 5
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+from package_skill import DEFAULT_IGNORE, DEFAULT_LEVEL, collect_files, scan_files, write_archive
+
+
+def make_skill(root, images, image_kb):
+    """Write a synthetic skill: markdown references plus incompressible image/zip assets."""
+    skill = Path(root) / "asset-skill"
+    (skill / "references").mkdir(parents=True)
+    (skill / "assets").mkdir()
+    (skill / "SKILL.md").write_text(
+        "---\nname: asset-skill\ndescription: Synthetic asset-heavy skill for benchmarking\n---\n\n"
+        + "Use the bundled assets.\n" * 200
+    )
+    for i in range(10):
+        (skill / "references" / f"guide_{i}.md").write_text(f"## Section {i}\n" + "Lorem ipsum dolor sit amet. " * 2000)
+    for i in range(images):
+        # Random bytes behave like already-compressed image data
+        (skill / "assets" / f"image_{i:02d}.png").write_bytes(os.urandom(image_kb * 1024))
+    with zipfile.ZipFile(skill / "assets" / "bundle.skill", "w", zipfile.ZIP_DEFLATED) as bundle:
+        for i in range(5):
+            bundle.writestr(f"bundle/file_{i}.md", "Bundled reference text. " * 4000)
+    return skill
+
+
+def build(skill, output_dir, policy):
+    """Clean build of a skill; without the policy every file is deflated at the default level."""
+    skill = Path(skill).resolve()
+    output = Path(output_dir) / f"{skill.name}.skill"
+    files = collect_files(skill, DEFAULT_IGNORE)
+    entries = scan_files(files, {})
+    if not policy:
+        for entry in entries.values():
+            entry["compression"] = f"deflate:{DEFAULT_LEVEL}"
+    write_archive(output, files, entries, previous=None)
+    return output
+
+
+def package_deflate_all(skill, output_dir):
+    return build(skill, output_dir, policy=False)
+
+
+def package_policy(skill, output_dir):
+    return build(skill, output_dir, policy=True)
+
+
+def run(strategy, skill, rounds):
+    timings = []
+    with tempfile.TemporaryDirectory() as out:
+        for _ in range(rounds):
+            start = time.perf_counter()
+            archive = strategy(skill, out)
+            timings.append(time.perf_counter() - start)
+        size = Path(archive).stat().st_size
+    timings.sort()
+    return timings[len(timings) // 2], size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the .skill compression policy")
+    parser.add_argument("skills", nargs="*", help="Skill folders (default: a synthetic asset-heavy skill)")
+    parser.add_argument("--images", type=int, default=30, help="Synthetic image count (default: 30)")
+    parser.add_argument("--image-kb", type=int, default=500, help="Synthetic image size in KB (default: 500)")
+    parser.add_argument("--rounds", type=int, default=3, help="Timed builds per strategy (default: 3)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        skills = args.skills or [make_skill(tmp, args.images, args.image_kb)]
+
+        print(f"{'skill':<24}{'strategy':<14}{'median':>10}{'archive':>12}")
+        for skill in skills:
+            skill = Path(skill).resolve()
+            input_size = sum(p.stat().st_size for _, p in collect_files(skill, DEFAULT_IGNORE))
+            results = {}
+            for name, strategy in (("deflate-all", package_deflate_all), ("policy", package_policy)):
+                results[name] = run(strategy, skill, args.rounds)
+                seconds, size = results[name]
+                print(f"{skill.name:<24}{name:<14}{seconds * 1000:>8.1f}ms{size / 1024:>10.1f}KB")
+
+            (before, before_size), (after, after_size) = results["deflate-all"], results["policy"]
+            print(f"{'':<24}{'input ' + format(input_size / 1024, '.0f') + 'KB':<14}"
+                  f"{before / after if after else 0:>9.1f}x{(after_size - before_size) / 1024:>+10.1f}KB\n")
+
+
+if __name__ == "__main__":
+    main()
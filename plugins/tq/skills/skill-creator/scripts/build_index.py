@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Marketplace Index Builder - Precomputes skill and command metadata
+
+Writes .claude-plugin/marketplace-index.json next to marketplace.json with
+the name, description, path, content hash and size of every skill and slash
+command, so tools can load one small file instead of walking every plugin
+and parsing each frontmatter. The index depends only on file contents, so
+it is committed and ships with every install of the marketplace.
+
+Updates are incremental: files whose size and mtime match the local stat
+cache (<root>/.marketplace-index-cache.json, not committed) aren't read at
+all, files whose content hash matches the index aren't parsed again, and
+the index is only rewritten when an entry changed.
+
+Usage:
+    python build_index.py [marketplace-root]
+    python build_index.py --check        # Exit 1 if the index is missing or stale
+
+Also run by package_marketplace.py and by quick_validate.py --all --index.
+quick_validate.py --all checks the index without rewriting it.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from quick_validate import (
+    MARKETPLACE_FILE, discover_commands, discover_skills, find_marketplace_root,
+    parse_frontmatter, read_frontmatter_block
+)
+
+
+INDEX_FILE = Path('.claude-plugin') / 'marketplace-index.json'
+INDEX_VERSION = 2
+STAT_CACHE_FILE = '.marketplace-index-cache.json'
+
+
+def load_index(root):
+    """Load a marketplace's index, or None when it is missing or from another version."""
+    try:
+        index = json.loads((Path(root) / INDEX_FILE).read_text())
+    except (OSError, ValueError):
+        return None
+    return index if index.get('version') == INDEX_VERSION else None
+
+
+def _load_stat_cache(root):
+    """Path -> {"size", "mtime_ns", "sha256"} from the local stat cache, empty when missing."""
+    try:
+        cache = json.loads((Path(root) / STAT_CACHE_FILE).read_text())
+    except (OSError, ValueError):
+        return {}
+    return cache.get('files', {}) if cache.get('version') == INDEX_VERSION else {}
+
+
+def _write_json(path, data):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False) + '\n')
+    tmp.replace(path)
+
+
+def read_metadata(path):
+    """
+    Read the name and description of a skill or command file.
+
+    Only the frontmatter block is read. A command without frontmatter is
+    described by its first non-empty line, as Claude Code does.
+
+    Returns:
+        Dict with "name" and "description" (None when absent) and "error"
+        when the frontmatter doesn't parse
+    """
+    with open(path, 'rb') as f:
+        block = read_frontmatter_block(f)
+        if not block.startswith('---'):
+            first = block.strip() or next((line.strip() for line in map(bytes.decode, f) if line.strip()), '')
+            return {'name': None, 'description': first.lstrip('# ') or None}
+
+    frontmatter, error = parse_frontmatter(block)
+    if error:
+        return {'name': None, 'description': None, 'error': error}
+    description = frontmatter.get('description')
+    return {
+        'name': frontmatter.get('name'),
+        'description': description.strip() if isinstance(description, str) else None,
+    }
+
+
+def _entry(root, item, kind, file_path, previous, stat_cache, stats):
+    rel = Path(os.path.relpath(file_path, root)).as_posix()
+    old = previous.get(rel)
+    st = file_path.stat()
+    cached = stat_cache.get(rel)
+    if cached and cached['size'] == st.st_size and cached['mtime_ns'] == st.st_mtime_ns:
+        digest = cached['sha256']
+    else:
+        digest = hashlib.sha256(file_path.read_bytes()).hexdigest()
+        stat_cache[rel] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': digest}
+    if old and old['sha256'] == digest:
+        stats['unchanged'] += 1
+        return old
+
+    stats['parsed'] += 1
+    metadata = read_metadata(file_path)
+    entry = {
+        'kind': kind,
+        'plugin': item['plugin'],
+        'name': metadata['name'] or (item['skill'] if kind == 'skill' else item['command']),
+        'description': metadata['description'],
+        'path': rel,
+        'sha256': digest,
+        'size': st.st_size,
+    }
+    if kind == 'command':
+        entry['command'] = f"{item['plugin']}:{item['command']}"
+    if 'error' in metadata:
+        entry['error'] = metadata['error']
+    return entry
+
+
+def build_index(root, force=False, write=True):
+    """
+    Build or incrementally update a marketplace's index.
+
+    Args:
+        root: Marketplace root (folder holding .claude-plugin/marketplace.json)
+        force: Ignore the previous index and stat cache and parse every file
+        write: Write the index file when it changed, and the stat cache
+
+    Returns:
+        (index dict, stats dict with parsed/unchanged/removed counts and
+        whether the index changed)
+    """
+    root = Path(root).resolve()
+    old_index = load_index(root)
+    stat_cache = {} if force else _load_stat_cache(root)
+    old_stat_cache = dict(stat_cache)
+    previous = {}
+    for entry in [] if force else (old_index or {}).get('skills', []) + (old_index or {}).get('commands', []):
+        previous[entry['path']] = entry
+
+    stats = {'parsed': 0, 'unchanged': 0}
+    marketplace = json.loads((root / MARKETPLACE_FILE).read_text())
+    skills = [
+        _entry(root, item, 'skill', Path(item['path']) / 'SKILL.md', previous, stat_cache, stats)
+        for item in discover_skills(root)
+    ]
+    commands = [
+        _entry(root, item, 'command', Path(item['path']), previous, stat_cache, stats)
+        for item in discover_commands(root)
+    ]
+    index = {
+        'version': INDEX_VERSION,
+        'marketplace': marketplace.get('name'),
+        'skills': skills,
+        'commands': commands,
+    }
+
+    live = {entry['path'] for entry in skills + commands}
+    stats['removed'] = len(set(previous) - live)
+    stats['changed'] = index != old_index
+    if write:
+        if stats['changed']:
+            _write_json(root / INDEX_FILE, index)
+        stat_cache = {path: stat_cache[path] for path in live}
+        if stat_cache != old_stat_cache:
+            _write_json(root / STAT_CACHE_FILE, {'version': INDEX_VERSION, 'files': stat_cache})
+    return index, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the marketplace skill/command metadata index")
+    parser.add_argument("root", nargs="?", help="Marketplace root (default: nearest above cwd)")
+    parser.add_argument("--force", "-f", action="store_true", help="Re-parse every file")
+    parser.add_argument("--check", action="store_true", help="Only report whether the index is up to date")
+    args = parser.parse_args()
+
+    root = Path(args.root).resolve() if args.root else find_marketplace_root()
+    if root is None or not (root / MARKETPLACE_FILE).exists():
+        print(f"❌ Error: {MARKETPLACE_FILE} not found")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    index, stats = build_index(root, force=args.force, write=not args.check)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    if args.check:
+        print(f"{'❌ Index is stale' if stats['changed'] else '✅ Index is up to date'}: {root / INDEX_FILE}")
+        sys.exit(1 if stats['changed'] else 0)
+
+    print(f"{'📦 Wrote' if stats['changed'] else '✅ Unchanged'} {root / INDEX_FILE}")
+    print(f"   {len(index['skills'])} skills, {len(index['commands'])} commands "
+          f"({stats['parsed']} parsed, {stats['unchanged']} unchanged, {stats['removed']} removed) "
+          f"in {elapsed:.0f}ms")
+    for entry in index['skills'] + index['commands']:
+        if 'error' in entry:
+            print(f"⚠️  {entry['path']}: {entry['error']}")
+
+
+if __name__ == "__main__":
+    main()
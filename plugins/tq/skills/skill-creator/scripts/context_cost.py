@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Context Cost Analyzer - Estimates the tokens a skill pulls into context
+
+Skills load in three stages (progressive disclosure):
+
+  always     name + description, in context for every conversation
+  on invoke  the SKILL.md body, loaded when the skill triggers
+  on demand  references/ files, read only when the body points to them
+
+Token counts come from a local approximation of a BPE tokenizer (no model
+or network access needed): letter runs cost about one token per five
+characters, digit runs one per three, and each symbol one. On English
+markdown this lands close to real tokenizer counts and errs on the high
+side, which is the safe side for a budget.
+
+Usage:
+    python context_cost.py                                   # Every skill in the marketplace
+    python context_cost.py path/to/skill [...]               # Specific skills
+    python context_cost.py --max-body 4000 --json
+    python context_cost.py --report context-cost.json
+
+Exits 1 when any skill is over budget.
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from quick_validate import FRONTMATTER_RE, discover_skills, find_marketplace_root, parse_frontmatter
+
+
+TOKEN_RE = re.compile(r'[^\W\d_]+|\d+|\n+|[^\w\s]|_')
+
+# Defaults follow the progressive-disclosure guidance in SKILL.md:
+# metadata ~100 words, body under 5k words and 500 lines, and references over
+# 10k words should be searchable rather than read whole
+DEFAULT_BUDGETS = {
+    'description': 200,
+    'body': 6500,
+    'body_lines': 500,
+    'reference': 13000,
+}
+REFERENCE_EXTENSIONS = {'.md', '.txt'}
+PARALLEL_THRESHOLD = 8
+
+
+def estimate_tokens(text):
+    """Approximate BPE token count of a text."""
+    tokens = 0
+    for match in TOKEN_RE.finditer(text):
+        piece = match.group()
+        if piece[0].isalpha():
+            tokens += math.ceil(len(piece) / 5)
+        elif piece[0].isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        else:
+            tokens += 1
+    return tokens
+
+
+def analyze_skill(skill_path):
+    """
+    Estimate the context cost of one skill.
+
+    Args:
+        skill_path: Skill folder (holding SKILL.md)
+
+    Returns:
+        Dict with the skill name, per-stage token estimates (description,
+        body, references) and the body's line count
+    """
+    skill_path = Path(skill_path)
+    content = (skill_path / 'SKILL.md').read_text()
+    frontmatter, error = parse_frontmatter(content)
+    if error:
+        return {'skill': skill_path.name, 'path': str(skill_path), 'error': error}
+
+    match = FRONTMATTER_RE.match(content)
+    body = content[match.end():].lstrip('\n')
+    name = str(frontmatter.get('name', skill_path.name))
+    description = str(frontmatter.get('description', ''))
+
+    references = []
+    reference_dir = skill_path / 'references'
+    if reference_dir.is_dir():
+        for path in sorted(reference_dir.rglob('*')):
+            if path.is_file() and path.suffix.lower() in REFERENCE_EXTENSIONS:
+                text = path.read_text(errors='replace')
+                references.append({
+                    'path': path.relative_to(skill_path).as_posix(),
+                    'tokens': estimate_tokens(text),
+                    'bytes': len(text.encode()),
+                })
+
+    return {
+        'skill': name,
+        'path': str(skill_path),
+        'always': estimate_tokens(f"{name}: {description}"),
+        'on_invoke': estimate_tokens(body),
+        'on_demand': sum(r['tokens'] for r in references),
+        'body_lines': body.count('\n') + 1 if body else 0,
+        'references': references,
+    }
+
+
+def check_budgets(result, budgets):
+    """List the budget violations of an analyzed skill."""
+    if 'error' in result:
+        return [result['error']]
+    problems = []
+    if result['always'] > budgets['description']:
+        problems.append(f"description is ~{result['always']} tokens (budget {budgets['description']})")
+    if result['on_invoke'] > budgets['body']:
+        problems.append(f"SKILL.md body is ~{result['on_invoke']} tokens (budget {budgets['body']})")
+    if result['body_lines'] > budgets['body_lines']:
+        problems.append(f"SKILL.md body is {result['body_lines']} lines (budget {budgets['body_lines']})")
+    for reference in result['references']:
+        if reference['tokens'] > budgets['reference']:
+            problems.append(
+                f"{reference['path']} is ~{reference['tokens']} tokens (budget {budgets['reference']}); "
+                f"add grep patterns to SKILL.md instead of loading it whole"
+            )
+    return problems
+
+
+def _analyze_safe(skill_path):
+    try:
+        return analyze_skill(skill_path)
+    except Exception as e:
+        return {'skill': Path(skill_path).name, 'path': str(skill_path), 'error': f"Error analyzing: {e}"}
+
+
+def analyze_skills(skill_paths, budgets=None, jobs=None):
+    """
+    Analyze many skills, in a process pool when there are enough of them.
+
+    Returns:
+        List of result dicts (see analyze_skill) with a "problems" list each,
+        in input order
+    """
+    budgets = {**DEFAULT_BUDGETS, **(budgets or {})}
+    paths = [str(p) for p in skill_paths]
+    if len(paths) >= PARALLEL_THRESHOLD and (jobs or os.cpu_count() or 1) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(_analyze_safe, paths))
+    else:
+        results = [_analyze_safe(path) for path in paths]
+    for result in results:
+        result['problems'] = check_budgets(result, budgets)
+    return results
+
+
+def print_table(results):
+    print(f"{'skill':<28}{'always':>8}{'invoke':>9}{'lines':>7}{'on demand':>11}{'refs':>6}")
+    for r in results:
+        if 'error' in r:
+            print(f"{r['skill']:<28}  ❌ {r['error']}")
+            continue
+        print(f"{r['skill']:<28}{r['always']:>8}{r['on_invoke']:>9}{r['body_lines']:>7}"
+              f"{r['on_demand']:>11}{len(r['references']):>6}")
+    analyzed = [r for r in results if 'error' not in r]
+    print(f"\nAlways loaded across {len(analyzed)} skills: ~{sum(r['always'] for r in analyzed)} tokens")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimate the context tokens each skill costs")
+    parser.add_argument("skills", nargs="*", help="Skill folders (default: every skill in the marketplace)")
+    parser.add_argument("--root", help="Marketplace root (default: nearest above cwd)")
+    parser.add_argument("--max-description", type=int, default=DEFAULT_BUDGETS['description'],
+                        help=f"Always-loaded budget in tokens (default: {DEFAULT_BUDGETS['description']})")
+    parser.add_argument("--max-body", type=int, default=DEFAULT_BUDGETS['body'],
+                        help=f"SKILL.md body budget in tokens (default: {DEFAULT_BUDGETS['body']})")
+    parser.add_argument("--max-body-lines", type=int, default=DEFAULT_BUDGETS['body_lines'],
+                        help=f"SKILL.md body budget in lines (default: {DEFAULT_BUDGETS['body_lines']})")
+    parser.add_argument("--max-reference", type=int, default=DEFAULT_BUDGETS['reference'],
+                        help=f"Per-reference-file budget in tokens (default: {DEFAULT_BUDGETS['reference']})")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--json", action="store_true", help="Print the JSON report to stdout")
+    parser.add_argument("--report", help="Write the JSON report to a file")
+    args = parser.parse_args()
+
+    if args.skills:
+        skill_paths = [Path(p).resolve() for p in args.skills]
+    else:
+        root = Path(args.root).resolve() if args.root else find_marketplace_root()
+        if root is None:
+            print("❌ Error: .claude-plugin/marketplace.json not found")
+            sys.exit(1)
+        skill_paths = [s['path'] for s in discover_skills(root)]
+    if not skill_paths:
+        print("❌ No skills found")
+        sys.exit(1)
+
+    budgets = {
+        'description': args.max_description,
+        'body': args.max_body,
+        'body_lines': args.max_body_lines,
+        'reference': args.max_reference,
+    }
+    start = time.perf_counter()
+    results = analyze_skills(skill_paths, budgets, jobs=args.jobs)
+    report = {
+        'within_budget': not any(r['problems'] for r in results),
+        'budgets': budgets,
+        'seconds': round(time.perf_counter() - start, 4),
+        'skills': results,
+    }
+
+    if args.report:
+        Path(args.report).write_text(json.dumps(report, indent=2))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_table(results)
+        for r in results:
+            for problem in r['problems']:
+                print(f"❌ {r['skill']}: {problem}")
+        if report['within_budget']:
+            print("✅ All skills within budget")
+
+    sys.exit(0 if report['within_budget'] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Marketplace Packager - Validates and packages every skill in a marketplace
+
+Reads .claude-plugin/marketplace.json, discovers each plugin's skills
+(folders with a SKILL.md under <plugin>/skills/), and packages them in
+parallel worker processes. Each worker imports the validator and packager
+once and handles many skills. Identical files shared between skills are
+compressed once through a shared blob cache, and each skill keeps
+package_skill's incremental manifest, so unchanged skills cost a stat() per
+file.
+
+Output layout: <output-dir>/<plugin>/<skill>.skill
+
+The marketplace metadata index (.claude-plugin/marketplace-index.json, see
+build_index.py) is brought up to date on every run.
+
+Usage:
+    python package_marketplace.py [marketplace-root] [options]
+
+Example:
+    python package_marketplace.py                       # Nearest marketplace above cwd
+    python package_marketplace.py . --output-dir ./dist --jobs 8
+    python package_marketplace.py --plugin tq --skill image-gen --force
+    python package_marketplace.py --report dist/report.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from build_index import INDEX_FILE, build_index
+from package_skill import BlobCache, package_skill
+from quick_validate import MARKETPLACE_FILE, discover_skills, find_marketplace_root
+
+
+BLOB_DIR = '.blobs'
+
+
+def build_skill(task):
+    """
+    Package one skill (runs in a worker process).
+
+    Returns:
+        Result dict with status, seconds, archive path/size, file counts,
+        blob cache hits and the packager's log
+    """
+    log = io.StringIO()
+    stats = {}
+    blob_cache = BlobCache(task['blob_dir'])
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(log):
+            archive = package_skill(
+                task['path'], task['output_dir'],
+                force=task['force'], ignore=task['ignore'],
+                blob_cache=blob_cache, stats=stats
+            )
+    except Exception as e:
+        archive = None
+        log.write(f"❌ Error: {e}\n")
+
+    if archive is None:
+        status = 'failed'
+    else:
+        status = 'unchanged' if stats.get('up_to_date') else 'packaged'
+    return {
+        'plugin': task['plugin'],
+        'skill': task['skill'],
+        'status': status,
+        'seconds': time.perf_counter() - start,
+        'archive': str(archive) if archive else None,
+        'size': Path(archive).stat().st_size if archive else None,
+        'files': stats.get('files', 0),
+        'reused': stats.get('reused', 0),
+        'compressed': stats.get('compressed', 0),
+        'blob_hits': blob_cache.hits,
+        'log': log.getvalue(),
+    }
+
+
+def format_size(size):
+    if size is None:
+        return '-'
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == 'B' else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+def package_marketplace(root, output_dir, jobs=None, force=False, ignore=None,
+                        plugins=None, skills=None, verbose=False):
+    """
+    Validate and package every selected skill in parallel.
+
+    Args:
+        root: Marketplace root (folder holding .claude-plugin/marketplace.json)
+        output_dir: Where <plugin>/<skill>.skill archives are written
+        jobs: Worker processes (default: CPU count)
+        force: Rebuild every archive from scratch
+        ignore: Extra ignore patterns for every skill
+        plugins: Only these plugin names (default: all)
+        skills: Only these skill names (default: all)
+        verbose: Print each skill's packaging log
+
+    Returns:
+        List of per-skill result dicts (see build_skill), in discovery order
+    """
+    output_dir = Path(output_dir).resolve()
+    tasks = [
+        {
+            **entry,
+            'output_dir': str(output_dir / entry['plugin']),
+            'blob_dir': str(output_dir / BLOB_DIR),
+            'force': force,
+            'ignore': ignore or [],
+        }
+        for entry in discover_skills(root)
+        if (not plugins or entry['plugin'] in plugins) and (not skills or entry['skill'] in skills)
+    ]
+    if not tasks:
+        return []
+
+    jobs = min(jobs or os.cpu_count() or 1, len(tasks))
+    results = {}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(build_skill, task): i for i, task in enumerate(tasks)}
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            icon = '❌' if result['status'] == 'failed' else '✅'
+            print(f"{icon} {result['plugin']}/{result['skill']}: {result['status']} "
+                  f"in {result['seconds']:.2f}s")
+            if verbose or result['status'] == 'failed':
+                print('   ' + result['log'].strip().replace('\n', '\n   '))
+    return [results[i] for i in range(len(tasks))]
+
+
+def print_report(results, elapsed):
+    print(f"\n{'skill':<32}{'status':<11}{'time':>8}{'size':>10}{'files':>7}{'reused':>8}{'shared':>8}")
+    for r in results:
+        print(
+            f"{r['plugin'] + '/' + r['skill']:<32}{r['status']:<11}{r['seconds']:>7.2f}s"
+            f"{format_size(r['size']):>10}{r['files']:>7}{r['reused']:>8}{r['blob_hits']:>8}"
+        )
+    total = sum(r['size'] or 0 for r in results)
+    failed = sum(r['status'] == 'failed' for r in results)
+    print(f"\n{len(results)} skills, {failed} failed, {format_size(total)} total, {elapsed:.2f}s wall")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Validate and package every skill of a marketplace in parallel"
+    )
+    parser.add_argument("root", nargs="?", help="Marketplace root (default: nearest above cwd)")
+    parser.add_argument("--output-dir", "-o", default=None,
+                        help="Archive directory (default: <root>/dist)")
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--plugin", action="append", help="Only this plugin (repeatable)")
+    parser.add_argument("--skill", action="append", help="Only this skill (repeatable)")
+    parser.add_argument("--force", "-f", action="store_true", help="Rebuild every archive")
+    parser.add_argument("--ignore", action="append", default=[], metavar="PATTERN",
+                        help="Extra glob to leave out of every skill (repeatable)")
+    parser.add_argument("--report", help="Write per-skill results as JSON")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Show each skill's log")
+    args = parser.parse_args()
+
+    root = Path(args.root).resolve() if args.root else find_marketplace_root()
+    if root is None or not (root / MARKETPLACE_FILE).exists():
+        print(f"❌ Error: {MARKETPLACE_FILE} not found")
+        sys.exit(1)
+    output_dir = Path(args.output_dir) if args.output_dir else root / 'dist'
+
+    print(f"📦 Packaging marketplace: {root}")
+    print(f"   Output directory: {output_dir}\n")
+
+    start = time.perf_counter()
+    results = package_marketplace(
+        root, output_dir, jobs=args.jobs, force=args.force, ignore=args.ignore,
+        plugins=args.plugin, skills=args.skill, verbose=args.verbose
+    )
+    if not results:
+        print("❌ No skills found")
+        sys.exit(1)
+    print_report(results, time.perf_counter() - start)
+
+    _, index_stats = build_index(root)
+    print(f"{'📦 Updated' if index_stats['changed'] else '✅ Unchanged'} {INDEX_FILE} "
+          f"({index_stats['parsed']} parsed)")
+
+    if args.report:
+        report_path = Path(args.report)
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps(results, indent=2))
+
+    sys.exit(1 if any(r['status'] == 'failed' for r in results) else 0)
+
+
+if __name__ == "__main__":
+    main()
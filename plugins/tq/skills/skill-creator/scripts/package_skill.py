@@ -2,27 +2,411 @@
 """
 Skill Packager - Creates a distributable .skill file of a skill folder
 
+Packaging is incremental: a manifest of file hashes is kept next to the
+archive, an unchanged skill is skipped entirely, and unchanged files are
+copied from the previous archive without recompressing them. Archives are
+reproducible (sorted members, fixed timestamps and permissions), so the same
+input always produces the same bytes.
+
+Each file is compressed according to its type: formats that are already
+compressed (images, archives, .skill files) are stored as-is, text is
+deflated at the default level, and other files are sampled to decide, with
+large ones deflated at the fastest level. Large files are streamed in
+chunks rather than read whole.
+
+Junk such as __pycache__, *.pyc, .DS_Store and .git is never packaged. Add
+more patterns with a .skillignore file in the skill folder (one glob per
+line, # for comments) or with --ignore.
+
 Usage:
-    python utils/package_skill.py <path/to/skill-folder> [output-directory]
+    python utils/package_skill.py <path/to/skill-folder> [output-directory] [options]
 
 Example:
     python utils/package_skill.py skills/public/my-skill
     python utils/package_skill.py skills/public/my-skill ./dist
+    python utils/package_skill.py skills/public/my-skill ./dist --ignore "*.psd" --verbose
+    python utils/package_skill.py skills/public/my-skill ./dist --force
 """
 
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import struct
 import sys
 import zipfile
+import zlib
 from pathlib import Path
 from quick_validate import validate_skill
 
 
-def package_skill(skill_path, output_dir=None):
+DEFAULT_IGNORE = ['__pycache__', '*.pyc', '.DS_Store', '.git', '.skillignore']
+IGNORE_FILE = '.skillignore'
+
+# Reproducible members: DOS epoch timestamp, Unix permissions
+FIXED_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+FILE_MODE = 0o644
+EXEC_MODE = 0o755
+
+MANIFEST_VERSION = 2
+HASH_CHUNK = 1024 * 1024
+
+# Compression policy: already-compressed formats are stored; text uses level 6
+# (level 9 saves ~0.3% on skill text for twice the CPU); other files are sampled
+STORED_EXTENSIONS = {
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif', '.heic', '.ico',
+    '.zip', '.skill', '.gz', '.tgz', '.bz2', '.xz', '.zst', '.7z', '.jar', '.whl',
+    '.mp3', '.mp4', '.m4a', '.mov', '.webm', '.ogg', '.woff', '.woff2', '.pdf',
+}
+TEXT_EXTENSIONS = {
+    '.md', '.txt', '.py', '.js', '.ts', '.json', '.jsonl', '.yaml', '.yml', '.toml',
+    '.html', '.css', '.svg', '.xml', '.csv', '.sh', '.ini', '.cfg', '.rst',
+}
+TEXT_LEVEL = 6
+DEFAULT_LEVEL = 6
+LARGE_LEVEL = 1  # Large binary data: speed over the last few percent
+SAMPLE_SIZE = 64 * 1024
+SAMPLE_MIN_SAVING = 0.05  # Store sampled files that shrink by less than 5%
+STREAM_THRESHOLD = 4 * 1024 * 1024  # Members above this are streamed in chunks
+
+
+def load_ignore_patterns(skill_path, extra=None):
+    """Default ignore patterns, plus the skill's .skillignore and any extra patterns."""
+    patterns = list(DEFAULT_IGNORE)
+    ignore_file = Path(skill_path) / IGNORE_FILE
+    if ignore_file.exists():
+        for line in ignore_file.read_text().splitlines():
+            line = line.strip()
+            if line and not line.startswith('#'):
+                patterns.append(line.rstrip('/'))
+    patterns.extend(extra or [])
+    return patterns
+
+
+def is_ignored(rel_path, patterns):
+    """True if a relative posix path, or any of its components, matches a pattern."""
+    parts = rel_path.split('/')
+    return any(
+        fnmatch.fnmatch(rel_path, pattern) or any(fnmatch.fnmatch(part, pattern) for part in parts)
+        for pattern in patterns
+    )
+
+
+def collect_files(skill_path, patterns, exclude=()):
+    """
+    List the files to package, in sorted archive order.
+
+    Args:
+        skill_path: Resolved path to the skill folder
+        patterns: Ignore patterns (see is_ignored)
+        exclude: Absolute paths never to include (e.g. the output archive)
+
+    Returns:
+        List of (arcname, Path) tuples, sorted by arcname
+    """
+    exclude = {Path(p) for p in exclude}
+    files = []
+    for root, dirs, filenames in os.walk(skill_path):
+        root = Path(root)
+        rel_root = root.relative_to(skill_path).as_posix()
+        rel_root = '' if rel_root == '.' else rel_root + '/'
+        dirs[:] = [d for d in dirs if not is_ignored(rel_root + d, patterns)]
+        for filename in filenames:
+            file_path = root / filename
+            if is_ignored(rel_root + filename, patterns) or file_path in exclude:
+                continue
+            if not file_path.is_file():
+                continue
+            arcname = (Path(skill_path.name) / (rel_root + filename)).as_posix()
+            files.append((arcname, file_path))
+    return sorted(files)
+
+
+def file_digest(file_path):
+    h = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def scan_files(files, previous):
+    """
+    Fingerprint files, trusting the previous manifest when size and mtime match.
+
+    Returns:
+        Dict of arcname -> {"size", "mtime_ns", "sha256", "mode", "compression"}
+    """
+    entries = {}
+    for arcname, file_path in files:
+        st = file_path.stat()
+        old = previous.get(arcname)
+        if old and old['size'] == st.st_size and old['mtime_ns'] == st.st_mtime_ns:
+            digest = old['sha256']
+            compression = old['compression']
+        else:
+            digest = file_digest(file_path)
+            compression = compression_for(file_path, st.st_size)
+        entries[arcname] = {
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+            'sha256': digest,
+            'mode': EXEC_MODE if st.st_mode & 0o111 else FILE_MODE,
+            'compression': compression,
+        }
+    return entries
+
+
+def compression_for(file_path, size):
+    """
+    Pick how a file is stored, by extension or, for unknown types, by sampling.
+
+    Returns:
+        'stored' or 'deflate:<level>'
+    """
+    suffix = file_path.suffix.lower()
+    if suffix in STORED_EXTENSIONS:
+        return 'stored'
+    if suffix in TEXT_EXTENSIONS:
+        return f'deflate:{TEXT_LEVEL}'
+    if size < 1024:
+        return f'deflate:{DEFAULT_LEVEL}'
+
+    with open(file_path, 'rb') as f:
+        sample = f.read(SAMPLE_SIZE)
+    if len(zlib.compress(sample, 1)) > len(sample) * (1 - SAMPLE_MIN_SAVING):
+        return 'stored'
+    return f'deflate:{LARGE_LEVEL if size > STREAM_THRESHOLD else DEFAULT_LEVEL}'
+
+
+def parse_compression(compression):
+    """'stored' / 'deflate:<level>' -> (zipfile compress_type, level or None)."""
+    if compression == 'stored':
+        return zipfile.ZIP_STORED, None
+    return zipfile.ZIP_DEFLATED, int(compression.split(':', 1)[1])
+
+
+def manifest_path_for(skill_filename):
+    return skill_filename.with_name(f".{skill_filename.name}.manifest.json")
+
+
+def load_manifest(manifest_path):
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get('version') == MANIFEST_VERSION else None
+
+
+def make_zipinfo(arcname, entry):
+    """A member header that depends only on the name, permissions and compression policy."""
+    zinfo = zipfile.ZipInfo(arcname, date_time=FIXED_DATE_TIME)
+    zinfo.create_system = 3  # Unix, whatever platform packaged it
+    zinfo.external_attr = (0o100000 | entry['mode']) << 16
+    zinfo.compress_type, level = parse_compression(entry['compression'])
+    # Per-member level; the attribute is compress_level from Python 3.13
+    if hasattr(zinfo, 'compress_level'):
+        zinfo.compress_level = level
+    else:
+        zinfo._compresslevel = level
+    zinfo.file_size = entry['size']
+    return zinfo
+
+
+def write_member(zipf, zinfo, file_path):
+    """Compress a file into zipf, streaming large files in chunks instead of reading them whole."""
+    if zinfo.file_size <= STREAM_THRESHOLD:
+        zipf.writestr(zinfo, file_path.read_bytes())
+        return
+    force_zip64 = zinfo.file_size > zipfile.ZIP64_LIMIT
+    with open(file_path, 'rb') as src, zipf.open(zinfo, 'w', force_zip64=force_zip64) as dst:
+        for chunk in iter(lambda: src.read(HASH_CHUNK), b''):
+            dst.write(chunk)
+
+
+def read_exact(f, size, name):
+    """Yield exactly `size` bytes from f in chunks."""
+    while size:
+        chunk = f.read(min(HASH_CHUNK, size))
+        if not chunk:
+            raise ValueError(f"Truncated data for member: {name}")
+        size -= len(chunk)
+        yield chunk
+
+
+def write_raw_member(zipf, zinfo, chunks):
+    """
+    Append an already-compressed member to an archive being written.
+
+    zinfo must carry compress_type, CRC, file_size and compress_size; chunks
+    yields exactly compress_size bytes of compressed data.
+    """
+    zinfo.header_offset = zipf.fp.tell()
+    zipf.fp.write(zinfo.FileHeader(zinfo.file_size > zipfile.ZIP64_LIMIT))
+    for chunk in chunks:
+        zipf.fp.write(chunk)
+
+    zipf.filelist.append(zinfo)
+    zipf.NameToInfo[zinfo.filename] = zinfo
+    zipf.start_dir = zipf.fp.tell()
+    zipf._didModify = True
+
+
+def copy_raw_member(source, zipf, name, zinfo):
+    """
+    Copy a member's compressed bytes from one archive into another as-is.
+
+    Avoids decompressing and recompressing files that have not changed.
+    """
+    old = source.getinfo(name)
+    source.fp.seek(old.header_offset)
+    header = source.fp.read(zipfile.sizeFileHeader)
+    name_len, extra_len = struct.unpack('<HH', header[26:30])
+    source.fp.seek(old.header_offset + zipfile.sizeFileHeader + name_len + extra_len)
+
+    zinfo.compress_type = old.compress_type
+    zinfo.flag_bits = old.flag_bits & ~0x08  # Sizes are known, no data descriptor
+    zinfo.CRC = old.CRC
+    zinfo.file_size = old.file_size
+    zinfo.compress_size = old.compress_size
+    write_raw_member(zipf, zinfo, read_exact(source.fp, old.compress_size, name))
+
+
+class BlobCache:
+    """
+    Compressed member bodies keyed by content hash, shared between archives.
+
+    Identical files (a LICENSE copied into several skills, shared assets) are
+    compressed once; later archives copy the cached raw stream. Each blob is
+    a 12-byte header (CRC-32, uncompressed size) followed by the raw deflate
+    data, written atomically so concurrent packagers can share one cache.
+    """
+
+    HEADER = struct.Struct('<IQ')
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, digest, level):
+        return self.root / digest[:2] / f"{digest}.deflate{level}"
+
+    def _compress(self, file_path, path, level):
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        crc = size = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(file_path, 'rb') as src, open(tmp, 'wb') as out:
+            out.write(self.HEADER.pack(0, 0))
+            for chunk in iter(lambda: src.read(HASH_CHUNK), b''):
+                crc = zlib.crc32(chunk, crc)
+                size += len(chunk)
+                out.write(compressor.compress(chunk))
+            out.write(compressor.flush())
+            out.seek(0)
+            out.write(self.HEADER.pack(crc, size))
+        os.replace(tmp, path)
+
+    def write_member(self, zipf, zinfo, file_path, digest):
+        """
+        Write file_path into zipf per zinfo's compression, compressing only on a cache miss.
+
+        Stored members cost no CPU to produce, so they bypass the cache.
+        """
+        if zinfo.compress_type == zipfile.ZIP_STORED:
+            write_member(zipf, zinfo, file_path)
+            return
+
+        level = getattr(zinfo, 'compress_level', None) or zinfo._compresslevel
+        path = self._path(digest, level)
+        if path.exists():
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._compress(file_path, path, level)
+
+        with open(path, 'rb') as f:
+            zinfo.CRC, zinfo.file_size = self.HEADER.unpack(f.read(self.HEADER.size))
+            zinfo.compress_size = path.stat().st_size - self.HEADER.size
+            write_raw_member(zipf, zinfo, read_exact(f, zinfo.compress_size, zinfo.filename))
+
+
+def write_archive(skill_filename, files, entries, previous, verbose=False, blob_cache=None):
+    """
+    Write the archive, reusing compressed members of unchanged files.
+
+    New or changed files are compressed, or taken from blob_cache (a
+    BlobCache) when one is given.
+
+    Returns:
+        (reused, compressed) member counts
+    """
+    reuse = {}
+    if previous and skill_filename.exists():
+        old_files = previous['files']
+        reuse = {
+            arcname for arcname, entry in entries.items()
+            if arcname in old_files
+            and old_files[arcname]['sha256'] == entry['sha256']
+            and old_files[arcname]['compression'] == entry['compression']
+        }
+
+    source = None
+    if reuse:
+        try:
+            source = zipfile.ZipFile(skill_filename)
+            names = set(source.namelist())
+            reuse = {
+                name for name in reuse
+                if name in names and not source.getinfo(name).flag_bits & 0x01  # not encrypted
+            }
+        except zipfile.BadZipFile:
+            source, reuse = None, set()
+
+    tmp_filename = skill_filename.with_name(f".{skill_filename.name}.{os.getpid()}.tmp")
+    reused = compressed = 0
+    try:
+        with zipfile.ZipFile(tmp_filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            for arcname, file_path in files:
+                zinfo = make_zipinfo(arcname, entries[arcname])
+                if arcname in reuse:
+                    copy_raw_member(source, zipf, arcname, zinfo)
+                    reused += 1
+                    action = 'Reused'
+                elif blob_cache is not None:
+                    blob_cache.write_member(zipf, zinfo, file_path, entries[arcname]['sha256'])
+                    compressed += 1
+                    action = 'Added'
+                else:
+                    write_member(zipf, zinfo, file_path)
+                    compressed += 1
+                    action = 'Added'
+                if verbose:
+                    print(f"  {action}: {arcname} ({entries[arcname]['compression']})")
+        os.replace(tmp_filename, skill_filename)
+    finally:
+        if source is not None:
+            source.close()
+        if tmp_filename.exists():
+            tmp_filename.unlink()
+    return reused, compressed
+
+
+def package_skill(skill_path, output_dir=None, force=False, ignore=None, verbose=False,
+                  blob_cache=None, stats=None):
     """
     Package a skill folder into a .skill file.
 
     Args:
         skill_path: Path to the skill folder
         output_dir: Optional output directory for the .skill file (defaults to current directory)
+        force: Rebuild from scratch even if nothing has changed
+        ignore: Extra ignore patterns on top of the defaults and .skillignore
+        verbose: Print every packaged file
+        blob_cache: Optional BlobCache shared with other packaging runs
+        stats: Optional dict filled with files, reused, compressed and up_to_date
 
     Returns:
         Path to the created .skill file, or None if error
@@ -44,15 +428,6 @@ def package_skill(skill_path, output_dir=None):
         print(f"❌ Error: SKILL.md not found in {skill_path}")
         return None
 
-    # Run validation before packaging
-    print("🔍 Validating skill...")
-    valid, message = validate_skill(skill_path)
-    if not valid:
-        print(f"❌ Validation failed: {message}")
-        print("   Please fix the validation errors before packaging.")
-        return None
-    print(f"✅ {message}\n")
-
     # Determine output location
     skill_name = skill_path.name
     if output_dir:
@@ -62,18 +437,45 @@ def package_skill(skill_path, output_dir=None):
         output_path = Path.cwd()
 
     skill_filename = output_path / f"{skill_name}.skill"
+    manifest_path = manifest_path_for(skill_filename)
+
+    # Fingerprint the inputs; size+mtime matches skip rehashing
+    patterns = load_ignore_patterns(skill_path, ignore)
+    files = collect_files(skill_path, patterns, exclude=[skill_filename, manifest_path])
+    previous = None if force else load_manifest(manifest_path)
+    entries = scan_files(files, previous['files'] if previous else {})
+
+    if (previous and previous['files'] == entries and skill_filename.exists()
+            and skill_filename.stat().st_size == previous.get('archive_size')):
+        print(f"✅ Up to date: {skill_filename} ({len(entries)} files unchanged)")
+        if stats is not None:
+            stats.update(files=len(entries), reused=len(entries), compressed=0, up_to_date=True)
+        return skill_filename
+
+    # Run validation before packaging
+    print("🔍 Validating skill...")
+    valid, message = validate_skill(skill_path)
+    if not valid:
+        print(f"❌ Validation failed: {message}")
+        print("   Please fix the validation errors before packaging.")
+        return None
+    print(f"✅ {message}\n")
 
     # Create the .skill file (zip format)
     try:
-        with zipfile.ZipFile(skill_filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            # Walk through the skill directory
-            for file_path in skill_path.rglob('*'):
-                if file_path.is_file():
-                    # Calculate the relative path within the zip
-                    arcname = file_path.relative_to(skill_path.parent)
-                    zipf.write(file_path, arcname)
-                    print(f"  Added: {arcname}")
+        reused, compressed = write_archive(
+            skill_filename, files, entries, previous, verbose, blob_cache
+        )
+        if stats is not None:
+            stats.update(files=len(files), reused=reused, compressed=compressed, up_to_date=False)
+
+        manifest_path.write_text(json.dumps({
+            'version': MANIFEST_VERSION,
+            'archive_size': skill_filename.stat().st_size,
+            'files': entries,
+        }, indent=2, sort_keys=True))
 
+        print(f"  {len(files)} files: {compressed} compressed, {reused} reused from previous archive")
         print(f"\n✅ Successfully packaged skill to: {skill_filename}")
         return skill_filename
 
@@ -83,22 +485,28 @@ def package_skill(skill_path, output_dir=None):
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python utils/package_skill.py <path/to/skill-folder> [output-directory]")
-        print("\nExample:")
-        print("  python utils/package_skill.py skills/public/my-skill")
-        print("  python utils/package_skill.py skills/public/my-skill ./dist")
-        sys.exit(1)
-
-    skill_path = sys.argv[1]
-    output_dir = sys.argv[2] if len(sys.argv) > 2 else None
+    parser = argparse.ArgumentParser(
+        description="Package a skill folder into a distributable .skill file",
+        usage="python utils/package_skill.py <path/to/skill-folder> [output-directory] [options]"
+    )
+    parser.add_argument("skill_path", help="Path to the skill folder")
+    parser.add_argument("output_dir", nargs="?", help="Output directory (default: current directory)")
+    parser.add_argument("--force", "-f", action="store_true",
+                        help="Rebuild from scratch even if nothing changed")
+    parser.add_argument("--ignore", action="append", default=[], metavar="PATTERN",
+                        help="Extra glob to leave out (repeatable)")
+    parser.add_argument("--verbose", "-v", action="store_true", help="List every packaged file")
+    args = parser.parse_args()
 
-    print(f"📦 Packaging skill: {skill_path}")
-    if output_dir:
-        print(f"   Output directory: {output_dir}")
+    print(f"📦 Packaging skill: {args.skill_path}")
+    if args.output_dir:
+        print(f"   Output directory: {args.output_dir}")
     print()
 
-    result = package_skill(skill_path, output_dir)
+    result = package_skill(
+        args.skill_path, args.output_dir,
+        force=args.force, ignore=args.ignore, verbose=args.verbose
+    )
 
     if result:
         sys.exit(0)
@@ -1,46 +1,87 @@
 #!/usr/bin/env python3
 """
 Quick validation script for skills - minimal version
+
+Usage:
+    python quick_validate.py <skill_directory>
+    python quick_validate.py dist/tq/image-gen.skill            # Packaged archive, validated in place
+    python quick_validate.py dist/                              # Every .skill under a folder
+    python quick_validate.py --all [marketplace-root]           # Every skill and command
+    python quick_validate.py --all --json                       # JSON report on stdout
+    python quick_validate.py --all --report validate.json --no-cache
+    python quick_validate.py --all --index                      # Refresh marketplace-index.json too
+
+Bulk mode discovers every skill and command .md of each plugin listed in
+.claude-plugin/marketplace.json and validates them in a process pool.
+Results are cached by file hash in <root>/.validate-cache.json, so only
+changed files are parsed again. When the marketplace has a committed
+.claude-plugin/marketplace-index.json, a stale index fails the run; --index
+rewrites it instead.
+
+.skill archives are checked without extracting them: the member layout is
+read from the zip's central directory and only the frontmatter block of
+SKILL.md is decompressed.
 """
 
-import sys
+import argparse
+import hashlib
+import json
 import os
+import sys
 import re
+import time
 import yaml
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-def validate_skill(skill_path):
-    """Basic validation of a skill"""
-    skill_path = Path(skill_path)
+# libyaml's C loader is several times faster when PyYAML was built with it
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
 
-    # Check SKILL.md exists
-    skill_md = skill_path / 'SKILL.md'
-    if not skill_md.exists():
-        return False, "SKILL.md not found"
+FRONTMATTER_RE = re.compile(r'^---\n(.*?)\n---', re.DOTALL)
 
-    # Read and validate frontmatter
-    content = skill_md.read_text()
+# Define allowed properties
+ALLOWED_PROPERTIES = {
+    'name', 'description', 'license', 'allowed-tools', 'metadata',
+    'argument-hint', 'disable-model-invocation', 'user-invocable', 'model'
+}
+COMMAND_PROPERTIES = {
+    'name', 'description', 'allowed-tools', 'argument-hint', 'model', 'disable-model-invocation'
+}
+
+MARKETPLACE_FILE = Path('.claude-plugin') / 'marketplace.json'
+CACHE_FILE = '.validate-cache.json'
+PARALLEL_THRESHOLD = 16  # Below this many uncached files a pool costs more than it saves
+FRONTMATTER_LIMIT = 64 * 1024  # Bytes of SKILL.md read from an archive before giving up on '---'
+
+
+def parse_frontmatter(content):
+    """
+    Extract and parse the YAML frontmatter of a markdown document.
+
+    Returns:
+        (frontmatter dict, None) or (None, error message)
+    """
     if not content.startswith('---'):
-        return False, "No YAML frontmatter found"
+        return None, "No YAML frontmatter found"
 
     # Extract frontmatter
-    match = re.match(r'^---\n(.*?)\n---', content, re.DOTALL)
+    match = FRONTMATTER_RE.match(content)
     if not match:
-        return False, "Invalid frontmatter format"
-
-    frontmatter_text = match.group(1)
+        return None, "Invalid frontmatter format"
 
     # Parse YAML frontmatter
     try:
-        frontmatter = yaml.safe_load(frontmatter_text)
-        if not isinstance(frontmatter, dict):
-            return False, "Frontmatter must be a YAML dictionary"
+        frontmatter = yaml.load(match.group(1), Loader=YAML_LOADER)
     except yaml.YAMLError as e:
-        return False, f"Invalid YAML in frontmatter: {e}"
+        return None, f"Invalid YAML in frontmatter: {e}"
+    if not isinstance(frontmatter, dict):
+        return None, "Frontmatter must be a YAML dictionary"
+    return frontmatter, None
 
-    # Define allowed properties
-    ALLOWED_PROPERTIES = {'name', 'description', 'license', 'allowed-tools', 'metadata'}
 
+def check_skill_frontmatter(frontmatter):
+    """Validate parsed SKILL.md frontmatter. Returns (valid, message)."""
     # Check for unexpected properties (excluding nested keys under metadata)
     unexpected_keys = set(frontmatter.keys()) - ALLOWED_PROPERTIES
     if unexpected_keys:
@@ -85,11 +126,429 @@ def validate_skill(skill_path):
 
     return True, "Skill is valid!"
 
-if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python quick_validate.py <skill_directory>")
+
+def validate_skill(skill_path):
+    """Basic validation of a skill"""
+    skill_path = Path(skill_path)
+
+    # Check SKILL.md exists
+    skill_md = skill_path / 'SKILL.md'
+    if not skill_md.exists():
+        return False, "SKILL.md not found"
+
+    # Read and validate frontmatter
+    frontmatter, error = parse_frontmatter(skill_md.read_text())
+    if error:
+        return False, error
+    return check_skill_frontmatter(frontmatter)
+
+
+def validate_command(command_path):
+    """Basic validation of a slash command .md file (frontmatter is optional)"""
+    content = Path(command_path).read_text()
+    if not content.startswith('---'):
+        return True, "Command is valid (no frontmatter)"
+
+    frontmatter, error = parse_frontmatter(content)
+    if error:
+        return False, error
+
+    unexpected_keys = set(frontmatter.keys()) - COMMAND_PROPERTIES
+    if unexpected_keys:
+        return False, (
+            f"Unexpected key(s) in command frontmatter: {', '.join(sorted(unexpected_keys))}. "
+            f"Allowed properties are: {', '.join(sorted(COMMAND_PROPERTIES))}"
+        )
+
+    description = frontmatter.get('description')
+    if description is not None and not isinstance(description, str):
+        return False, f"Description must be a string, got {type(description).__name__}"
+
+    tools = frontmatter.get('allowed-tools')
+    if tools is not None and not (
+        isinstance(tools, str) or (isinstance(tools, list) and all(isinstance(t, str) for t in tools))
+    ):
+        return False, "allowed-tools must be a string or a list of strings"
+
+    return True, "Command is valid!"
+
+
+def read_frontmatter_block(stream):
+    """
+    Read a markdown document's frontmatter block from a binary stream.
+
+    Stops at the closing '---' line, so the body is never read (or, for a
+    zip member, decompressed).
+
+    Returns:
+        The text up to and including the closing '---', or what was read
+        when there is no frontmatter or it isn't closed within
+        FRONTMATTER_LIMIT bytes
+    """
+    lines = [stream.readline(FRONTMATTER_LIMIT)]
+    if lines[0].rstrip(b'\r\n') != b'---':
+        return lines[0].decode('utf-8', errors='replace')
+    read = len(lines[0])
+    while read < FRONTMATTER_LIMIT:
+        line = stream.readline(FRONTMATTER_LIMIT - read)
+        if not line:
+            break
+        lines.append(line)
+        read += len(line)
+        if line.rstrip(b'\r\n') == b'---':
+            break
+    return b''.join(lines).decode('utf-8').replace('\r\n', '\n')
+
+
+def check_archive_layout(infos):
+    """
+    Check the members of a .skill archive from its central directory.
+
+    A valid archive holds a single top-level skill folder with a SKILL.md in
+    it, and only plain relative member paths.
+
+    Returns:
+        (skill folder name, None) or (None, error message)
+    """
+    if not infos:
+        return None, "Archive is empty"
+
+    names = set()
+    top_levels = set()
+    for info in infos:
+        name = info.filename
+        parts = name.split('/')
+        if name.startswith('/') or '\\' in name or ':' in parts[0] or '..' in parts:
+            return None, f"Unsafe member path: {name}"
+        if name in names:
+            return None, f"Duplicate member: {name}"
+        if info.flag_bits & 0x1:
+            return None, f"Encrypted member: {name}"
+        if info.compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            return None, f"Unsupported compression for {name} (only stored and deflated)"
+        names.add(name)
+        top_levels.add(parts[0])
+
+    if len(top_levels) != 1:
+        return None, f"Archive must contain a single skill folder, found: {', '.join(sorted(top_levels))}"
+    folder = top_levels.pop()
+    if f"{folder}/SKILL.md" not in names:
+        return None, f"SKILL.md not found in {folder}/"
+    return folder, None
+
+
+def validate_archive(archive_path):
+    """Validate a packaged .skill archive in place, without extracting it"""
+    try:
+        with zipfile.ZipFile(archive_path) as zf:
+            folder, error = check_archive_layout(zf.infolist())
+            if error:
+                return False, error
+            with zf.open(f"{folder}/SKILL.md") as skill_md:
+                content = read_frontmatter_block(skill_md)
+    except zipfile.BadZipFile as e:
+        return False, f"Not a valid .skill archive: {e}"
+    except UnicodeDecodeError:
+        return False, "SKILL.md frontmatter is not valid UTF-8"
+
+    frontmatter, error = parse_frontmatter(content)
+    if error:
+        return False, error
+    return check_skill_frontmatter(frontmatter)
+
+
+def validate_path(path):
+    """Validate a skill directory or a .skill archive"""
+    if Path(path).is_file():
+        return validate_archive(path)
+    return validate_skill(path)
+
+
+def expand_paths(paths):
+    """Skill directories and .skill archives named on the command line; other folders are searched for archives."""
+    targets = []
+    for path in map(Path, paths):
+        if path.is_dir() and not (path / 'SKILL.md').exists():
+            targets.extend(sorted(path.rglob('*.skill')))
+        else:
+            targets.append(path)
+    return targets
+
+
+def _validate_path_safe(path):
+    try:
+        return validate_path(path)
+    except Exception as e:
+        return False, f"Error validating: {e}"
+
+
+def validate_many(paths, jobs=None):
+    """
+    Validate many skill directories and .skill archives, in a process pool
+    when there are enough of them.
+
+    Returns:
+        List of (path, valid, message) tuples in input order
+    """
+    paths = [str(p) for p in paths]
+    if len(paths) >= PARALLEL_THRESHOLD and (jobs or os.cpu_count() or 1) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            outcomes = list(pool.map(_validate_path_safe, paths, chunksize=8))
+    else:
+        outcomes = [_validate_path_safe(path) for path in paths]
+    return [(path, valid, message) for path, (valid, message) in zip(paths, outcomes)]
+
+
+# Marketplace discovery
+
+def find_marketplace_root(start=None):
+    """Walk up from start (default: cwd) to the folder holding .claude-plugin/marketplace.json."""
+    path = Path(start or Path.cwd()).resolve()
+    for candidate in [path, *path.parents]:
+        if (candidate / MARKETPLACE_FILE).exists():
+            return candidate
+    return None
+
+
+def local_plugins(root):
+    """(name, resolved path) of every plugin in a marketplace with a local source."""
+    marketplace = json.loads((Path(root) / MARKETPLACE_FILE).read_text())
+    for plugin in marketplace.get('plugins', []):
+        source = plugin.get('source')
+        if isinstance(source, str) and source.startswith('.'):
+            # Remote sources (git, github) aren't checked out here
+            yield plugin['name'], (Path(root) / source).resolve()
+
+
+def _declared_paths(plugin_path, key, default):
+    plugin_json = plugin_path / '.claude-plugin' / 'plugin.json'
+    declared = None
+    if plugin_json.exists():
+        declared = json.loads(plugin_json.read_text()).get(key)
+    if isinstance(declared, str):
+        declared = [declared]
+    return [(plugin_path / entry).resolve() for entry in declared or [default]]
+
+
+def discover_skills(root):
+    """
+    List every skill of every plugin in a marketplace.
+
+    A plugin's skills are the folders with a SKILL.md under <source>/skills/,
+    or the folders listed in its plugin.json "skills" entry when present.
+
+    Returns:
+        List of {"plugin", "skill", "path"} dicts, sorted by plugin and skill
+    """
+    skills = []
+    for plugin, plugin_path in local_plugins(root):
+        skill_dirs = set()
+        for base in _declared_paths(plugin_path, 'skills', './skills'):
+            if (base / 'SKILL.md').exists():
+                skill_dirs.add(base)
+            elif base.is_dir():
+                skill_dirs.update(p for p in base.iterdir() if (p / 'SKILL.md').exists())
+        for skill_dir in sorted(skill_dirs):
+            skills.append({'plugin': plugin, 'skill': skill_dir.name, 'path': str(skill_dir)})
+    return skills
+
+
+def discover_commands(root):
+    """
+    List every slash command .md of every plugin in a marketplace.
+
+    Returns:
+        List of {"plugin", "command", "path"} dicts; command names use the
+        plugin's namespacing (commands/docs/all.md -> docs:all)
+    """
+    commands = []
+    for plugin, plugin_path in local_plugins(root):
+        for base in _declared_paths(plugin_path, 'commands', './commands'):
+            files = [base] if base.suffix == '.md' else sorted(base.rglob('*.md')) if base.is_dir() else []
+            for path in files:
+                rel = path.relative_to(base).with_suffix('') if path != base else Path(path.stem)
+                commands.append({'plugin': plugin, 'command': ':'.join(rel.parts), 'path': str(path)})
+    return commands
+
+
+# Bulk validation
+
+def _validator_version():
+    """Hash of this file, so cached results are dropped whenever the rules change."""
+    return hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
+
+
+def _validate_target(target):
+    kind, path = target
+    try:
+        if kind == 'skill':
+            return validate_skill(path)
+        return validate_command(path)
+    except Exception as e:
+        return False, f"Error validating: {e}"
+
+
+def _fingerprint(path, cached):
+    """(size, mtime_ns, sha256) of a file, skipping the hash when size and mtime match the cache."""
+    st = path.stat()
+    if cached and cached['size'] == st.st_size and cached['mtime_ns'] == st.st_mtime_ns:
+        return st.st_size, st.st_mtime_ns, cached['sha256']
+    return st.st_size, st.st_mtime_ns, hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def validate_all(root, jobs=None, use_cache=True):
+    """
+    Validate every skill and command of a marketplace.
+
+    Args:
+        root: Marketplace root (folder holding .claude-plugin/marketplace.json)
+        jobs: Worker processes for uncached files (default: CPU count)
+        use_cache: Reuse results for files whose content hash is unchanged
+
+    Returns:
+        Report dict with overall validity, counts, timing and per-item results
+    """
+    start = time.perf_counter()
+    root = Path(root).resolve()
+    cache_path = root / CACHE_FILE
+    version = _validator_version()
+
+    cache = {}
+    if use_cache:
+        try:
+            stored = json.loads(cache_path.read_text())
+            if stored.get('version') == version:
+                cache = stored['entries']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    items = [
+        {'kind': 'skill', 'name': f"{s['plugin']}/{s['skill']}", 'path': s['path'],
+         'file': str(Path(s['path']) / 'SKILL.md')}
+        for s in discover_skills(root)
+    ] + [
+        {'kind': 'command', 'name': f"{c['plugin']}:{c['command']}", 'path': c['path'], 'file': c['path']}
+        for c in discover_commands(root)
+    ]
+
+    pending = []
+    for item in items:
+        key = os.path.relpath(item['file'], root)
+        cached = cache.get(key)
+        size, mtime_ns, digest = _fingerprint(Path(item['file']), cached)
+        item['key'] = key
+        item['fingerprint'] = {'size': size, 'mtime_ns': mtime_ns, 'sha256': digest}
+        if cached and cached['sha256'] == digest:
+            item.update(valid=cached['valid'], message=cached['message'], cached=True)
+        else:
+            item['cached'] = False
+            pending.append(item)
+
+    targets = [(item['kind'], item['path']) for item in pending]
+    if len(targets) >= PARALLEL_THRESHOLD and (jobs or os.cpu_count() or 1) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            outcomes = list(pool.map(_validate_target, targets, chunksize=8))
+    else:
+        outcomes = [_validate_target(target) for target in targets]
+    for item, (valid, message) in zip(pending, outcomes):
+        item.update(valid=valid, message=message)
+
+    if use_cache:
+        entries = {item['key']: {**item['fingerprint'], 'valid': item['valid'], 'message': item['message']}
+                   for item in items}
+        tmp = cache_path.with_name(f".{CACHE_FILE}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({'version': version, 'entries': entries}, indent=2, sort_keys=True))
+        tmp.replace(cache_path)
+
+    results = [
+        {'kind': item['kind'], 'name': item['name'], 'path': os.path.relpath(item['path'], root),
+         'valid': item['valid'], 'message': item['message'], 'cached': item['cached']}
+        for item in items
+    ]
+    return {
+        'valid': all(r['valid'] for r in results),
+        'checked': len(results),
+        'cached': sum(r['cached'] for r in results),
+        'invalid': sum(not r['valid'] for r in results),
+        'loader': YAML_LOADER.__name__,
+        'seconds': round(time.perf_counter() - start, 4),
+        'results': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate a skill, or every skill and command of a marketplace")
+    parser.add_argument("paths", nargs="*", metavar="path",
+                        help="Skill directories, .skill archives or folders of archives "
+                             "(or the marketplace root with --all)")
+    parser.add_argument("--all", action="store_true", help="Validate every skill and command in the marketplace")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and don't update the result cache")
+    parser.add_argument("--json", action="store_true", help="Print the JSON report to stdout")
+    parser.add_argument("--report", help="Write the JSON report to a file")
+    parser.add_argument("--index", action="store_true",
+                        help="With --all, update .claude-plugin/marketplace-index.json instead of "
+                             "only checking it")
+    args = parser.parse_args()
+
+    if not args.all:
+        if not args.paths:
+            print("Usage: python quick_validate.py <skill_directory|archive.skill> [...]")
+            sys.exit(1)
+        targets = expand_paths(args.paths)
+        if len(args.paths) == 1 and len(targets) == 1 and targets[0] == Path(args.paths[0]):
+            valid, message = validate_path(targets[0])
+            print(message)
+            sys.exit(0 if valid else 1)
+
+        start = time.perf_counter()
+        results = validate_many(targets, jobs=args.jobs)
+        for path, valid, message in results:
+            if not valid or len(results) <= PARALLEL_THRESHOLD:
+                print(f"{'✅' if valid else '❌'} {path}: {message}")
+        invalid = sum(not valid for _, valid, _ in results)
+        print(f"{'✅' if not invalid else '❌'} {len(results)} checked ({invalid} invalid) "
+              f"in {(time.perf_counter() - start) * 1000:.0f}ms")
+        sys.exit(1 if invalid or not results else 0)
+
+    if len(args.paths) > 1:
+        parser.error("--all takes a single marketplace root")
+    root = Path(args.paths[0]).resolve() if args.paths else find_marketplace_root()
+    if root is None or not (root / MARKETPLACE_FILE).exists():
+        print(f"{MARKETPLACE_FILE} not found")
         sys.exit(1)
-    
-    valid, message = validate_skill(sys.argv[1])
-    print(message)
-    sys.exit(0 if valid else 1)
\ No newline at end of file
+
+    report = validate_all(root, jobs=args.jobs, use_cache=not args.no_cache)
+    # Imported here: build_index builds on this module
+    from build_index import INDEX_FILE, build_index
+    if args.index or (root / INDEX_FILE).exists():
+        _, index_stats = build_index(root, write=args.index)
+        report['index'] = index_stats
+        if not args.index and index_stats['changed']:
+            report['valid'] = False
+
+    if args.report:
+        Path(args.report).write_text(json.dumps(report, indent=2))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for r in report['results']:
+            if not r['valid']:
+                print(f"❌ {r['kind']} {r['name']}: {r['message']}")
+        print(f"{'✅' if report['valid'] else '❌'} {report['checked']} checked "
+              f"({report['cached']} cached, {report['invalid']} invalid) "
+              f"in {report['seconds'] * 1000:.0f}ms")
+        if args.index:
+            print(f"{'📦 Updated' if report['index']['changed'] else '✅ Unchanged'} marketplace index "
+                  f"({report['index']['parsed']} parsed)")
+        elif 'index' in report:
+            if report['index']['changed']:
+                print(f"❌ Stale marketplace index: run build_index.py or --index to refresh {INDEX_FILE}")
+            else:
+                print("✅ Marketplace index up to date")
+
+    sys.exit(0 if report['valid'] else 1)
+
+
+if __name__ == "__main__":
+    main()